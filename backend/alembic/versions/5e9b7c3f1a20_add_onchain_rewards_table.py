@@ -0,0 +1,38 @@
+"""Add onchain_rewards mirror table
+
+Revision ID: 5e9b7c3f1a20
+Revises: d2f6a0b84c17
+Create Date: 2026-10-16 11:38:02.517930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e9b7c3f1a20'
+down_revision: Union[str, None] = 'd2f6a0b84c17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'onchain_rewards',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('contributor_address', sa.String(), nullable=True),
+        sa.Column('session_address', sa.String(), nullable=True),
+        sa.Column('amount', sa.Float(), nullable=True),
+        sa.Column('synced_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_onchain_rewards_id'), 'onchain_rewards', ['id'], unique=False)
+    op.create_index(op.f('ix_onchain_rewards_contributor_address'), 'onchain_rewards', ['contributor_address'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_onchain_rewards_contributor_address'), table_name='onchain_rewards')
+    op.drop_index(op.f('ix_onchain_rewards_id'), table_name='onchain_rewards')
+    op.drop_table('onchain_rewards')
@@ -0,0 +1,32 @@
+"""Add covering rewards (status, contributor_address) index
+
+Revision ID: 7a3d9e5c2b61
+Revises: 5e9b7c3f1a20
+Create Date: 2026-10-16 12:04:41.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a3d9e5c2b61'
+down_revision: Union[str, None] = '5e9b7c3f1a20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_rewards_status_addr',
+        'rewards',
+        ['status', 'contributor_address'],
+        unique=False,
+        postgresql_include=['amount']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_rewards_status_addr', table_name='rewards')
@@ -0,0 +1,43 @@
+"""Add indexes for challenge, submission and reward hot paths
+
+Revision ID: 8c41d2e7a9b3
+Revises: 3be8a51823ff
+Create Date: 2026-10-16 09:12:44.318205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c41d2e7a9b3'
+down_revision: Union[str, None] = '3be8a51823ff'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_challenge_status_deadline_created',
+        'challenges',
+        ['status', 'deadline', sa.text('created_at DESC')],
+        unique=False
+    )
+    op.create_index(op.f('ix_submissions_challenge_id'), 'submissions', ['challenge_id'], unique=False)
+    op.create_index(op.f('ix_submissions_status'), 'submissions', ['status'], unique=False)
+    op.create_index(
+        'ix_reward_status_created',
+        'rewards',
+        ['status', 'created_at'],
+        unique=False,
+        postgresql_where=sa.text("status = 'completed'")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reward_status_created', table_name='rewards')
+    op.drop_index(op.f('ix_submissions_status'), table_name='submissions')
+    op.drop_index(op.f('ix_submissions_challenge_id'), table_name='submissions')
+    op.drop_index('ix_challenge_status_deadline_created', table_name='challenges')
@@ -0,0 +1,39 @@
+"""Drop single-column submission indexes covered by composites
+
+Revision ID: a8c3e6f9d214
+Revises: f5b2d8e4a637
+Create Date: 2026-10-16 15:27:52.640193
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8c3e6f9d214'
+down_revision: Union[str, None] = 'f5b2d8e4a637'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Leading columns of ix_submissions_challenge_status_time / ix_submissions_contributor_time
+REDUNDANT_INDEXES = {
+    'ix_submissions_challenge_id': 'challenge_id',
+    'ix_submissions_contributor_address': 'contributor_address',
+}
+
+
+def upgrade() -> None:
+    # ix_submissions_contributor_address only exists on databases created from
+    # the models, so drop with IF EXISTS rather than op.drop_index
+    concurrently = 'CONCURRENTLY ' if op.get_bind().dialect.name == 'postgresql' else ''
+    with op.get_context().autocommit_block():
+        for name in REDUNDANT_INDEXES:
+            op.execute(f"DROP INDEX {concurrently}IF EXISTS {name}")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, column in REDUNDANT_INDEXES.items():
+            op.create_index(name, 'submissions', [column], unique=False, postgresql_concurrently=True)
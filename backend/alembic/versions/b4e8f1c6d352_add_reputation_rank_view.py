@@ -0,0 +1,49 @@
+"""Add mv_reputation_rank materialized view
+
+Revision ID: b4e8f1c6d352
+Revises: 7a3d9e5c2b61
+Create Date: 2026-10-16 12:21:09.603417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4e8f1c6d352'
+down_revision: Union[str, None] = '7a3d9e5c2b61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Materialized views are Postgres only; SQLite keeps ranking with a window query
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute(
+        """
+        CREATE MATERIALIZED VIEW mv_reputation_rank AS
+        SELECT
+            id,
+            contributor_address,
+            total_approved,
+            total_rejected,
+            total_rewards,
+            (total_approved * 10 - total_rejected * 2 + total_rewards * 0.1) AS score,
+            row_number() OVER (
+                ORDER BY (total_approved * 10 - total_rejected * 2 + total_rewards * 0.1) DESC, id
+            ) AS rank
+        FROM contributor_reputations
+        """
+    )
+    # REFRESH ... CONCURRENTLY needs a unique index covering every row
+    op.execute("CREATE UNIQUE INDEX ix_mv_reputation_rank_id ON mv_reputation_rank (id)")
+    op.execute("CREATE INDEX ix_mv_reputation_rank_rank ON mv_reputation_rank (rank)")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_reputation_rank")
@@ -0,0 +1,79 @@
+"""Promote improvement_over_baseline out of evaluation_metrics
+
+Revision ID: b9d4f7a2c153
+Revises: a8c3e6f9d214
+Create Date: 2026-10-16 15:58:41.207316
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9d4f7a2c153'
+down_revision: Union[str, None] = 'a8c3e6f9d214'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# evaluation_metrics keys that duplicate Evaluation columns
+COLUMN_KEYS = ['accuracy', 'precision', 'recall', 'f1_score', 'loss', 'improvement_over_baseline', 'report']
+
+
+def upgrade() -> None:
+    op.add_column('evaluations', sa.Column('improvement_over_baseline', sa.Float(), nullable=True))
+
+    # Move the value into its column and drop the duplicated keys from the JSON
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        "SELECT id, evaluation_metrics FROM evaluations WHERE evaluation_metrics IS NOT NULL"
+    )).all()
+    for row_id, metrics in rows:
+        if isinstance(metrics, str):
+            metrics = json.loads(metrics)
+        improvement = metrics.get('improvement_over_baseline')
+        remaining = {key: value for key, value in metrics.items() if key not in COLUMN_KEYS}
+        bind.execute(
+            sa.text(
+                "UPDATE evaluations SET improvement_over_baseline = :improvement, "
+                "evaluation_metrics = :metrics WHERE id = :id"
+            ),
+            {"improvement": improvement, "metrics": json.dumps(remaining), "id": row_id}
+        )
+
+    # CONCURRENTLY cannot run inside a transaction block on PostgreSQL
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_evaluations_challenge_accuracy',
+            'evaluations',
+            ['challenge_id', sa.text('accuracy DESC')],
+            unique=False,
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_evaluations_challenge_accuracy', table_name='evaluations', postgresql_concurrently=True)
+
+    # Rebuild the duplicated keys from their columns ('report' comes from evaluation_report)
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        "SELECT id, evaluation_metrics, accuracy, precision, recall, f1_score, loss, "
+        "improvement_over_baseline, evaluation_report FROM evaluations "
+        "WHERE evaluation_metrics IS NOT NULL OR improvement_over_baseline IS NOT NULL"
+    )).all()
+    for row_id, metrics, *values in rows:
+        if isinstance(metrics, str):
+            metrics = json.loads(metrics)
+        columns = {key: value for key, value in zip(COLUMN_KEYS, values) if value is not None}
+        metrics = {**(metrics or {}), **columns}
+        bind.execute(
+            sa.text("UPDATE evaluations SET evaluation_metrics = :metrics WHERE id = :id"),
+            {"metrics": json.dumps(metrics), "id": row_id}
+        )
+
+    with op.batch_alter_table('evaluations') as batch_op:
+        batch_op.drop_column('improvement_over_baseline')
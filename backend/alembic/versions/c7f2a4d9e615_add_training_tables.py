@@ -0,0 +1,139 @@
+"""Add federated training tables
+
+Revision ID: c7f2a4d9e615
+Revises: b4e8f1c6d352
+Create Date: 2026-10-16 12:48:27.341902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7f2a4d9e615'
+down_revision: Union[str, None] = 'b4e8f1c6d352'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'training_sessions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('session_id', sa.String(), nullable=True),
+        sa.Column('model_hash', sa.String(), nullable=True),
+        sa.Column('model_architecture', sa.Text(), nullable=True),
+        sa.Column('trainer_address', sa.String(), nullable=True),
+        sa.Column('total_rounds', sa.Integer(), nullable=True),
+        sa.Column('current_round', sa.Integer(), nullable=True),
+        sa.Column('min_contributors', sa.Integer(), nullable=True),
+        sa.Column('reward_per_contributor', sa.Float(), nullable=True),
+        sa.Column('accuracy_threshold', sa.Float(), nullable=True),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_training_sessions_id'), 'training_sessions', ['id'], unique=False)
+    op.create_index(op.f('ix_training_sessions_session_id'), 'training_sessions', ['session_id'], unique=True)
+    op.create_index(op.f('ix_training_sessions_trainer_address'), 'training_sessions', ['trainer_address'], unique=False)
+    op.create_index(op.f('ix_training_sessions_status'), 'training_sessions', ['status'], unique=False)
+
+    op.create_table(
+        'training_rounds',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('session_id', sa.Integer(), nullable=True),
+        sa.Column('round_number', sa.Integer(), nullable=True),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('contributors_count', sa.Integer(), nullable=True),
+        sa.Column('aggregated_model_hash', sa.String(), nullable=True),
+        sa.Column('accuracy', sa.Float(), nullable=True),
+        sa.Column('started_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['session_id'], ['training_sessions.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_training_rounds_id'), 'training_rounds', ['id'], unique=False)
+    op.create_index(op.f('ix_training_rounds_session_id'), 'training_rounds', ['session_id'], unique=False)
+    op.create_index('ix_training_round_session_number', 'training_rounds', ['session_id', 'round_number'], unique=True)
+
+    op.create_table(
+        'contributions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('session_id', sa.Integer(), nullable=True),
+        sa.Column('round_id', sa.Integer(), nullable=True),
+        sa.Column('contributor_address', sa.String(), nullable=True),
+        sa.Column('gradient_hash', sa.String(), nullable=True),
+        sa.Column('commitment_hash', sa.String(), nullable=True),
+        sa.Column('nonce', sa.String(), nullable=True),
+        sa.Column('accuracy', sa.Float(), nullable=True),
+        sa.Column('privacy_score', sa.Float(), nullable=True),
+        sa.Column('encrypted_gradients', sa.Text(), nullable=True),
+        sa.Column('reward_amount', sa.Float(), nullable=True),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('solana_tx_hash', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.ForeignKeyConstraint(['round_id'], ['training_rounds.id'], ),
+        sa.ForeignKeyConstraint(['session_id'], ['training_sessions.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_contributions_id'), 'contributions', ['id'], unique=False)
+    op.create_index(op.f('ix_contributions_session_id'), 'contributions', ['session_id'], unique=False)
+    op.create_index(op.f('ix_contributions_round_id'), 'contributions', ['round_id'], unique=False)
+    op.create_index(op.f('ix_contributions_contributor_address'), 'contributions', ['contributor_address'], unique=False)
+    op.create_index(op.f('ix_contributions_solana_tx_hash'), 'contributions', ['solana_tx_hash'], unique=False)
+    op.create_index('ix_contributions_addr_status', 'contributions', ['contributor_address', 'status'], unique=False)
+
+    op.create_table(
+        'model_checkpoints',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('session_id', sa.Integer(), nullable=True),
+        sa.Column('round_number', sa.Integer(), nullable=True),
+        sa.Column('model_hash', sa.String(), nullable=True),
+        sa.Column('model_weights', sa.Text(), nullable=True),
+        sa.Column('accuracy', sa.Float(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.ForeignKeyConstraint(['session_id'], ['training_sessions.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_model_checkpoints_id'), 'model_checkpoints', ['id'], unique=False)
+    op.create_index(op.f('ix_model_checkpoints_session_id'), 'model_checkpoints', ['session_id'], unique=False)
+    op.create_index(op.f('ix_model_checkpoints_model_hash'), 'model_checkpoints', ['model_hash'], unique=False)
+
+    with op.batch_alter_table('rewards') as batch_op:
+        batch_op.add_column(sa.Column('session_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('round_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_rewards_session_id', 'training_sessions', ['session_id'], ['id'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('rewards') as batch_op:
+        batch_op.drop_constraint('fk_rewards_session_id', type_='foreignkey')
+        batch_op.drop_column('round_id')
+        batch_op.drop_column('session_id')
+
+    op.drop_index(op.f('ix_model_checkpoints_model_hash'), table_name='model_checkpoints')
+    op.drop_index(op.f('ix_model_checkpoints_session_id'), table_name='model_checkpoints')
+    op.drop_index(op.f('ix_model_checkpoints_id'), table_name='model_checkpoints')
+    op.drop_table('model_checkpoints')
+
+    op.drop_index('ix_contributions_addr_status', table_name='contributions')
+    op.drop_index(op.f('ix_contributions_solana_tx_hash'), table_name='contributions')
+    op.drop_index(op.f('ix_contributions_contributor_address'), table_name='contributions')
+    op.drop_index(op.f('ix_contributions_round_id'), table_name='contributions')
+    op.drop_index(op.f('ix_contributions_session_id'), table_name='contributions')
+    op.drop_index(op.f('ix_contributions_id'), table_name='contributions')
+    op.drop_table('contributions')
+
+    op.drop_index('ix_training_round_session_number', table_name='training_rounds')
+    op.drop_index(op.f('ix_training_rounds_session_id'), table_name='training_rounds')
+    op.drop_index(op.f('ix_training_rounds_id'), table_name='training_rounds')
+    op.drop_table('training_rounds')
+
+    op.drop_index(op.f('ix_training_sessions_status'), table_name='training_sessions')
+    op.drop_index(op.f('ix_training_sessions_trainer_address'), table_name='training_sessions')
+    op.drop_index(op.f('ix_training_sessions_session_id'), table_name='training_sessions')
+    op.drop_index(op.f('ix_training_sessions_id'), table_name='training_sessions')
+    op.drop_table('training_sessions')
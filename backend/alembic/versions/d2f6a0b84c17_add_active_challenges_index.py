@@ -0,0 +1,32 @@
+"""Add partial index for active challenge listing
+
+Revision ID: d2f6a0b84c17
+Revises: 8c41d2e7a9b3
+Create Date: 2026-10-16 10:05:21.904417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f6a0b84c17'
+down_revision: Union[str, None] = '8c41d2e7a9b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_active_challenges',
+        'challenges',
+        ['deadline', sa.text('created_at DESC')],
+        unique=False,
+        postgresql_where=sa.text("status = 'active'")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_active_challenges', table_name='challenges')
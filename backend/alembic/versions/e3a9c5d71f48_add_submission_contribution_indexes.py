@@ -0,0 +1,51 @@
+"""Add composite indexes for submission listing and round aggregation
+
+Revision ID: e3a9c5d71f48
+Revises: c7f2a4d9e615
+Create Date: 2026-10-16 14:21:09.552318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a9c5d71f48'
+down_revision: Union[str, None] = 'c7f2a4d9e615'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction block on PostgreSQL
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_submissions_challenge_status_time',
+            'submissions',
+            ['challenge_id', 'status', sa.text('submitted_at DESC')],
+            unique=False,
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_submissions_contributor_time',
+            'submissions',
+            ['contributor_address', sa.text('submitted_at DESC')],
+            unique=False,
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_contributions_round_status',
+            'contributions',
+            ['round_id', 'status'],
+            unique=False,
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_contributions_round_status', table_name='contributions', postgresql_concurrently=True)
+        op.drop_index('ix_submissions_contributor_time', table_name='submissions', postgresql_concurrently=True)
+        op.drop_index('ix_submissions_challenge_status_time', table_name='submissions', postgresql_concurrently=True)
@@ -0,0 +1,70 @@
+"""Store contribution gradients and checkpoint weights as binary
+
+Revision ID: f5b2d8e4a637
+Revises: e3a9c5d71f48
+Create Date: 2026-10-16 15:02:37.184926
+
+"""
+import base64
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5b2d8e4a637'
+down_revision: Union[str, None] = 'e3a9c5d71f48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column) pairs that held base64 text
+BLOB_COLUMNS = [
+    ('contributions', 'encrypted_gradients'),
+    ('model_checkpoints', 'model_weights'),
+]
+
+
+def _convert_rows(table: str, column: str, convert) -> None:
+    """Rewrite each non-null value of table.column through convert (SQLite has no base64 functions)"""
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(f"SELECT id, {column} FROM {table} WHERE {column} IS NOT NULL")).all()
+    for row_id, value in rows:
+        bind.execute(
+            sa.text(f"UPDATE {table} SET {column} = :value WHERE id = :id"),
+            {"value": convert(value), "id": row_id}
+        )
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        for table, column in BLOB_COLUMNS:
+            op.alter_column(
+                table, column,
+                type_=sa.LargeBinary(),
+                existing_type=sa.Text(),
+                postgresql_using=f"decode({column}, 'base64')"
+            )
+        return
+
+    for table, column in BLOB_COLUMNS:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(column, type_=sa.LargeBinary(), existing_type=sa.Text())
+        _convert_rows(table, column, lambda value: base64.b64decode(value))
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        for table, column in BLOB_COLUMNS:
+            op.alter_column(
+                table, column,
+                type_=sa.Text(),
+                existing_type=sa.LargeBinary(),
+                postgresql_using=f"encode({column}, 'base64')"
+            )
+        return
+
+    for table, column in BLOB_COLUMNS:
+        _convert_rows(table, column, lambda value: base64.b64encode(value).decode())
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(column, type_=sa.Text(), existing_type=sa.LargeBinary())
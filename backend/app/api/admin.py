@@ -2,13 +2,18 @@
 Admin API Routes - For moderators to approve/reject submissions
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy.dialects import postgresql, sqlite
 from typing import Optional
 from datetime import datetime
 import logging
 
-from app.db.database import get_db
-from app.db.models import Challenge, Submission, Evaluation, ContributorReputation, Reward
+from app.core.cache import invalidate_analytics, invalidate_challenge_list
+from app.db.database import get_async_db
+from app.db.loading import safe_load
+from app.db.models import Challenge, Submission, ContributorReputation, Reward
 from app.services.flexai_solana_service import flexai_solana_service
 from pydantic import BaseModel
 
@@ -16,6 +21,21 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+def _reputation_upsert(db: AsyncSession, contributor_address: str, **increments):
+    """Build a single INSERT ... ON CONFLICT DO UPDATE that adds increments to a contributor's reputation"""
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(ContributorReputation).values(
+        contributor_address=contributor_address,
+        **increments
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[ContributorReputation.contributor_address],
+        set_={
+            column: getattr(ContributorReputation, column) + getattr(stmt.excluded, column)
+            for column in increments
+        }
+    )
+
 # Pydantic models
 class ApprovalRequest(BaseModel):
     submission_id: int
@@ -30,55 +50,100 @@ class RejectionRequest(BaseModel):
 @router.post("/approve", status_code=status.HTTP_200_OK)
 async def approve_submission(
     approval_data: ApprovalRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Approve a model submission and release reward"""
     try:
         # Validate moderator address
         moderator_address = approval_data.moderator_address.lower()
         
-        # Get submission
-        submission = db.query(Submission).filter(Submission.id == approval_data.submission_id).first()
-        if not submission:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Submission not found"
-            )
-        
-        if submission.status != "pending":
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Submission already {submission.status}"
-            )
-        
-        # Validate that moderator wallet is different from contributor wallet
-        contributor_address = submission.contributor_address.lower()
-        if moderator_address == contributor_address:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Moderator wallet cannot be the same as contributor wallet. Please use a different wallet for moderation."
-            )
-        
-        # Get challenge
-        challenge = db.query(Challenge).filter(Challenge.id == submission.challenge_id).first()
-        if not challenge:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Challenge not found"
-            )
-        
-        # Get evaluation
-        evaluation = db.query(Evaluation).filter(Evaluation.submission_id == submission.id).first()
-        if not evaluation:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Submission has not been evaluated yet"
-            )
-        
         # Get transaction hash (either from frontend or create new transaction)
         reward_tx_hash = approval_data.reward_tx_hash
         
-        # If transaction hash not provided, try to create transaction server-side
+        # Validate and record the approval under a row lock so a concurrent
+        # approve of the same submission sees it as no longer pending
+        async with db.begin():
+            # Get submission together with its challenge and evaluation in one round trip
+            result = await db.execute(
+                select(Submission)
+                .options(*safe_load(joinedload(Submission.challenge), joinedload(Submission.evaluation)))
+                .where(Submission.id == approval_data.submission_id)
+                .with_for_update(of=Submission)
+            )
+            submission = result.unique().scalar_one_or_none()
+            if not submission:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Submission not found"
+                )
+            
+            if submission.status != "pending":
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Submission already {submission.status}"
+                )
+            
+            # Validate that moderator wallet is different from contributor wallet
+            contributor_address = submission.contributor_address.lower()
+            if moderator_address == contributor_address:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Moderator wallet cannot be the same as contributor wallet. Please use a different wallet for moderation."
+                )
+            
+            # Get challenge
+            challenge = submission.challenge
+            if not challenge:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Challenge not found"
+                )
+            
+            # Get evaluation
+            evaluation = submission.evaluation
+            if not evaluation:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Submission has not been evaluated yet"
+                )
+            
+            # Update submission
+            submission.status = "approved"
+            submission.approved_at = datetime.utcnow()
+            submission.reward_tx_hash = reward_tx_hash
+            submission.reward_amount = challenge.reward_amount
+            
+            # Update challenge stats (in SQL, so concurrent approvals don't lose increments)
+            challenge.approved_submissions = Challenge.approved_submissions + 1
+            
+            # Update or create contributor reputation
+            await db.execute(_reputation_upsert(
+                db,
+                submission.contributor_address,
+                total_approved=1,
+                total_rewards=challenge.reward_amount
+            ))
+            
+            # Create reward record
+            reward = Reward(
+                contributor_address=submission.contributor_address,
+                challenge_id=challenge.id,
+                submission_id=submission.id,
+                amount=challenge.reward_amount,
+                token_amount=challenge.reward_amount,
+                token_mint=challenge.reward_token_mint,
+                solana_tx_hash=reward_tx_hash,
+                status="completed" if reward_tx_hash else "pending"
+            )
+            
+            if reward_tx_hash:
+                reward.completed_at = datetime.utcnow()
+            
+            db.add_all([reward])
+        
+        # If transaction hash not provided, try to create transaction server-side.
+        # The approval is already committed, so the connection is back in the pool
+        # while waiting on the blockchain and a retry cannot pay out twice.
         if not reward_tx_hash:
             try:
                 reward_tx_hash = await flexai_solana_service.approve_model(
@@ -89,51 +154,18 @@ async def approve_submission(
             except Exception as e:
                 reward_tx_hash = None
                 logger.error(f"Blockchain approval failed: {e}")
-                # Still continue with database update even if blockchain fails
-        
-        # Update submission
-        submission.status = "approved"
-        submission.approved_at = datetime.utcnow()
-        submission.reward_tx_hash = reward_tx_hash
-        submission.reward_amount = challenge.reward_amount
-        
-        # Update challenge stats
-        challenge.approved_submissions += 1
-        
-        # Update or create contributor reputation
-        reputation = db.query(ContributorReputation).filter(
-            ContributorReputation.contributor_address == submission.contributor_address
-        ).first()
-        
-        if not reputation:
-            reputation = ContributorReputation(
-                contributor_address=submission.contributor_address,
-                total_approved=1,
-                total_rewards=challenge.reward_amount
-            )
-            db.add(reputation)
-        else:
-            reputation.total_approved += 1
-            reputation.total_rewards += challenge.reward_amount
-        
-        # Create reward record
-        reward = Reward(
-            contributor_address=submission.contributor_address,
-            challenge_id=challenge.id,
-            submission_id=submission.id,
-            amount=challenge.reward_amount,
-            token_amount=challenge.reward_amount,
-            token_mint=challenge.reward_token_mint,
-            solana_tx_hash=reward_tx_hash,
-            status="completed" if reward_tx_hash else "pending"
-        )
-        
-        if reward_tx_hash:
-            reward.completed_at = datetime.utcnow()
-        
-        db.add(reward)
-        db.commit()
-        db.refresh(submission)
+                # Approval stands even if blockchain fails; reward stays pending
+            
+            if reward_tx_hash:
+                submission.reward_tx_hash = reward_tx_hash
+                reward.solana_tx_hash = reward_tx_hash
+                reward.status = "completed"
+                reward.completed_at = datetime.utcnow()
+                await db.commit()
+        
+        await db.refresh(submission)
+        await invalidate_analytics()
+        await invalidate_challenge_list()
         
         return {
             "message": "Submission approved successfully",
@@ -145,7 +177,7 @@ async def approve_submission(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error approving submission: {str(e)}"
@@ -154,45 +186,42 @@ async def approve_submission(
 @router.post("/reject", status_code=status.HTTP_200_OK)
 async def reject_submission(
     rejection_data: RejectionRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Reject a model submission"""
     try:
-        # Get submission
-        submission = db.query(Submission).filter(Submission.id == rejection_data.submission_id).first()
-        if not submission:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Submission not found"
-            )
-        
-        if submission.status != "pending":
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Submission already {submission.status}"
+        # Validate and record the rejection under a row lock so a concurrent
+        # approve or reject of the same submission sees it as no longer pending
+        async with db.begin():
+            # Get submission
+            result = await db.execute(
+                select(Submission)
+                .where(Submission.id == rejection_data.submission_id)
+                .with_for_update()
             )
-        
-        # Update submission
-        submission.status = "rejected"
-        submission.rejected_at = datetime.utcnow()
-        submission.rejection_reason = rejection_data.reason
-        
-        # Update contributor reputation
-        reputation = db.query(ContributorReputation).filter(
-            ContributorReputation.contributor_address == submission.contributor_address
-        ).first()
-        
-        if not reputation:
-            reputation = ContributorReputation(
-                contributor_address=submission.contributor_address,
-                total_rejected=1
-            )
-            db.add(reputation)
-        else:
-            reputation.total_rejected += 1
-        
-        db.commit()
-        db.refresh(submission)
+            submission = result.scalar_one_or_none()
+            if not submission:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Submission not found"
+                )
+            
+            if submission.status != "pending":
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Submission already {submission.status}"
+                )
+            
+            # Update submission
+            submission.status = "rejected"
+            submission.rejected_at = datetime.utcnow()
+            submission.rejection_reason = rejection_data.reason
+            
+            # Update contributor reputation
+            await db.execute(_reputation_upsert(db, submission.contributor_address, total_rejected=1))
+        
+        await db.refresh(submission)
+        await invalidate_analytics()
         
         return {
             "message": "Submission rejected",
@@ -203,7 +232,7 @@ async def reject_submission(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error rejecting submission: {str(e)}"
@@ -2,46 +2,61 @@
 Analytics API - Real on-chain data analytics
 """
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import Optional
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import desc, select, func, union
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import Counter, defaultdict
+import asyncio
 
-from app.db.database import get_db
+from app.core.cache import cache, ANALYTICS_DASHBOARD_KEY, ANALYTICS_NETWORK_STATS_KEY
+from app.core.config import settings
+from app.db.database import get_async_db
 from app.db.models import TrainingSession, Contribution, Reward
-from app.services.solana_service import SolanaService
+from app.services.solana_service import solana_service
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 @router.get("/dashboard")
-async def get_dashboard_stats(db: Session = Depends(get_db)):
+async def get_dashboard_stats(db: AsyncSession = Depends(get_async_db)):
     """Get real-time dashboard statistics from blockchain and database"""
-    solana_service = SolanaService()
+    cached = await cache.get(ANALYTICS_DASHBOARD_KEY)
+    if cached is not None:
+        return cached
     
-    # Get on-chain data
-    onchain_sessions = await solana_service.get_training_sessions_onchain()
-    onchain_contributions = await solana_service.get_contributions_onchain("")
-    onchain_rewards = await solana_service.get_rewards_onchain()
+    # Get on-chain data (single batched RPC request), DB-only when no chain is configured
+    if solana_service.is_configured:
+        onchain_sessions, onchain_contributions, onchain_rewards = await solana_service.get_onchain_snapshot()
+    else:
+        onchain_sessions, onchain_contributions, onchain_rewards = [], [], []
     
-    # Get database data
-    db_sessions = db.query(TrainingSession).all()
-    db_contributions = db.query(Contribution).all()
-    db_rewards = db.query(Reward).filter(Reward.status == "completed").all()
+    # Get database aggregates (computed in SQL, no row materialization)
+    session_counts = (await db.execute(select(
+        func.count(func.distinct(TrainingSession.session_id)),
+        func.count().filter(TrainingSession.status == "active")
+    ))).one()
+    db_contribution_count = (await db.execute(select(func.count(Contribution.id)))).scalar_one()
+    db_rewards_total = (await db.execute(
+        select(func.coalesce(func.sum(Reward.amount), 0)).where(Reward.status == "completed")
+    )).scalar_one()
+    db_contributors = (await db.execute(
+        select(Contribution.contributor_address).distinct()
+    )).scalars().all()
     
     # Calculate totals
-    total_sessions = len(set(s.session_id for s in db_sessions)) + len(set(s.get("session_id") for s in onchain_sessions if s.get("session_id")))
-    total_contributions = len(db_contributions) + len(onchain_contributions)
-    total_rewards_distributed = sum(r.amount for r in db_rewards) + sum(r.get("amount", 0) for r in onchain_rewards)
+    total_sessions = session_counts[0] + len(set(s.get("session_id") for s in onchain_sessions if s.get("session_id")))
+    total_contributions = db_contribution_count + len(onchain_contributions)
+    total_rewards_distributed = db_rewards_total + sum(r.get("amount", 0) for r in onchain_rewards)
     
     # Active sessions
-    active_sessions = len([s for s in db_sessions if s.status == "active"]) + len([s for s in onchain_sessions if s.get("status") == 1])
+    active_sessions = session_counts[1] + len([s for s in onchain_sessions if s.get("status") == 1])
     
-    # Unique contributors
-    contributors = set()
-    contributors.update(c.contributor_address for c in db_contributions)
+    # Unique contributors (distinct DB addresses merged with on-chain ones)
+    contributors = set(db_contributors)
     contributors.update(c.get("contributor") for c in onchain_contributions if c.get("contributor"))
     
-    return {
+    result = {
         "total_sessions": total_sessions,
         "active_sessions": active_sessions,
         "total_contributions": total_contributions,
@@ -50,16 +65,21 @@ async def get_dashboard_stats(db: Session = Depends(get_db)):
         "source": "blockchain + database",
         "timestamp": datetime.utcnow().isoformat()
     }
+    await cache.set(ANALYTICS_DASHBOARD_KEY, result, settings.ANALYTICS_CACHE_TTL)
+    return result
 
 @router.get("/network-stats")
 async def get_network_stats():
     """Get network-wide statistics from blockchain"""
-    solana_service = SolanaService()
+    cached = await cache.get(ANALYTICS_NETWORK_STATS_KEY)
+    if cached is not None:
+        return cached
     
-    # Get all on-chain data
-    sessions = await solana_service.get_training_sessions_onchain()
-    contributions = await solana_service.get_contributions_onchain("")
-    rewards = await solana_service.get_rewards_onchain()
+    # Get all on-chain data (single batched RPC request)
+    if solana_service.is_configured:
+        sessions, contributions, rewards = await solana_service.get_onchain_snapshot()
+    else:
+        sessions, contributions, rewards = [], [], []
     
     # Calculate statistics
     total_sessions = len(sessions)
@@ -82,7 +102,7 @@ async def get_network_stats():
         elif status == 2:
             sessions_by_status["completed"] += 1
     
-    return {
+    result = {
         "total_sessions": total_sessions,
         "total_contributions": total_contributions,
         "total_rewards_distributed": total_rewards,
@@ -91,91 +111,208 @@ async def get_network_stats():
         "source": "blockchain",
         "timestamp": datetime.utcnow().isoformat()
     }
+    await cache.set(ANALYTICS_NETWORK_STATS_KEY, result, settings.ANALYTICS_CACHE_TTL)
+    return result
 
 @router.get("/rewards-timeline")
 async def get_rewards_timeline(
     days: int = 30,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get rewards distribution over time"""
-    solana_service = SolanaService()
+    cache_key = f"analytics:timeline:{days}"
+    cached = await cache.get(cache_key)
+    if cached is not None:
+        return cached
     
     # Get on-chain rewards
-    onchain_rewards = await solana_service.get_rewards_onchain()
+    onchain_rewards = await solana_service.get_rewards_onchain() if solana_service.is_configured else []
     
     # Get database rewards
-    db_rewards = db.query(Reward).filter(
+    now = datetime.utcnow()
+    db_rewards = (await db.execute(select(Reward).where(
         Reward.status == "completed",
-        Reward.created_at >= datetime.utcnow() - timedelta(days=days)
-    ).all()
+        Reward.created_at >= now - timedelta(days=days)
+    ))).scalars().all()
     
     # Group by date
-    timeline = defaultdict(float)
+    timeline = {}
+    today = now.date().isoformat()
     
     # Database rewards
     for reward in db_rewards:
-        date = reward.created_at.date() if reward.created_at else datetime.utcnow().date()
-        timeline[date.isoformat()] += reward.amount
+        date = reward.created_at.date().isoformat() if reward.created_at else today
+        timeline[date] = timeline.get(date, 0.0) + reward.amount
     
     # On-chain rewards (approximate by current date if no timestamp)
-    for reward in onchain_rewards:
-        date = datetime.utcnow().date()  # Approximate
-        timeline[date.isoformat()] += reward.get("amount", 0)
+    onchain_total = sum(reward.get("amount", 0) for reward in onchain_rewards)
+    if onchain_rewards:
+        timeline[today] = timeline.get(today, 0.0) + onchain_total
     
-    return {
-        "timeline": dict(timeline),
+    result = {
+        "timeline": timeline,
         "days": days,
         "source": "blockchain + database"
     }
+    await cache.set(cache_key, result, settings.ANALYTICS_CACHE_TTL)
+    return result
+
+def contributor_activity_query(since: datetime, addresses: Optional[List[str]] = None):
+    """Per-contributor DB activity since a cutoff: contributions, distinct sessions and completed rewards.
+
+    Contributors with only rewards (or only contributions) are included; without
+    an address filter, rows come back busiest first.
+    """
+    contribution_stats = (
+        select(
+            Contribution.contributor_address.label("contributor_address"),
+            func.count().label("contributions"),
+            func.count(func.distinct(Contribution.session_id)).label("sessions")
+        )
+        .where(Contribution.created_at >= since)
+        .group_by(Contribution.contributor_address)
+    )
+    reward_stats = (
+        select(
+            Reward.contributor_address.label("contributor_address"),
+            func.sum(Reward.amount).label("rewards")
+        )
+        .where(Reward.status == "completed", Reward.created_at >= since)
+        .group_by(Reward.contributor_address)
+    )
+    if addresses is not None:
+        contribution_stats = contribution_stats.where(Contribution.contributor_address.in_(addresses))
+        reward_stats = reward_stats.where(Reward.contributor_address.in_(addresses))
+    contribution_stats = contribution_stats.subquery()
+    reward_stats = reward_stats.subquery()
+    
+    contributors = union(
+        select(contribution_stats.c.contributor_address),
+        select(reward_stats.c.contributor_address)
+    ).subquery()
+    contributions = func.coalesce(contribution_stats.c.contributions, 0)
+    return (
+        select(
+            contributors.c.contributor_address,
+            contributions.label("contributions"),
+            func.coalesce(contribution_stats.c.sessions, 0).label("sessions"),
+            func.coalesce(reward_stats.c.rewards, 0).label("rewards")
+        )
+        .outerjoin(contribution_stats, contribution_stats.c.contributor_address == contributors.c.contributor_address)
+        .outerjoin(reward_stats, reward_stats.c.contributor_address == contributors.c.contributor_address)
+        .where(contributors.c.contributor_address.isnot(None))
+        .order_by(desc(contributions), contributors.c.contributor_address)
+    )
 
 @router.get("/contributor-activity")
 async def get_contributor_activity(
     address: Optional[str] = None,
-    days: int = 30
+    days: int = 30,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get contributor activity statistics"""
-    solana_service = SolanaService()
+    """Get contributor activity statistics.
+
+    DB activity is filtered to the last `days` days and ranked in SQL; on-chain
+    records are only added when they have no DB row (contributions matched on
+    gradient_hash, rewards on contributor + session). On-chain accounts carry
+    no timestamp, so those are not filtered by `days`.
+    """
+    cache_key = f"analytics:contributor-activity:{address or 'all'}:{days}:{limit}"
+    cached = await cache.get(cache_key)
+    if cached is not None:
+        return cached
     
-    # Get contributions
-    contributions = await solana_service.get_contributions_onchain("")
-    if address:
-        contributions = [c for c in contributions if c.get("contributor") == address]
+    since = datetime.utcnow() - timedelta(days=days)
+    activity_query = contributor_activity_query(since, [address] if address else None).limit(limit)
     
-    # Get rewards
-    rewards = await solana_service.get_rewards_onchain(address)
+    # Get database activity and on-chain contributions/rewards concurrently
+    if solana_service.is_configured:
+        db_activity, contributions, rewards = await asyncio.gather(
+            db.execute(activity_query),
+            solana_service.get_contributions_onchain(""),
+            solana_service.get_rewards_onchain(address)
+        )
+    else:
+        db_activity, contributions, rewards = await db.execute(activity_query), [], []
+    contributions = [c for c in contributions if c.get("contributor") and (not address or c["contributor"] == address)]
+    rewards = [r for r in rewards if r.get("contributor") and (not address or r["contributor"] == address)]
     
-    # Group by contributor
-    activity = defaultdict(lambda: {
-        "contributions": 0,
-        "rewards": 0.0,
-        "sessions": set()
-    })
+    # Drop on-chain records that submit_update / distribute_rewards also wrote to the DB
+    onchain_hashes = {c["gradient_hash"] for c in contributions if c.get("gradient_hash")}
+    if onchain_hashes:
+        known_hashes = set((await db.execute(
+            select(Contribution.gradient_hash).where(Contribution.gradient_hash.in_(onchain_hashes))
+        )).scalars())
+        contributions = [c for c in contributions if c.get("gradient_hash") not in known_hashes]
+    if rewards:
+        paid = await db.execute(
+            select(Reward.contributor_address, TrainingSession.session_id)
+            .join(TrainingSession, TrainingSession.id == Reward.session_id)
+            .where(
+                Reward.solana_tx_hash.isnot(None),
+                Reward.contributor_address.in_({r["contributor"] for r in rewards})
+            )
+            .distinct()
+        )
+        known_rewards = {(addr, solana_service.session_address(session_id)) for addr, session_id in paid}
+        rewards = [r for r in rewards if (r["contributor"], r.get("session")) not in known_rewards]
     
+    def empty_activity():
+        return {"contributions": 0, "rewards": 0.0, "sessions": 0}
+    
+    activity = {
+        row.contributor_address: {
+            "contributions": row.contributions,
+            "rewards": float(row.rewards),
+            "sessions": row.sessions
+        }
+        for row in db_activity
+    }
+    
+    # Contributors outside the DB page that have on-chain-only records need their DB totals too
+    missing = ({c["contributor"] for c in contributions} | {r["contributor"] for r in rewards}) - activity.keys()
+    if missing:
+        for row in await db.execute(contributor_activity_query(since, list(missing))):
+            activity[row.contributor_address] = {
+                "contributions": row.contributions,
+                "rewards": float(row.rewards),
+                "sessions": row.sessions
+            }
+    
+    # Merge on-chain-only records; distinct sessions are counted from the unique
+    # (contributor, session) pairs instead of keeping a set per contributor
     for contrib in contributions:
-        addr = contrib.get("contributor")
-        if addr:
-            activity[addr]["contributions"] += 1
-            session = contrib.get("session")
-            if session:
-                activity[addr]["sessions"].add(session)
+        activity.setdefault(contrib["contributor"], empty_activity())["contributions"] += 1
+    
+    onchain_sessions = Counter(
+        addr for addr, _ in {
+            (c["contributor"], c.get("session"))
+            for c in contributions
+            if c.get("session")
+        }
+    )
+    for addr, count in onchain_sessions.items():
+        activity[addr]["sessions"] += count
     
     for reward in rewards:
-        addr = reward.get("contributor")
-        if addr:
-            activity[addr]["rewards"] += reward.get("amount", 0)
+        activity.setdefault(reward["contributor"], empty_activity())["rewards"] += reward.get("amount", 0)
     
     # Format response
-    result = []
-    for addr, data in activity.items():
-        result.append({
+    result = [
+        {
             "contributor_address": addr,
             "contributions_count": data["contributions"],
             "total_rewards": data["rewards"],
-            "sessions_participated": len(data["sessions"])
-        })
+            "sessions_participated": data["sessions"]
+        }
+        for addr, data in activity.items()
+    ]
+    result.sort(key=lambda x: x["contributions_count"], reverse=True)
     
-    return {
-        "activity": sorted(result, key=lambda x: x["contributions_count"], reverse=True),
-        "source": "blockchain"
+    response = {
+        "activity": result[:limit],
+        "source": "blockchain + database"
     }
-
+    await cache.set(cache_key, response, settings.ANALYTICS_CACHE_TTL)
+    return response
@@ -8,7 +8,7 @@ from typing import Optional
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 from app.db.database import get_db
 from app.db.models import User
@@ -34,8 +34,7 @@ class UserResponse(BaseModel):
     wallet_address: Optional[str]
     role: str
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, extra="ignore")
 
 class Token(BaseModel):
     access_token: str
@@ -2,21 +2,26 @@
 Challenges API Routes
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy import desc, func, select
 from typing import List, Optional
 from datetime import datetime, timedelta
-import uuid
 import logging
 
-from app.db.database import get_db
-from app.db.models import Challenge, Submission
+from app.core.cache import cache, invalidate_analytics, invalidate_challenge_list, CHALLENGE_LIST_PREFIX
+from app.core.config import settings
+from app.core.ids import uuid7
+from app.db.database import get_async_db
+from app.db.loading import safe_load
+from app.db.models import Challenge
 from app.services.flexai_solana_service import flexai_solana_service
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ConfigDict, TypeAdapter
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 # Pydantic models
 class ChallengeCreate(BaseModel):
@@ -48,19 +53,21 @@ class ChallengeResponse(BaseModel):
     solana_tx_hash: Optional[str]
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, extra="ignore")
 
 class ChallengeListResponse(BaseModel):
     challenges: List[ChallengeResponse]
     total: int
 
+# Validates and serializes a whole page of ORM rows in one pass
+challenge_list_adapter = TypeAdapter(List[ChallengeResponse])
+
 @router.post("/", response_model=ChallengeResponse, status_code=status.HTTP_201_CREATED)
-async def create_challenge(challenge_data: ChallengeCreate, db: Session = Depends(get_db)):
+async def create_challenge(challenge_data: ChallengeCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new AI fine-tuning challenge"""
     try:
         # Generate unique challenge ID
-        challenge_id = str(uuid.uuid4())
+        challenge_id = str(uuid7())
         
         # Create challenge on blockchain (optional - challenge creation doesn't require blockchain)
         tx_hash = None
@@ -101,14 +108,16 @@ async def create_challenge(challenge_data: ChallengeCreate, db: Session = Depend
         )
         
         db.add(db_challenge)
-        db.commit()
-        db.refresh(db_challenge)
+        await db.commit()
+        await db.refresh(db_challenge)
+        await invalidate_analytics()
+        await invalidate_challenge_list()
         
         return db_challenge
         
     except ValueError as e:
         # Validation errors
-        db.rollback()
+        await db.rollback()
         logger.error(f"Validation error creating challenge: {e}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -116,7 +125,7 @@ async def create_challenge(challenge_data: ChallengeCreate, db: Session = Depend
         )
     except Exception as e:
         # Database or other errors
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error creating challenge: {e}", exc_info=True)
         error_message = str(e)
         # Provide more helpful error messages
@@ -136,30 +145,52 @@ async def create_challenge(challenge_data: ChallengeCreate, db: Session = Depend
                 detail=f"Error creating challenge: {error_message}. Please check your database connection and try again."
             )
 
-@router.get("/", response_model=ChallengeListResponse)
+@router.get("/", response_model=None, responses={200: {"model": ChallengeListResponse}})
 async def list_challenges(
     status_filter: Optional[str] = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """List all challenges"""
+    cache_key = await cache.versioned_key(CHALLENGE_LIST_PREFIX, f"{status_filter or 'all'}:{skip}:{limit}")
+    cached = await cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
-        query = db.query(Challenge)
+        # Total row count comes back with the page via a window function
+        query = select(Challenge, func.count().over().label("total"))
         
         if status_filter:
-            query = query.filter(Challenge.status == status_filter)
+            query = query.where(Challenge.status == status_filter)
         
         # Filter out expired challenges (only if deadline is in the past)
         now = datetime.utcnow()
-        query = query.filter(Challenge.deadline > now)
+        query = query.where(Challenge.deadline > now)
         
-        logger.info(f"Listing challenges: status_filter={status_filter}, found {query.count()} challenges before limit")
+        result = await db.execute(query.order_by(desc(Challenge.created_at)).offset(skip).limit(limit))
+        rows = result.all()
+        challenges = [row[0] for row in rows]
         
-        total = query.count()
-        challenges = query.order_by(desc(Challenge.created_at)).offset(skip).limit(limit).all()
+        if rows:
+            total = rows[0].total
+        else:
+            # Empty page (e.g. skip past the end) carries no window value, so count separately
+            count_query = select(func.count()).select_from(query.with_only_columns(Challenge.id).subquery())
+            total = (await db.execute(count_query)).scalar_one()
         
-        return ChallengeListResponse(challenges=challenges, total=total)
+        logger.info(f"Listing challenges: status_filter={status_filter}, found {total} challenges before limit")
+        
+        response = {
+            "challenges": challenge_list_adapter.dump_python(
+                challenge_list_adapter.validate_python(challenges),
+                mode="json"
+            ),
+            "total": total
+        }
+        await cache.set(cache_key, response, settings.CHALLENGE_LIST_CACHE_TTL)
+        return response
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -167,10 +198,11 @@ async def list_challenges(
         )
 
 @router.get("/{challenge_id}", response_model=ChallengeResponse)
-async def get_challenge(challenge_id: str, db: Session = Depends(get_db)):
+async def get_challenge(challenge_id: str, db: AsyncSession = Depends(get_async_db)):
     """Get a specific challenge by ID"""
     try:
-        challenge = db.query(Challenge).filter(Challenge.challenge_id == challenge_id).first()
+        result = await db.execute(select(Challenge).where(Challenge.challenge_id == challenge_id))
+        challenge = result.scalar_one_or_none()
         if not challenge:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -186,17 +218,24 @@ async def get_challenge(challenge_id: str, db: Session = Depends(get_db)):
         )
 
 @router.get("/{challenge_id}/submissions")
-async def get_challenge_submissions(challenge_id: str, db: Session = Depends(get_db)):
+async def get_challenge_submissions(challenge_id: str, db: AsyncSession = Depends(get_async_db)):
     """Get all submissions for a challenge"""
     try:
-        challenge = db.query(Challenge).filter(Challenge.challenge_id == challenge_id).first()
+        # Load the challenge, then its submissions in one IN query; a JOIN would
+        # repeat the challenge's columns on every submission row
+        result = await db.execute(
+            select(Challenge)
+            .options(*safe_load(selectinload(Challenge.submissions)))
+            .where(Challenge.challenge_id == challenge_id)
+        )
+        challenge = result.scalar_one_or_none()
         if not challenge:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Challenge not found"
             )
         
-        submissions = db.query(Submission).filter(Submission.challenge_id == challenge.id).all()
+        submissions = challenge.submissions
         return {"submissions": submissions, "total": len(submissions)}
     except HTTPException:
         raise
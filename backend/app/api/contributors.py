@@ -2,78 +2,164 @@
 Contributors API endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import func, lambda_stmt, select
+from typing import Optional
+import asyncio
+import numpy as np
 
-from app.db.database import get_db
-from app.db.models import Contribution, TrainingSession
+from app.core.cache import cache, LEADERBOARD_PREFIX
+from app.core.config import settings
+from app.db.database import get_db, SessionLocal
+from app.db.models import Contribution, TrainingRound, TrainingSession
+from app.services.solana_service import SolanaService, get_solana_service
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Rows fetched per round trip when streaming contribution details
+CONTRIBUTION_STREAM_BATCH_SIZE = 500
+
+# Per-record fields summed when folding on-chain contributions into the stats
+ONCHAIN_STATS_DTYPE = np.dtype([
+    ("reward", np.float64),
+    ("accuracy", np.float64),
+    ("privacy_score", np.float64)
+])
 
 @router.get("/stats/{address}")
 async def get_contributor_stats(
     address: str,
-    db: Session = Depends(get_db)
+    include: Optional[str] = None,  # "details" to list database contributions
+    db: Session = Depends(get_db),
+    solana_service: SolanaService = Depends(get_solana_service)
 ):
     """Get contributor statistics from database and on-chain"""
-    from app.services.solana_service import SolanaService
+    include_details = include == "details"
     
-    # Get from database
-    db_contributions = db.query(Contribution).filter(
-        Contribution.contributor_address == address
-    ).all()
+    def load_db_stats():
+        # Totals in a single aggregate row; zero/NULL scores are left out of the averages
+        totals = db.query(
+            func.count(Contribution.id).label("count"),
+            func.coalesce(func.sum(Contribution.reward_amount), 0).label("rewards"),
+            func.coalesce(func.sum(Contribution.accuracy), 0).label("accuracy_sum"),
+            func.count(Contribution.accuracy).filter(Contribution.accuracy != 0).label("accuracy_count"),
+            func.coalesce(func.sum(Contribution.privacy_score), 0).label("privacy_sum"),
+            func.count(Contribution.privacy_score).filter(Contribution.privacy_score != 0).label("privacy_count")
+        ).filter(
+            Contribution.contributor_address == address
+        ).one()
+        
+        session_ids = {
+            session_id for (session_id,) in db.query(TrainingSession.session_id).join(
+                Contribution, Contribution.session_id == TrainingSession.id
+            ).filter(
+                Contribution.contributor_address == address
+            ).distinct()
+        }
+        
+        # Gradient hashes and (session PDA, round number, contributor) keys of
+        # database rows, to drop their on-chain copies
+        db_hashes = set()
+        db_keys = set()
+        for session_id, round_number, gradient_hash in db.query(
+            TrainingSession.session_id, TrainingRound.round_number, Contribution.gradient_hash
+        ).join(
+            TrainingSession, Contribution.session_id == TrainingSession.id
+        ).outerjoin(
+            TrainingRound, Contribution.round_id == TrainingRound.id
+        ).filter(
+            Contribution.contributor_address == address
+        ).distinct():
+            if gradient_hash:
+                db_hashes.add(gradient_hash)
+            if round_number is not None and solana_service.is_configured:
+                db_keys.add((solana_service.session_address(session_id), round_number, address))
+        
+        details = []
+        if include_details:
+            # Streamed in batches and converted as they arrive, so the full
+            # history is never held as ORM objects at once
+            for c in db.query(Contribution).options(
+                selectinload(Contribution.session)
+            ).filter(
+                Contribution.contributor_address == address
+            ).yield_per(CONTRIBUTION_STREAM_BATCH_SIZE):
+                details.append({
+                    "session_id": c.session.session_id if c.session else None,
+                    "round_id": c.round_id,
+                    "accuracy": c.accuracy,
+                    "privacy_score": c.privacy_score,
+                    "reward_amount": c.reward_amount,
+                    "status": c.status,
+                    "solana_tx_hash": c.solana_tx_hash,
+                    "created_at": c.created_at,
+                    "source": "database"
+                })
+        
+        return totals, session_ids, db_hashes, db_keys, details
     
-    # Get from on-chain
-    solana_service = SolanaService()
-    onchain_contributions = await solana_service.get_contributions_onchain("")
-    onchain_rewards = await solana_service.get_rewards_onchain(address)
+    # Database query and on-chain reads are independent, so run them concurrently
+    (
+        (db_totals, db_session_ids, db_hashes, db_keys, db_contributions),
+        onchain_contributions,
+        onchain_rewards,
+        sol_balance,
+        token_balance
+    ) = await asyncio.gather(
+        asyncio.to_thread(load_db_stats),
+        solana_service.get_contributions_onchain(""),
+        solana_service.get_rewards_onchain(address),
+        solana_service.get_wallet_balance(address),
+        solana_service.get_token_balance(address)
+    )
     
     # Filter on-chain contributions by address
     onchain_contribs = [c for c in onchain_contributions if c.get("contributor") == address]
     
-    # Combine contributions
-    all_contributions = []
-    
-    # Database contributions
-    for c in db_contributions:
-        all_contributions.append({
-            "session_id": c.session.session_id if c.session else None,
-            "round_id": c.round_id,
-            "accuracy": c.accuracy,
-            "privacy_score": c.privacy_score,
-            "reward_amount": c.reward_amount,
-            "status": c.status,
-            "solana_tx_hash": c.solana_tx_hash,
-            "created_at": c.created_at,
-            "source": "database"
-        })
+    # Combine contributions (database rows first)
+    all_contributions = list(db_contributions)
     
-    # On-chain contributions
-    existing_hashes = {c.get("gradient_hash") for c in all_contributions if c.get("gradient_hash")}
+    # On-chain contributions not already recorded in the database
+    onchain_kept = []
     for onchain in onchain_contribs:
-        if onchain.get("gradient_hash") and onchain["gradient_hash"] not in existing_hashes:
+        if onchain.get("gradient_hash") in db_hashes:
+            continue
+        if (onchain.get("session"), onchain.get("round_id"), onchain.get("contributor")) not in db_keys:
+            onchain_kept.append(onchain)
             all_contributions.append({
                 **onchain,
                 "source": "onchain"
             })
     
-    # Calculate statistics
-    total_contributions = len(all_contributions)
-    total_rewards = sum(c.get("reward_amount", 0) for c in all_contributions)
+    # Calculate statistics (database totals + on-chain records); the on-chain
+    # side is reduced in one NumPy pass over a structured array
+    onchain_stats = np.fromiter(
+        (
+            (
+                c.get("reward_amount") or 0,
+                c.get("accuracy") or 0,
+                c.get("privacy_score") or 0
+            )
+            for c in onchain_kept
+        ),
+        dtype=ONCHAIN_STATS_DTYPE,
+        count=len(onchain_kept)
+    )
+    total_contributions = db_totals.count + len(onchain_kept)
+    total_rewards = float(db_totals.rewards) + float(onchain_stats["reward"].sum())
     total_rewards += sum(r.get("amount", 0) for r in onchain_rewards)
     
-    accuracies = [c.get("accuracy", 0) for c in all_contributions if c.get("accuracy")]
-    avg_accuracy = sum(accuracies) / len(accuracies) if accuracies else 0
+    accuracy_count = db_totals.accuracy_count + int(np.count_nonzero(onchain_stats["accuracy"]))
+    accuracy_sum = float(db_totals.accuracy_sum) + float(onchain_stats["accuracy"].sum())
+    avg_accuracy = accuracy_sum / accuracy_count if accuracy_count else 0
     
-    privacy_scores = [c.get("privacy_score", 0) for c in all_contributions if c.get("privacy_score")]
-    avg_privacy_score = sum(privacy_scores) / len(privacy_scores) if privacy_scores else 0
+    privacy_count = db_totals.privacy_count + int(np.count_nonzero(onchain_stats["privacy_score"]))
+    privacy_sum = float(db_totals.privacy_sum) + float(onchain_stats["privacy_score"].sum())
+    avg_privacy_score = privacy_sum / privacy_count if privacy_count else 0
     
     # Get unique sessions
-    session_ids = set(c.get("session_id") for c in all_contributions if c.get("session_id"))
-    
-    # Get real wallet balance
-    sol_balance = await solana_service.get_wallet_balance(address)
-    token_balance = await solana_service.get_token_balance(address)
+    session_ids = db_session_ids | {c.get("session_id") for c in onchain_kept if c.get("session_id")}
     
     return {
         "contributor_address": address,
@@ -91,21 +177,50 @@ async def get_contributor_stats(
 @router.get("/leaderboard")
 async def get_contributor_leaderboard(
     metric: str = "accuracy",  # accuracy, privacy, contributions
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    limit: int = 100
 ):
     """Get contributor leaderboard"""
+    def load():
+        # Runs in a worker thread, possibly after this request has finished,
+        # so it uses its own session rather than the request-scoped one
+        db = SessionLocal()
+        try:
+            return build_contributor_leaderboard(db, metric, limit)
+        finally:
+            db.close()
+    
+    return await cache.get_or_set_swr(
+        f"{LEADERBOARD_PREFIX}contributors:{metric}:{limit}",
+        lambda: asyncio.to_thread(load),
+        settings.LEADERBOARD_CACHE_TTL,
+        settings.LEADERBOARD_CACHE_STALE_TTL
+    )
+
+# Per-contributor aggregates for every leaderboard metric, in one GROUP BY
+_contributor_aggregates = select(
+    Contribution.contributor_address,
+    func.count(Contribution.id).label("contributions_count"),
+    func.avg(Contribution.accuracy).label("avg_accuracy"),
+    func.avg(Contribution.privacy_score).label("avg_privacy")
+).group_by(
+    Contribution.contributor_address
+).subquery()
+
+def build_contributor_leaderboard(db: Session, metric: str, limit: int):
+    """Rank contributors by average accuracy, average privacy score or contribution count"""
+    aggregates = _contributor_aggregates
+    order_column = {
+        "accuracy": aggregates.c.avg_accuracy,
+        "privacy": aggregates.c.avg_privacy
+    }.get(metric, aggregates.c.contributions_count)
+    
+    # One aggregate query whatever the metric; lambda_stmt caches the compiled
+    # SQL per ordering column and binds limit as a parameter
+    leaderboard = db.execute(lambda_stmt(
+        lambda: select(aggregates).order_by(order_column.desc()).limit(limit)
+    )).all()
+    
     if metric == "accuracy":
-        leaderboard = db.query(
-            Contribution.contributor_address,
-            func.avg(Contribution.accuracy).label("avg_accuracy"),
-            func.count(Contribution.id).label("contributions_count")
-        ).group_by(
-            Contribution.contributor_address
-        ).order_by(
-            func.avg(Contribution.accuracy).desc()
-        ).limit(limit).all()
-        
         return [
             {
                 "rank": idx + 1,
@@ -116,16 +231,6 @@ async def get_contributor_leaderboard(
             for idx, item in enumerate(leaderboard)
         ]
     elif metric == "privacy":
-        leaderboard = db.query(
-            Contribution.contributor_address,
-            func.avg(Contribution.privacy_score).label("avg_privacy"),
-            func.count(Contribution.id).label("contributions_count")
-        ).group_by(
-            Contribution.contributor_address
-        ).order_by(
-            func.avg(Contribution.privacy_score).desc()
-        ).limit(limit).all()
-        
         return [
             {
                 "rank": idx + 1,
@@ -136,16 +241,6 @@ async def get_contributor_leaderboard(
             for idx, item in enumerate(leaderboard)
         ]
     else:  # contributions
-        leaderboard = db.query(
-            Contribution.contributor_address,
-            func.count(Contribution.id).label("contributions_count"),
-            func.avg(Contribution.accuracy).label("avg_accuracy")
-        ).group_by(
-            Contribution.contributor_address
-        ).order_by(
-            func.count(Contribution.id).desc()
-        ).limit(limit).all()
-        
         return [
             {
                 "rank": idx + 1,
@@ -155,4 +250,3 @@ async def get_contributor_leaderboard(
             }
             for idx, item in enumerate(leaderboard)
         ]
-
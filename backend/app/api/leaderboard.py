@@ -2,14 +2,19 @@
 Leaderboard API Routes
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
-from typing import List
-from app.db.database import get_db
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import func, lambda_stmt, select
+from typing import List, Optional
+import asyncio
+from app.core.cache import cache, LEADERBOARD_PREFIX
+from app.core.config import settings
+from app.db.database import get_db, SessionLocal
 from app.db.models import ContributorReputation
-from pydantic import BaseModel
+from app.services.reputation_service import rank_view, reputation_service
+from pydantic import BaseModel, ConfigDict
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 # Pydantic models
 class LeaderboardEntry(BaseModel):
@@ -20,60 +25,111 @@ class LeaderboardEntry(BaseModel):
     rank: int
     reputation_score: float
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, extra="ignore")
 
 class LeaderboardResponse(BaseModel):
     entries: List[LeaderboardEntry]
     total: int
 
-@router.get("/", response_model=LeaderboardResponse)
+@router.get("/", response_model=None, responses={200: {"model": LeaderboardResponse}})
 async def get_leaderboard(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    after_rank: Optional[int] = None  # keyset pagination: last rank of the previous page
 ):
     """Get leaderboard of top contributors"""
+    def load():
+        # Runs in a worker thread, possibly after this request has finished,
+        # so it uses its own session rather than the request-scoped one
+        db = SessionLocal()
+        try:
+            return build_leaderboard(db, skip, limit, after_rank).model_dump(mode="json")
+        finally:
+            db.close()
+    
     try:
-        # Calculate reputation scores and ranks
-        # Reputation score = (total_approved * 10) - (total_rejected * 2) + (total_rewards * 0.1)
-        query = db.query(
-            ContributorReputation,
-            (
-                (ContributorReputation.total_approved * 10) -
-                (ContributorReputation.total_rejected * 2) +
-                (ContributorReputation.total_rewards * 0.1)
-            ).label('calculated_score')
-        ).order_by(desc('calculated_score'))
-        
-        total = query.count()
-        results = query.offset(skip).limit(limit).all()
-        
-        entries = []
-        for idx, (reputation, score) in enumerate(results, start=skip + 1):
-            # Update reputation score and rank in database
-            reputation.reputation_score = float(score)
-            reputation.rank = idx
-            entries.append(LeaderboardEntry(
-                contributor_address=reputation.contributor_address,
-                total_approved=reputation.total_approved,
-                total_rejected=reputation.total_rejected,
-                total_rewards=reputation.total_rewards,
-                rank=idx,
-                reputation_score=float(score)
-            ))
-        
-        db.commit()
-        
-        return LeaderboardResponse(entries=entries, total=total)
-        
+        return await cache.get_or_set_swr(
+            f"{LEADERBOARD_PREFIX}reputation:{skip}:{limit}:{after_rank}",
+            lambda: asyncio.to_thread(load),
+            settings.LEADERBOARD_CACHE_TTL,
+            settings.LEADERBOARD_CACHE_STALE_TTL
+        )
     except Exception as e:
-        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error getting leaderboard: {str(e)}"
         )
 
+# Ranked reputation rows, built once and shared by every page query
+_ranked = reputation_service.ranked_query().subquery()
+_ranked_reputation = aliased(ContributorReputation, _ranked)
+
+def build_leaderboard(db: Session, skip: int, limit: int, after_rank: Optional[int]) -> LeaderboardResponse:
+    """Read one leaderboard page with scores and ranks computed in SQL"""
+    if reputation_service.uses_rank_view:
+        return build_leaderboard_from_view(db, skip, limit, after_rank)
+    
+    # Persisting scores/ranks is left to the background rank refresh so reads never write.
+    # Lambda statements are cached by code location, so the query tree is only
+    # built and compiled once; skip/limit/after_rank become bound parameters.
+    query = lambda_stmt(lambda: select(
+        _ranked_reputation,
+        _ranked.c.calculated_score,
+        _ranked.c.calculated_rank
+    ).order_by(_ranked.c.calculated_rank))
+    
+    if after_rank is not None:
+        query += lambda q: q.where(_ranked.c.calculated_rank > after_rank)
+    else:
+        query += lambda q: q.offset(skip)
+    query += lambda q: q.limit(limit)
+    
+    total = db.execute(lambda_stmt(lambda: select(func.count(ContributorReputation.id)))).scalar()
+    results = db.execute(query).all()
+    
+    entries = [
+        LeaderboardEntry(
+            contributor_address=reputation.contributor_address,
+            total_approved=reputation.total_approved,
+            total_rejected=reputation.total_rejected,
+            total_rewards=reputation.total_rewards,
+            rank=rank,
+            reputation_score=float(score)
+        )
+        for reputation, score, rank in results
+    ]
+    
+    return LeaderboardResponse(entries=entries, total=total)
+
+def build_leaderboard_from_view(db: Session, skip: int, limit: int, after_rank: Optional[int]) -> LeaderboardResponse:
+    """Read one leaderboard page from the materialized rank view.
+
+    Ranks there are a dense row_number, so a page is an index range scan on
+    rank instead of scoring and sorting every reputation row per request.
+    """
+    start = after_rank if after_rank is not None else skip
+    query = lambda_stmt(lambda: select(rank_view).where(
+        rank_view.c.rank > start,
+        rank_view.c.rank <= start + limit
+    ).order_by(rank_view.c.rank))
+    
+    total = db.execute(lambda_stmt(lambda: select(func.count()).select_from(rank_view))).scalar()
+    results = db.execute(query).all()
+    
+    entries = [
+        LeaderboardEntry(
+            contributor_address=row.contributor_address,
+            total_approved=row.total_approved,
+            total_rejected=row.total_rejected,
+            total_rewards=row.total_rewards,
+            rank=row.rank,
+            reputation_score=float(row.score)
+        )
+        for row in results
+    ]
+    
+    return LeaderboardResponse(entries=entries, total=total)
+
 @router.get("/contributor/{contributor_address}")
 async def get_contributor_stats(contributor_address: str, db: Session = Depends(get_db)):
     """Get stats for a specific contributor"""
@@ -2,15 +2,29 @@
 Rewards API endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List
+import asyncio
+import logging
+import numpy as np
 
-from app.db.database import get_db
-from app.db.models import Reward, Contribution, TrainingSession
-from app.services.solana_service import SolanaService
+from app.core.cache import cache, LEADERBOARD_PREFIX
+from app.core.config import settings
+from app.db.database import get_db, SessionLocal
+from app.db.models import Reward, Contribution, TrainingSession, OnchainReward
+from app.services.solana_service import SolanaService, get_solana_service
 
-router = APIRouter()
+logger = logging.getLogger(__name__)
+
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Max reward payouts in flight at once per distribution request
+REWARD_DISTRIBUTION_CONCURRENCY = 16
+
+# Rows fetched per round trip when streaming a contributor's rewards
+REWARD_STREAM_BATCH_SIZE = 500
 
 class DistributeRewardsRequest(BaseModel):
     session_id: str
@@ -26,7 +40,8 @@ class RewardResponse(BaseModel):
 @router.post("/distribute")
 async def distribute_rewards(
     request: DistributeRewardsRequest,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    solana_service: SolanaService = Depends(get_solana_service)
 ):
     """Distribute rewards for a completed round"""
     # Get session
@@ -37,8 +52,17 @@ async def distribute_rewards(
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    # Get contributions for this round
-    contributions = db.query(Contribution).join(
+    # Session fields are constant for the whole batch
+    base_reward = session.reward_per_contributor
+    accuracy_threshold = session.accuracy_threshold
+    
+    # Get contributions for this round as plain column rows
+    contributions = db.query(
+        Contribution.id,
+        Contribution.contributor_address,
+        Contribution.accuracy,
+        Contribution.privacy_score
+    ).join(
         TrainingSession
     ).filter(
         TrainingSession.session_id == request.session_id,
@@ -48,52 +72,81 @@ async def distribute_rewards(
     if not contributions:
         raise HTTPException(status_code=404, detail="No contributions found")
     
-    # Distribute rewards via Solana
-    solana_service = SolanaService()
-    rewards = []
+    # Calculate reward based on accuracy and privacy score, vectorized over the batch
+    # (lower epsilon = higher privacy_score = higher reward)
+    accuracy = np.fromiter((c.accuracy for c in contributions), dtype=np.float64, count=len(contributions))
+    privacy = np.fromiter((c.privacy_score for c in contributions), dtype=np.float64, count=len(contributions))
+    reward_amounts = (base_reward * (accuracy / accuracy_threshold) * privacy).tolist()
     
-    for contribution in contributions:
-        # Calculate reward based on accuracy and privacy score
-        base_reward = session.reward_per_contributor
-        accuracy_multiplier = contribution.accuracy / session.accuracy_threshold
-        privacy_multiplier = contribution.privacy_score  # Lower epsilon = higher reward
-        reward_amount = base_reward * accuracy_multiplier * privacy_multiplier
-        
-        try:
-            # Distribute on Solana
-            tx_hash = await solana_service.distribute_reward(
-                contributor_address=contribution.contributor_address,
+    # Send the payouts concurrently, bounded so the RPC node isn't flooded
+    semaphore = asyncio.Semaphore(REWARD_DISTRIBUTION_CONCURRENCY)
+    
+    async def distribute(contributor_address, reward_amount):
+        async with semaphore:
+            return await solana_service.distribute_reward(
+                contributor_address=contributor_address,
                 amount=reward_amount,
                 session_id=request.session_id,
                 round_id=request.round_id
             )
-            
-            # Create reward record
-            reward = Reward(
-                contributor_address=contribution.contributor_address,
-                session_id=session.id,
-                round_id=request.round_id,
-                amount=reward_amount,
-                token_amount=reward_amount,  # 1:1 for now
-                solana_tx_hash=tx_hash,
-                status="completed"
-            )
-            
-            db.add(reward)
-            contribution.status = "rewarded"
-            contribution.reward_amount = reward_amount
-            db.commit()
-            
-            rewards.append({
-                "contributor_address": contribution.contributor_address,
-                "amount": reward_amount,
-                "token_amount": reward_amount,
-                "solana_tx_hash": tx_hash,
-                "status": "completed"
-            })
-        except Exception as e:
-            print(f"Reward distribution failed for {contribution.contributor_address}: {e}")
+    
+    results = await asyncio.gather(
+        *(distribute(c.contributor_address, amount) for c, amount in zip(contributions, reward_amounts)),
+        return_exceptions=True
+    )
+    
+    rewards = []
+    reward_records = []
+    contribution_updates = []
+    for contribution, reward_amount, tx_hash in zip(contributions, reward_amounts, results):
+        if isinstance(tx_hash, Exception):
+            logger.warning(f"Reward distribution failed for {contribution.contributor_address}: {tx_hash}")
             continue
+        
+        # Create reward record
+        reward_records.append(Reward(
+            contributor_address=contribution.contributor_address,
+            session_id=session.id,
+            round_id=request.round_id,
+            amount=reward_amount,
+            token_amount=reward_amount,  # 1:1 for now
+            solana_tx_hash=tx_hash,
+            status="completed"
+        ))
+        contribution_updates.append({
+            "id": contribution.id,
+            "status": "rewarded",
+            "reward_amount": reward_amount
+        })
+        
+        rewards.append({
+            "contributor_address": contribution.contributor_address,
+            "amount": reward_amount,
+            "token_amount": reward_amount,
+            "solana_tx_hash": tx_hash,
+            "status": "completed"
+        })
+    
+    # Persist every successful payout in one transaction
+    try:
+        with db.begin_nested():
+            db.bulk_save_objects(reward_records)
+            db.bulk_update_mappings(Contribution, contribution_updates)
+    except Exception as e:
+        # The payouts already went out on-chain, so keep every row that can be
+        # saved: retry one SAVEPOINT per reward, still under the single commit
+        logger.warning(f"Bulk reward insert failed, retrying per reward: {e}")
+        for record, contribution_update in zip(reward_records, contribution_updates):
+            try:
+                with db.begin_nested():
+                    db.add(record)
+                    db.bulk_update_mappings(Contribution, [contribution_update])
+            except Exception as row_error:
+                logger.error(
+                    f"Could not record reward {record.solana_tx_hash} "
+                    f"for {record.contributor_address}: {row_error}"
+                )
+    db.commit()
     
     return {
         "session_id": request.session_id,
@@ -105,36 +158,39 @@ async def distribute_rewards(
 @router.get("/contributor/{address}")
 async def get_contributor_rewards(
     address: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    solana_service: SolanaService = Depends(get_solana_service)
 ):
     """Get all rewards for a contributor from database and on-chain"""
-    # Get from database
-    db_rewards = db.query(Reward).filter(
-        Reward.contributor_address == address
-    ).all()
+    def load_db_rewards():
+        # Stream rows in batches and convert as they arrive instead of
+        # buffering every ORM object with .all()
+        records = []
+        tx_hashes = set()
+        for r in db.query(Reward).filter(
+            Reward.contributor_address == address
+        ).yield_per(REWARD_STREAM_BATCH_SIZE):
+            records.append({
+                "session_id": r.session_id,
+                "round_id": r.round_id,
+                "amount": r.amount,
+                "token_amount": r.token_amount,
+                "solana_tx_hash": r.solana_tx_hash,
+                "status": r.status,
+                "created_at": r.created_at,
+                "source": "database"
+            })
+            if r.solana_tx_hash:
+                tx_hashes.add(r.solana_tx_hash)
+        return records, tx_hashes
     
-    # Get from on-chain
-    solana_service = SolanaService()
-    onchain_rewards = await solana_service.get_rewards_onchain(address)
-    
-    # Combine rewards
-    all_rewards = []
-    
-    # Database rewards
-    for r in db_rewards:
-        all_rewards.append({
-            "session_id": r.session_id,
-            "round_id": r.round_id,
-            "amount": r.amount,
-            "token_amount": r.token_amount,
-            "solana_tx_hash": r.solana_tx_hash,
-            "status": r.status,
-            "created_at": r.created_at,
-            "source": "database"
-        })
+    # Get from database and on-chain concurrently
+    (all_rewards, existing_txs), onchain_rewards = await asyncio.gather(
+        asyncio.to_thread(load_db_rewards),
+        solana_service.get_rewards_onchain(address)
+    )
     
     # On-chain rewards (avoid duplicates by tx hash)
-    existing_txs = {r["solana_tx_hash"] for r in all_rewards if r.get("solana_tx_hash")}
     for onchain in onchain_rewards:
         tx_hash = onchain.get("solana_tx_hash") or onchain.get("tx_hash")
         if tx_hash and tx_hash not in existing_txs:
@@ -155,63 +211,54 @@ async def get_contributor_rewards(
     }
 
 @router.get("/leaderboard")
-async def get_leaderboard(
-    limit: int = 100,
-    db: Session = Depends(get_db)
-):
+async def get_leaderboard(limit: int = 100):
     """Get rewards leaderboard from database and on-chain"""
-    from sqlalchemy import func
-    from collections import defaultdict
-    
-    # Get from database
-    db_leaderboard = db.query(
-        Reward.contributor_address,
-        func.sum(Reward.amount).label("total_rewards"),
-        func.count(Reward.id).label("contributions_count")
-    ).filter(
-        Reward.status == "completed"
+    return await cache.get_or_set_swr(
+        f"{LEADERBOARD_PREFIX}rewards:{limit}",
+        lambda: build_rewards_leaderboard(limit),
+        settings.LEADERBOARD_CACHE_TTL,
+        settings.LEADERBOARD_CACHE_STALE_TTL
+    )
+
+async def build_rewards_leaderboard(limit: int):
+    """Rank contributors by completed database rewards plus mirrored on-chain rewards"""
+    from sqlalchemy import func, literal, select, union_all
+    
+    # On-chain rewards are mirrored into onchain_rewards by a background job,
+    # so both sources are combined and ranked in a single SQL statement
+    combined = union_all(
+        select(Reward.contributor_address, Reward.amount).where(Reward.status == "completed"),
+        select(OnchainReward.contributor_address, OnchainReward.amount)
+    ).subquery()
+    query = select(
+        combined.c.contributor_address,
+        func.coalesce(func.sum(combined.c.amount), literal(0.0)).label("total_rewards"),
+        func.count().label("contributions_count")
+    ).where(
+        combined.c.contributor_address.isnot(None)
     ).group_by(
-        Reward.contributor_address
-    ).all()
+        combined.c.contributor_address
+    ).order_by(
+        func.sum(combined.c.amount).desc()
+    ).limit(limit)
+    
+    def load():
+        # May run after the triggering request has finished, so use its own session
+        db = SessionLocal()
+        try:
+            return db.execute(query).all()
+        finally:
+            db.close()
     
-    # Get from on-chain
-    solana_service = SolanaService()
-    onchain_rewards = await solana_service.get_rewards_onchain()
-    
-    # Aggregate on-chain rewards
-    onchain_totals = defaultdict(lambda: {"total_rewards": 0.0, "contributions_count": 0})
-    for reward in onchain_rewards:
-        addr = reward.get("contributor")
-        if addr:
-            onchain_totals[addr]["total_rewards"] += reward.get("amount", 0)
-            onchain_totals[addr]["contributions_count"] += 1
-    
-    # Merge data
-    leaderboard_dict = defaultdict(lambda: {"total_rewards": 0.0, "contributions_count": 0})
-    
-    # Add database data
-    for item in db_leaderboard:
-        leaderboard_dict[item.contributor_address]["total_rewards"] += float(item.total_rewards)
-        leaderboard_dict[item.contributor_address]["contributions_count"] += item.contributions_count
-    
-    # Add on-chain data
-    for addr, data in onchain_totals.items():
-        leaderboard_dict[addr]["total_rewards"] += data["total_rewards"]
-        leaderboard_dict[addr]["contributions_count"] += data["contributions_count"]
-    
-    # Sort and format
-    leaderboard = sorted(
-        [
-            {
-                "contributor_address": addr,
-                "total_rewards": data["total_rewards"],
-                "contributions_count": data["contributions_count"]
-            }
-            for addr, data in leaderboard_dict.items()
-        ],
-        key=lambda x: x["total_rewards"],
-        reverse=True
-    )[:limit]
+    rows = await asyncio.to_thread(load)
+    leaderboard = [
+        {
+            "contributor_address": row.contributor_address,
+            "total_rewards": float(row.total_rewards),
+            "contributions_count": row.contributions_count
+        }
+        for row in rows
+    ]
     
     return [
         {
@@ -5,10 +5,10 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional
-from solders.pubkey import Pubkey
 
+from app.core.pubkeys import parse_pubkey
 from app.db.database import get_db
-from app.services.solana_service import SolanaService
+from app.services.solana_service import SolanaService, get_solana_service
 
 router = APIRouter()
 
@@ -20,11 +20,10 @@ class TransactionRequest(BaseModel):
 @router.post("/transaction")
 async def execute_transaction(
     request: TransactionRequest,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    solana_service: SolanaService = Depends(get_solana_service)
 ):
     """Execute a Solana transaction"""
-    solana_service = SolanaService()
-    
     try:
         if request.transaction_type == "register":
             tx_hash = await solana_service.register_training_session(
@@ -59,9 +58,11 @@ async def execute_transaction(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/balance/{address}")
-async def get_balance(address: str):
+async def get_balance(
+    address: str,
+    solana_service: SolanaService = Depends(get_solana_service)
+):
     """Get real Solana wallet balance from blockchain"""
-    solana_service = SolanaService()
     try:
         balance = await solana_service.get_wallet_balance(address)
         return {
@@ -75,9 +76,12 @@ async def get_balance(address: str):
         raise HTTPException(status_code=500, detail=f"Error fetching balance: {str(e)}")
 
 @router.get("/token-balance/{address}")
-async def get_token_balance(address: str, token_mint: Optional[str] = None):
+async def get_token_balance(
+    address: str,
+    token_mint: Optional[str] = None,
+    solana_service: SolanaService = Depends(get_solana_service)
+):
     """Get real SPL token balance from blockchain"""
-    solana_service = SolanaService()
     try:
         balance = await solana_service.get_token_balance(address, token_mint)
         return {
@@ -92,9 +96,11 @@ async def get_token_balance(address: str, token_mint: Optional[str] = None):
         raise HTTPException(status_code=500, detail=f"Error fetching token balance: {str(e)}")
 
 @router.get("/transaction/{tx_hash}")
-async def get_transaction(tx_hash: str):
+async def get_transaction(
+    tx_hash: str,
+    solana_service: SolanaService = Depends(get_solana_service)
+):
     """Get real transaction details from Solana blockchain"""
-    solana_service = SolanaService()
     try:
         tx_details = await solana_service.get_transaction(tx_hash)
         return {
@@ -108,34 +114,39 @@ async def get_transaction(tx_hash: str):
 @router.get("/transactions/{address}")
 async def get_address_transactions(
     address: str,
-    limit: int = 50
+    limit: int = 50,
+    solana_service: SolanaService = Depends(get_solana_service)
 ):
     """Get recent transactions for an address"""
-    solana_service = SolanaService()
     try:
         # Get signature history
-        pubkey = Pubkey.from_string(address)
-        response = solana_service.client.get_signatures_for_address(
+        pubkey = parse_pubkey(address)
+        response = await solana_service.client.get_signatures_for_address(
             pubkey,
             limit=limit
         )
         
+        signatures = [sig_info for sig_info in (response.value or []) if sig_info.signature]
+        tx_hashes = [str(sig_info.signature) for sig_info in signatures]
+        
+        # Fetch all transaction details in a single batched RPC request
+        try:
+            tx_details_list = await solana_service.get_transactions_batch(tx_hashes)
+        except Exception:
+            tx_details_list = [None] * len(tx_hashes)
+        
         transactions = []
-        if response.value:
-            for sig_info in response.value:
-                if sig_info.signature:
-                    tx_hash = str(sig_info.signature)
-                    try:
-                        tx_details = await solana_service.get_transaction(tx_hash)
-                        transactions.append(tx_details)
-                    except:
-                        transactions.append({
-                            "transaction_hash": tx_hash,
-                            "slot": sig_info.slot,
-                            "block_time": sig_info.block_time,
-                            "status": "confirmed" if sig_info.err is None else "failed",
-                            "error": str(sig_info.err) if sig_info.err else None
-                        })
+        for sig_info, tx_hash, tx_details in zip(signatures, tx_hashes, tx_details_list):
+            if tx_details:
+                transactions.append(tx_details)
+            else:
+                transactions.append({
+                    "transaction_hash": tx_hash,
+                    "slot": sig_info.slot,
+                    "block_time": sig_info.block_time,
+                    "status": "confirmed" if sig_info.err is None else "failed",
+                    "error": str(sig_info.err) if sig_info.err else None
+                })
         
         return {
             "address": address,
@@ -1,21 +1,29 @@
 """
 Submissions API Routes
 """
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response, status, UploadFile, File
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, desc, insert, or_, select, update
 from typing import List, Optional
 from datetime import datetime
 import hashlib
 import uuid
+import logging
 
-from app.db.database import get_db
+from app.core.hashing import hash_upload
+from app.db.database import AsyncSessionLocal, get_async_db
 from app.db.models import Challenge, Submission, Evaluation, ContributorReputation
 from app.services.flexai_solana_service import flexai_solana_service
 from app.services.gemini_service import gemini_service
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ConfigDict
 
-router = APIRouter()
+logger = logging.getLogger(__name__)
+
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Evaluation result keys that have their own Evaluation columns and stay out of evaluation_metrics
+EVALUATION_COLUMN_KEYS = {"accuracy", "precision", "recall", "f1_score", "loss", "improvement_over_baseline", "report"}
 
 # Pydantic models
 class SubmissionCreate(BaseModel):
@@ -42,23 +50,69 @@ class SubmissionResponse(BaseModel):
     reward_tx_hash: Optional[str]
     reward_amount: float
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, extra="ignore")
 
 class SubmissionWithChallengeResponse(SubmissionResponse):
     challenge_title: Optional[str] = None
     challenge_reward_amount: Optional[float] = None
     challenge_id_string: Optional[str] = None
 
-@router.post("/", response_model=SubmissionResponse, status_code=status.HTTP_201_CREATED)
+async def run_evaluation(
+    submission_id: int,
+    challenge_pk: int,
+    challenge_id: str,
+    model_hash: str,
+    baseline_accuracy: float
+):
+    """Evaluate a submission and store the Evaluation row and its accuracy"""
+    try:
+        evaluation_result = await gemini_service.evaluate_model(
+            challenge_id=challenge_id,
+            model_hash=model_hash,
+            baseline_accuracy=baseline_accuracy
+        )
+        
+        async with AsyncSessionLocal() as db:
+            await db.execute(insert(Evaluation).values(
+                challenge_id=challenge_pk,
+                submission_id=submission_id,
+                accuracy=evaluation_result["accuracy"],
+                precision=evaluation_result["precision"],
+                recall=evaluation_result["recall"],
+                f1_score=evaluation_result["f1_score"],
+                loss=evaluation_result["loss"],
+                improvement_over_baseline=evaluation_result.get("improvement_over_baseline"),
+                evaluation_metrics={
+                    key: value for key, value in evaluation_result.items()
+                    if key not in EVALUATION_COLUMN_KEYS
+                },
+                evaluation_report=evaluation_result["report"]
+            ))
+            await db.execute(
+                update(Submission)
+                .where(Submission.id == submission_id)
+                .values(accuracy=evaluation_result["accuracy"])
+            )
+            await db.commit()
+    except Exception as e:
+        logger.error(f"Error evaluating submission {submission_id}: {e}", exc_info=True)
+
+@router.post("/", response_model=SubmissionResponse, status_code=status.HTTP_202_ACCEPTED)
 async def submit_model(
     submission_data: SubmissionCreate,
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Submit a fine-tuned model for a challenge"""
+    """Submit a fine-tuned model for a challenge.
+
+    Returns 202 once the submission is stored; evaluation runs in the
+    background and sets accuracy on the submission when it finishes.
+    """
     try:
         # Get challenge
-        challenge = db.query(Challenge).filter(Challenge.challenge_id == submission_data.challenge_id).first()
+        challenge = (await db.execute(
+            select(Challenge).where(Challenge.challenge_id == submission_data.challenge_id)
+        )).scalar_one_or_none()
         if not challenge:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -100,104 +154,124 @@ async def submit_model(
             )
         except Exception as e:
             tx_hash = None
-            print(f"Blockchain transaction failed: {e}")
+            logger.warning(f"Blockchain transaction failed: {e}")
         
-        # Create database record
-        db_submission = Submission(
-            challenge_id=challenge.id,
-            contributor_address=submission_data.contributor_address,
+        # Create database record; RETURNING brings back the id and server defaults
+        db_submission = (await db.execute(
+            insert(Submission).values(
+                challenge_id=challenge.id,
+                contributor_address=submission_data.contributor_address,
+                model_hash=model_hash,
+                model_ipfs_hash=submission_data.model_ipfs_hash,
+                metadata_ipfs_hash=submission_data.metadata_ipfs_hash,
+                status="pending",
+                solana_tx_hash=tx_hash
+            ).returning(Submission)
+        )).scalar_one()
+        await db.commit()
+        
+        # Evaluate after the response is sent; accuracy fills in when it completes
+        background_tasks.add_task(
+            run_evaluation,
+            submission_id=db_submission.id,
+            challenge_pk=challenge.id,
+            challenge_id=submission_data.challenge_id,
             model_hash=model_hash,
-            model_ipfs_hash=submission_data.model_ipfs_hash,
-            metadata_ipfs_hash=submission_data.metadata_ipfs_hash,
-            status="pending",
-            solana_tx_hash=tx_hash
+            baseline_accuracy=challenge.baseline_accuracy
         )
         
-        db.add(db_submission)
-        db.commit()
-        db.refresh(db_submission)
-        
-        # Trigger evaluation (async)
-        try:
-            evaluation_result = await gemini_service.evaluate_model(
-                challenge_id=submission_data.challenge_id,
-                model_hash=model_hash,
-                baseline_accuracy=challenge.baseline_accuracy
-            )
-            
-            # Create evaluation record
-            db_evaluation = Evaluation(
-                challenge_id=challenge.id,
-                submission_id=db_submission.id,
-                accuracy=evaluation_result["accuracy"],
-                precision=evaluation_result["precision"],
-                recall=evaluation_result["recall"],
-                f1_score=evaluation_result["f1_score"],
-                loss=evaluation_result["loss"],
-                evaluation_metrics=evaluation_result,
-                evaluation_report=evaluation_result["report"]
-            )
-            
-            # Update submission with accuracy
-            db_submission.accuracy = evaluation_result["accuracy"]
-            
-            db.add(db_evaluation)
-            db.commit()
-        except Exception as e:
-            print(f"Error evaluating model: {e}")
-            # Continue without evaluation
-        
         return db_submission
         
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error submitting model: {str(e)}"
         )
 
+@router.post("/model-hash")
+async def hash_model_file(file: UploadFile = File(...)):
+    """Hash an uploaded model file; pass the result as model_file_hash when submitting"""
+    try:
+        return {"model_file_hash": await hash_upload(file)}
+    finally:
+        await file.close()
+
 @router.get("/", response_model=List[SubmissionResponse])
 async def list_submissions(
+    response: Response,
     challenge_id: Optional[str] = None,
     contributor_address: Optional[str] = None,
     status_filter: Optional[str] = None,
     skip: int = 0,
     limit: int = 100,
     include_challenge: bool = False,
-    db: Session = Depends(get_db)
+    before_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """List all submissions"""
+    """List submissions, newest first.
+
+    Page with before_id (keyset): pass the id from the X-Next-Cursor header of
+    the previous page. skip still works but gets slower the deeper it goes.
+    """
     try:
-        query = db.query(Submission)
+        if include_challenge:
+            # Challenge fields come from the same round trip via an outer join
+            query = select(
+                Submission,
+                Challenge.title,
+                Challenge.reward_amount,
+                Challenge.challenge_id
+            ).outerjoin(Challenge, Submission.challenge_id == Challenge.id)
+        else:
+            query = select(Submission)
         
         if challenge_id:
-            challenge = db.query(Challenge).filter(Challenge.challenge_id == challenge_id).first()
-            if challenge:
-                query = query.filter(Submission.challenge_id == challenge.id)
+            challenge_pk = (await db.execute(
+                select(Challenge.id).where(Challenge.challenge_id == challenge_id)
+            )).scalar_one_or_none()
+            if challenge_pk is not None:
+                query = query.where(Submission.challenge_id == challenge_pk)
         
         if contributor_address:
-            query = query.filter(Submission.contributor_address == contributor_address)
+            query = query.where(Submission.contributor_address == contributor_address)
         
         if status_filter:
-            query = query.filter(Submission.status == status_filter)
+            query = query.where(Submission.status == status_filter)
+        
+        if before_id is not None:
+            # Rows strictly after the cursor row in (submitted_at DESC, id DESC) order
+            anchor = select(Submission.submitted_at).where(Submission.id == before_id).scalar_subquery()
+            query = query.where(or_(
+                Submission.submitted_at < anchor,
+                and_(Submission.submitted_at == anchor, Submission.id < before_id)
+            ))
+        elif skip:
+            logger.warning(f"list_submissions called with offset pagination (skip={skip}); use before_id")
+            query = query.offset(skip)
+        
+        result = await db.execute(
+            query.order_by(desc(Submission.submitted_at), desc(Submission.id)).limit(limit)
+        )
+        submissions = result.all() if include_challenge else result.scalars().all()
         
-        submissions = query.order_by(desc(Submission.submitted_at)).offset(skip).limit(limit).all()
+        if len(submissions) == limit:
+            last = submissions[-1][0] if include_challenge else submissions[-1]
+            response.headers["X-Next-Cursor"] = str(last.id)
         
         # If include_challenge is True, add challenge info
         if include_challenge:
-            result = []
-            for submission in submissions:
-                challenge = db.query(Challenge).filter(Challenge.id == submission.challenge_id).first()
-                submission_dict = {
+            return [
+                {
                     **submission.__dict__,
-                    "challenge_title": challenge.title if challenge else None,
-                    "challenge_reward_amount": challenge.reward_amount if challenge else None,
-                    "challenge_id_string": challenge.challenge_id if challenge else None,
+                    "challenge_title": challenge_title,
+                    "challenge_reward_amount": challenge_reward_amount,
+                    "challenge_id_string": challenge_id_string,
                 }
-                result.append(submission_dict)
-            return result
+                for submission, challenge_title, challenge_reward_amount, challenge_id_string in submissions
+            ]
         
         return submissions
     except Exception as e:
@@ -207,10 +281,10 @@ async def list_submissions(
         )
 
 @router.get("/{submission_id}", response_model=SubmissionResponse)
-async def get_submission(submission_id: int, db: Session = Depends(get_db)):
+async def get_submission(submission_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get a specific submission"""
     try:
-        submission = db.query(Submission).filter(Submission.id == submission_id).first()
+        submission = await db.get(Submission, submission_id)
         if not submission:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -1,22 +1,35 @@
 """
 Training API endpoints for federated learning coordination
 """
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
 from typing import List, Optional
-from collections import defaultdict
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from datetime import datetime
+import asyncio
+import base64
+import binascii
+import hashlib
+import logging
 import uuid
-import json
 
-from app.db.database import get_db
+import orjson
+
+from app.core.cache import cache, invalidate_training_sessions, TRAINING_SESSIONS_PREFIX
+from app.core.config import settings
+from app.db.database import get_async_db
+from app.db.loading import safe_load
 from app.db.models import TrainingSession, TrainingRound, Contribution, ModelCheckpoint
-from app.core.security import EncryptionService, LocalDifferentialPrivacy, CommitmentHash
-from app.services.federated_learning import FederatedLearningService
-from app.services.solana_service import SolanaService
+from app.services.federated_learning import FederatedLearningService, get_federated_learning_service
+from app.services.solana_batcher import contribution_batcher
+from app.services.solana_service import SolanaService, get_solana_service
+
+logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 # Request/Response models
 class TrainingSessionCreate(BaseModel):
@@ -35,8 +48,7 @@ class TrainingSessionResponse(BaseModel):
     total_rounds: int
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, extra="ignore")
 
 class JoinTrainingRequest(BaseModel):
     session_id: str
@@ -56,7 +68,8 @@ class SubmitUpdateRequest(BaseModel):
 @router.post("/register_model", response_model=TrainingSessionResponse)
 async def register_model(
     request: TrainingSessionCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    solana_service: SolanaService = Depends(get_solana_service)
 ):
     """Register a new model training session - REAL SOLANA TRANSACTION"""
     try:
@@ -64,15 +77,14 @@ async def register_model(
         session_id = str(uuid.uuid4())
         
         # Create model hash
-        import hashlib
-        model_str = json.dumps(request.model_architecture, sort_keys=True)
-        model_hash = hashlib.sha256(model_str.encode()).hexdigest()
+        model_bytes = orjson.dumps(request.model_architecture, option=orjson.OPT_SORT_KEYS)
+        model_hash = hashlib.sha256(model_bytes).hexdigest()
         
         # Create training session
         session = TrainingSession(
             session_id=session_id,
             model_hash=model_hash,
-            model_architecture=model_str,
+            model_architecture=model_bytes.decode(),
             trainer_address=request.trainer_address,
             total_rounds=request.total_rounds,
             min_contributors=request.min_contributors,
@@ -82,11 +94,11 @@ async def register_model(
         )
         
         db.add(session)
-        db.commit()
-        db.refresh(session)
+        await db.commit()
+        # Only created_at is generated by the database; don't read the architecture back
+        await db.refresh(session, ["created_at"])
         
         # Register on Solana blockchain (REAL TRANSACTION)
-        solana_service = SolanaService()
         try:
             tx_hash = await solana_service.register_training_session(
                 session_id=session_id,
@@ -96,32 +108,27 @@ async def register_model(
             )
             # Store transaction hash in session
             session.status = "active"
-            db.commit()
+            await db.commit()
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             raise HTTPException(status_code=500, detail=f"Solana registration failed: {str(e)}")
         
-        return TrainingSessionResponse(
-            session_id=session.session_id,
-            model_hash=session.model_hash,
-            status=session.status,
-            current_round=session.current_round,
-            total_rounds=session.total_rounds,
-            created_at=session.created_at
-        )
+        await invalidate_training_sessions()
+        
+        return TrainingSessionResponse.model_validate(session)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/join_training")
 async def join_training(
     request: JoinTrainingRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Contributor joins a training session"""
-    session = db.query(TrainingSession).filter(
-        TrainingSession.session_id == request.session_id
-    ).first()
+    session = (await db.execute(
+        select(TrainingSession).where(TrainingSession.session_id == request.session_id)
+    )).scalar_one_or_none()
     
     if not session:
         raise HTTPException(status_code=404, detail="Training session not found")
@@ -140,25 +147,32 @@ async def join_training(
 @router.post("/submit_update")
 async def submit_update(
     request: SubmitUpdateRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Submit encrypted gradient update - REAL SOLANA TRANSACTION"""
     # Verify session and round
-    session = db.query(TrainingSession).filter(
-        TrainingSession.session_id == request.session_id
-    ).first()
+    session = (await db.execute(
+        select(TrainingSession).where(TrainingSession.session_id == request.session_id)
+    )).scalar_one_or_none()
     
     if not session:
         raise HTTPException(status_code=404, detail="Training session not found")
     
-    round_obj = db.query(TrainingRound).filter(
-        TrainingRound.session_id == session.id,
-        TrainingRound.round_number == request.round_id
-    ).first()
+    round_obj = (await db.execute(
+        select(TrainingRound).where(
+            TrainingRound.session_id == session.id,
+            TrainingRound.round_number == request.round_id
+        )
+    )).scalar_one_or_none()
     
     if not round_obj:
         raise HTTPException(status_code=404, detail="Training round not found")
     
+    try:
+        encrypted_gradients = base64.b64decode(request.encrypted_gradients, validate=True)
+    except binascii.Error:
+        raise HTTPException(status_code=400, detail="encrypted_gradients must be base64 encoded")
+    
     # Create contribution record
     contribution = Contribution(
         session_id=session.id,
@@ -169,7 +183,7 @@ async def submit_update(
         nonce=request.nonce,
         accuracy=request.accuracy,
         privacy_score=request.privacy_score,
-        encrypted_gradients=request.encrypted_gradients,
+        encrypted_gradients=encrypted_gradients,
         status="pending"
     )
     
@@ -177,12 +191,11 @@ async def submit_update(
     
     # Update round contributor count
     round_obj.contributors_count += 1
-    db.commit()
+    await db.commit()
     
-    # Log contribution on Solana (REAL TRANSACTION)
-    solana_service = SolanaService()
+    # Log contribution on Solana (REAL TRANSACTION, shared with other queued contributions)
     try:
-        tx_hash = await solana_service.log_contribution(
+        tx_hash = await contribution_batcher.log_contribution(
             session_id=request.session_id,
             contributor_address=request.contributor_address,
             round_id=request.round_id,
@@ -190,11 +203,13 @@ async def submit_update(
         )
         contribution.solana_tx_hash = tx_hash
         contribution.status = "verified"
-        db.commit()
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Solana logging failed: {str(e)}")
     
+    await invalidate_training_sessions()
+    
     return {
         "contribution_id": contribution.id,
         "status": "submitted",
@@ -205,30 +220,36 @@ async def submit_update(
 async def aggregate_updates(
     session_id: str,
     round_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    fl_service: FederatedLearningService = Depends(get_federated_learning_service)
 ):
     """Aggregate gradient updates for a round"""
-    # Get session and round
-    session = db.query(TrainingSession).filter(
-        TrainingSession.session_id == session_id
-    ).first()
-    
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
-    round_obj = db.query(TrainingRound).filter(
-        TrainingRound.session_id == session.id,
-        TrainingRound.round_number == round_id
-    ).first()
+    # Round, its session and its pending contributions in two queries; any
+    # other relationship access raises instead of lazy loading
+    round_obj = (await db.execute(
+        select(TrainingRound).join(
+            TrainingRound.session
+        ).options(*safe_load(
+            joinedload(TrainingRound.session),
+            selectinload(
+                TrainingRound.contributions.and_(Contribution.status == "pending")
+            ).undefer(Contribution.encrypted_gradients)
+        )).where(
+            TrainingSession.session_id == session_id,
+            TrainingRound.round_number == round_id
+        )
+    )).scalar_one_or_none()
     
     if not round_obj:
-        raise HTTPException(status_code=404, detail="Round not found")
+        exists = (await db.execute(
+            select(TrainingSession.id).where(TrainingSession.session_id == session_id)
+        )).first()
+        raise HTTPException(status_code=404, detail="Round not found" if exists else "Session not found")
+    
+    session = round_obj.session
     
-    # Get all contributions for this round
-    contributions = db.query(Contribution).filter(
-        Contribution.round_id == round_obj.id,
-        Contribution.status == "pending"
-    ).all()
+    # Pending contributions for this round (filtered by ix_contributions_round_status)
+    contributions = list(round_obj.contributions)
     
     if len(contributions) < session.min_contributors:
         raise HTTPException(
@@ -237,7 +258,6 @@ async def aggregate_updates(
         )
     
     # Aggregate using federated learning service
-    fl_service = FederatedLearningService()
     aggregated_model = await fl_service.aggregate_gradients(
         contributions=contributions,
         session=session
@@ -254,7 +274,8 @@ async def aggregate_updates(
     if session.current_round >= session.total_rounds:
         session.status = "completed"
     
-    db.commit()
+    await db.commit()
+    await invalidate_training_sessions()
     
     return {
         "session_id": session_id,
@@ -267,21 +288,29 @@ async def aggregate_updates(
 @router.get("/sessions/{session_id}")
 async def get_session(
     session_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    solana_service: SolanaService = Depends(get_solana_service)
 ):
     """Get training session details from database and on-chain"""
-    # Get from database
-    session = db.query(TrainingSession).filter(
-        TrainingSession.session_id == session_id
-    ).first()
-    
-    # Also try to get from on-chain
-    solana_service = SolanaService()
-    onchain_sessions = await solana_service.get_training_sessions_onchain()
+    cache_key = await cache.versioned_key(TRAINING_SESSIONS_PREFIX, session_id)
+    cached = await cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    # Database row and on-chain sessions, fetched concurrently
+    result, onchain_sessions = await asyncio.gather(
+        db.execute(
+            select(TrainingSession).options(*safe_load()).where(
+                TrainingSession.session_id == session_id
+            )
+        ),
+        solana_service.get_training_sessions_onchain()
+    )
+    session = result.scalar_one_or_none()
     onchain_session = next((s for s in onchain_sessions if s.get("session_id") == session_id), None)
     
     if session:
-        return {
+        response = {
             "session_id": session.session_id,
             "model_hash": session.model_hash,
             "status": session.status,
@@ -292,26 +321,50 @@ async def get_session(
             "source": "database"
         }
     elif onchain_session:
-        return {
+        response = {
             **onchain_session,
             "source": "onchain"
         }
     else:
         raise HTTPException(status_code=404, detail="Session not found")
+    
+    await cache.set(cache_key, response, settings.TRAINING_SESSION_CACHE_TTL)
+    return response
 
 @router.get("/sessions")
 async def list_sessions(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    after_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db),
+    solana_service: SolanaService = Depends(get_solana_service)
 ):
-    """List all training sessions from database and on-chain"""
-    # Get from database
-    db_sessions = db.query(TrainingSession).offset(skip).limit(limit).all()
-    
-    # Also fetch from on-chain
-    solana_service = SolanaService()
-    onchain_sessions = await solana_service.get_training_sessions_onchain()
+    """List all training sessions from database and on-chain.
+
+    Page with after_id (keyset): pass the X-Next-Cursor header of the previous
+    page. skip still works but gets slower the deeper it goes.
+    """
+    cache_key = await cache.versioned_key(TRAINING_SESSIONS_PREFIX, f"list:{skip}:{limit}:{after_id}")
+    cached = await cache.get(cache_key)
+    if cached is not None:
+        if cached["next_cursor"] is not None:
+            response.headers["X-Next-Cursor"] = str(cached["next_cursor"])
+        return cached["sessions"]
+    
+    query = select(TrainingSession).options(*safe_load()).order_by(TrainingSession.id)
+    if after_id is not None:
+        query = query.where(TrainingSession.id > after_id)
+    elif skip:
+        logger.warning(f"list_sessions called with offset pagination (skip={skip}); use after_id")
+        query = query.offset(skip)
+    
+    # Database page and on-chain sessions, fetched concurrently
+    result, onchain_sessions = await asyncio.gather(
+        db.execute(query.limit(limit)),
+        solana_service.get_training_sessions_onchain()
+    )
+    db_sessions = result.scalars().all()
     
     # Merge and return
     sessions_list = []
@@ -338,41 +391,58 @@ async def list_sessions(
                 "source": "onchain"
             })
     
+    next_cursor = db_sessions[-1].id if len(db_sessions) == limit else None
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    
+    await cache.set(
+        cache_key,
+        {"sessions": sessions_list, "next_cursor": next_cursor},
+        settings.TRAINING_SESSION_CACHE_TTL
+    )
     return sessions_list
 
 @router.get("/sessions/onchain")
 async def get_onchain_sessions(
-    trainer_address: Optional[str] = None
+    trainer_address: Optional[str] = None,
+    solana_service: SolanaService = Depends(get_solana_service)
 ):
     """Get training sessions directly from blockchain"""
-    solana_service = SolanaService()
+    cache_key = await cache.versioned_key(TRAINING_SESSIONS_PREFIX, f"onchain:{trainer_address or 'all'}")
+    cached = await cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     sessions = await solana_service.get_training_sessions_onchain(trainer_address)
-    return {
+    response = {
         "sessions": sessions,
         "count": len(sessions),
         "source": "blockchain"
     }
+    await cache.set(cache_key, response, settings.TRAINING_SESSION_CACHE_TTL)
+    return response
 
 @router.get("/sessions/{session_id}/contributions")
 async def get_session_contributions(
     session_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    solana_service: SolanaService = Depends(get_solana_service)
 ):
     """Get contributions for a session from database and on-chain"""
-    # Get from database
-    session = db.query(TrainingSession).filter(
-        TrainingSession.session_id == session_id
-    ).first()
-    
-    db_contributions = []
-    if session:
-        db_contributions = db.query(Contribution).filter(
-            Contribution.session_id == session.id
-        ).all()
+    # Database (session with its contributions) and on-chain, fetched concurrently
+    result, onchain_contributions = await asyncio.gather(
+        db.execute(
+            select(TrainingSession).options(*safe_load(
+                selectinload(TrainingSession.contributions)
+            )).where(
+                TrainingSession.session_id == session_id
+            )
+        ),
+        solana_service.get_contributions_onchain(session_id)
+    )
+    session = result.scalar_one_or_none()
     
-    # Get from on-chain
-    solana_service = SolanaService()
-    onchain_contributions = await solana_service.get_contributions_onchain(session_id)
+    db_contributions = session.contributions if session else []
     
     # Combine and return
     contributions = []
@@ -0,0 +1,196 @@
+"""
+Response cache - Redis backed, with an in-process fallback
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+import orjson
+
+from app.core.config import settings
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_DASHBOARD_KEY = "analytics:dashboard"
+ANALYTICS_NETWORK_STATS_KEY = "analytics:network-stats"
+CHALLENGE_LIST_PREFIX = "challenges:list:"
+LEADERBOARD_PREFIX = "lb:"
+TRAINING_SESSIONS_PREFIX = "sessions:"
+
+# Expired in-process entries are swept at least this often (seconds)
+LOCAL_SWEEP_INTERVAL = 60
+
+class ResponseCache:
+    """Cache JSON-serializable responses by key with a TTL.
+
+    Uses Redis when REDIS_URL is configured and the redis package is installed,
+    otherwise keeps entries in process memory, bounded to
+    LOCAL_CACHE_MAX_ENTRIES with expired keys swept on write. Cache errors
+    are logged and treated as misses so callers always fall back to
+    computing the value.
+    """
+
+    def __init__(self):
+        self._redis = None
+        self._local: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._next_sweep = time.monotonic() + LOCAL_SWEEP_INTERVAL
+        self._versions: Dict[str, int] = {}
+        self._refresh_tasks: Set[asyncio.Task] = set()
+        if settings.REDIS_URL:
+            if aioredis:
+                self._redis = aioredis.from_url(settings.REDIS_URL)
+            else:
+                logger.warning("REDIS_URL is set but the redis package is not installed. Using in-process cache.")
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Get a cached value, or None on miss"""
+        try:
+            if self._redis is not None:
+                raw = await self._redis.get(key)
+            else:
+                entry = self._local.get(key)
+                raw = None
+                if entry:
+                    expires_at, raw = entry
+                    if expires_at < time.monotonic():
+                        self._local.pop(key, None)
+                        raw = None
+                    else:
+                        self._local.move_to_end(key)
+            return orjson.loads(raw) if raw is not None else None
+        except Exception as e:
+            logger.warning(f"Cache get failed for {key}: {e}")
+            return None
+
+    async def set(self, key: str, value: Any, ttl: int):
+        """Store a value for ttl seconds"""
+        try:
+            raw = orjson.dumps(value)
+            if self._redis is not None:
+                await self._redis.setex(key, ttl, raw)
+            else:
+                self._set_local(key, (time.monotonic() + ttl, raw))
+        except Exception as e:
+            logger.warning(f"Cache set failed for {key}: {e}")
+    
+    def _set_local(self, key: str, entry: Tuple[float, bytes]):
+        """Store an in-process entry, sweeping expired keys and evicting the least recently used"""
+        self._local[key] = entry
+        self._local.move_to_end(key)
+        now = time.monotonic()
+        if now >= self._next_sweep or len(self._local) > settings.LOCAL_CACHE_MAX_ENTRIES:
+            for expired in [k for k, (expires_at, _) in self._local.items() if expires_at < now]:
+                del self._local[expired]
+            self._next_sweep = now + LOCAL_SWEEP_INTERVAL
+        while len(self._local) > settings.LOCAL_CACHE_MAX_ENTRIES:
+            self._local.popitem(last=False)
+
+    async def delete(self, *keys: str):
+        """Invalidate one or more keys"""
+        try:
+            if self._redis is not None:
+                await self._redis.delete(*keys)
+            else:
+                for key in keys:
+                    self._local.pop(key, None)
+        except Exception as e:
+            logger.warning(f"Cache delete failed for {keys}: {e}")
+
+    async def versioned_key(self, prefix: str, suffix: str) -> str:
+        """Build a cache key under the prefix's current version.
+
+        bump_version() moves every reader of the prefix to fresh keys; entries
+        under older versions are never read again and expire by their TTL.
+        """
+        version = 0
+        try:
+            if self._redis is not None:
+                version = int(await self._redis.get(f"{prefix}version") or 0)
+            else:
+                version = self._versions.get(prefix, 0)
+        except Exception as e:
+            logger.warning(f"Cache version read failed for {prefix}: {e}")
+        return f"{prefix}v{version}:{suffix}"
+    
+    async def bump_version(self, prefix: str):
+        """Invalidate every key built with versioned_key(prefix, ...) in O(1)"""
+        try:
+            if self._redis is not None:
+                await self._redis.incr(f"{prefix}version")
+            else:
+                self._versions[prefix] = self._versions.get(prefix, 0) + 1
+        except Exception as e:
+            logger.warning(f"Cache version bump failed for {prefix}: {e}")
+    
+    async def acquire_lock(self, key: str, ttl: int) -> bool:
+        """Take a short-lived lock key; False if someone else holds it"""
+        try:
+            if self._redis is not None:
+                return bool(await self._redis.set(key, b"1", nx=True, ex=ttl))
+            entry = self._local.get(key)
+            if entry and entry[0] >= time.monotonic():
+                return False
+            self._set_local(key, (time.monotonic() + ttl, b"1"))
+            return True
+        except Exception as e:
+            logger.warning(f"Cache lock failed for {key}: {e}")
+            return False
+
+    async def get_or_set_swr(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[Any]],
+        ttl: int,
+        stale_ttl: int
+    ) -> Any:
+        """Stale-while-revalidate: serve fresh hits, serve stale hits while one
+        background task recomputes, and only block on a full miss.
+
+        Entries live for ttl + stale_ttl seconds; a ``<key>:refreshing`` lock
+        keeps concurrent requests from stampeding the factory.
+        """
+        entry = await self.get(key)
+        if entry is not None:
+            if entry["fresh_until"] < time.time():
+                if await self.acquire_lock(f"{key}:refreshing", max(ttl, 1)):
+                    task = asyncio.create_task(self._refresh(key, factory, ttl, stale_ttl))
+                    self._refresh_tasks.add(task)
+                    task.add_done_callback(self._refresh_tasks.discard)
+            return entry["value"]
+
+        value = await factory()
+        await self._store_swr(key, value, ttl, stale_ttl)
+        return value
+
+    async def _refresh(self, key: str, factory: Callable[[], Awaitable[Any]], ttl: int, stale_ttl: int):
+        try:
+            await self._store_swr(key, await factory(), ttl, stale_ttl)
+        except Exception as e:
+            logger.warning(f"Background refresh failed for {key}: {e}")
+        finally:
+            await self.delete(f"{key}:refreshing")
+
+    async def _store_swr(self, key: str, value: Any, ttl: int, stale_ttl: int):
+        await self.set(key, {"value": value, "fresh_until": time.time() + ttl}, ttl + stale_ttl)
+
+# Singleton instance
+cache = ResponseCache()
+
+async def invalidate_analytics():
+    """Drop cached analytics responses after a write that changes them"""
+    await cache.delete(ANALYTICS_DASHBOARD_KEY, ANALYTICS_NETWORK_STATS_KEY)
+
+async def invalidate_challenge_list():
+    """Drop cached challenge listings after a challenge is created or its counters change"""
+    await cache.bump_version(CHALLENGE_LIST_PREFIX)
+
+async def invalidate_training_sessions():
+    """Drop cached training session reads after a session, round or contribution changes"""
+    await cache.bump_version(TRAINING_SESSIONS_PREFIX)
@@ -1,21 +1,53 @@
 """
 Application Configuration
 """
-from pydantic_settings import BaseSettings
+from functools import cached_property, lru_cache
 from typing import List
 
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
 class Settings(BaseSettings):
     # API Configuration
     API_HOST: str = "0.0.0.0"
     API_PORT: int = 8000
     DEBUG: bool = True
+    ENV: str = "development"  # development, test, production
     
     # Database - MongoDB (Primary)
     MONGODB_URL: str = "mongodb://localhost:27017"
     MONGODB_DB_NAME: str = "flexai"
+    MONGODB_MAX_POOL_SIZE: int = 50
+    MONGODB_MIN_POOL_SIZE: int = 10  # connections kept open (and TLS-established) while idle
+    MONGODB_MAX_IDLE_TIME_MS: int = 60000
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: int = 5000
     
     # Legacy SQL database (optional, for migration)
     DATABASE_URL: str = "sqlite:///./flexai.db"
+    # PostgreSQL pool sizing (per worker) and asyncpg statement caches.
+    # DB_POOL_SIZE/DB_MAX_OVERFLOW size the async engine that serves requests;
+    # the sync engine only backs background jobs and a few legacy routes.
+    DB_POOL_SIZE: int = 50
+    DB_MAX_OVERFLOW: int = 100
+    DB_SYNC_POOL_SIZE: int = 5
+    DB_SYNC_MAX_OVERFLOW: int = 5
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_TIMEOUT_SECONDS: int = 30
+    DB_STATEMENT_CACHE_SIZE: int = 1024
+    
+    # Cache (Redis is optional - an in-process cache is used when unset)
+    REDIS_URL: str = ""
+    LOCAL_CACHE_MAX_ENTRIES: int = 10000  # cap for the in-process cache; least recently used keys go first
+    ANALYTICS_CACHE_TTL: int = 60
+    CHALLENGE_LIST_CACHE_TTL: int = 10
+    LEADERBOARD_CACHE_TTL: int = 30
+    LEADERBOARD_CACHE_STALE_TTL: int = 120
+    TRAINING_SESSION_CACHE_TTL: int = 30
+    
+    # Leaderboard ranks are persisted by a background task at this interval
+    LEADERBOARD_RANK_REFRESH_SECONDS: int = 60
+    
+    # On-chain reward accounts are mirrored into SQL at this interval
+    ONCHAIN_MIRROR_INTERVAL_SECONDS: int = 60
     
     # Solana Configuration
     SOLANA_RPC_URL: str = "https://api.testnet.solana.com"
@@ -23,6 +55,13 @@ class Settings(BaseSettings):
     SOLANA_PRIVATE_KEY: str = ""
     PROGRAM_ID: str = "FlexAIPr0gramID1111111111111111111111"
     TOKEN_MINT: str = ""  # SPL token mint address for rewards
+    SOLANA_PREWARM_CONNECTIONS: int = 8  # RPC connections opened at startup (0 disables)
+    # Contribution logs are packed into shared transactions of up to this many
+    # instructions, flushed at the latest this long after the first one arrives
+    SOLANA_BATCH_MAX_SIZE: int = 20
+    SOLANA_BATCH_MAX_WAIT_MS: int = 500
+    # A fetched blockhash is reused for this long (blockhashes stay valid for ~60s)
+    SOLANA_BLOCKHASH_TTL_SECONDS: float = 20.0
     
     # CORS
     CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:5173"]
@@ -36,30 +75,59 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
-    # Auth0 Configuration
-    AUTH0_DOMAIN: str = ""
-    AUTH0_CLIENT_ID: str = ""
-    AUTH0_CLIENT_SECRET: str = ""
-    AUTH0_AUDIENCE: str = ""
-    
-    # Gemini API Configuration
-    GEMINI_API_KEY: str = ""
-    GEMINI_MODEL: str = "gemini-pro"
-    
     # Storage Configuration
     IPFS_GATEWAY: str = "https://ipfs.io/ipfs/"
-    AWS_S3_BUCKET: str = ""
-    AWS_ACCESS_KEY_ID: str = ""
-    AWS_SECRET_ACCESS_KEY: str = ""
     
     # Model Configuration
     MODEL_STORAGE_PATH: str = "./models"
     MAX_ROUNDS: int = 100
     MIN_CONTRIBUTORS: int = 3
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
+    # Auth0 / Gemini / AWS keys live in the sub-settings below
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=True, frozen=True, extra="ignore")
+    
+    @cached_property
+    def auth0(self) -> "Auth0Settings":
+        return Auth0Settings()
+    
+    @cached_property
+    def gemini(self) -> "GeminiSettings":
+        return GeminiSettings()
+    
+    @cached_property
+    def aws(self) -> "AWSSettings":
+        return AWSSettings()
+
+# Rarely used groups, read from the environment on first access only
+
+class Auth0Settings(BaseSettings):
+    """AUTH0_* variables"""
+    DOMAIN: str = ""
+    CLIENT_ID: str = ""
+    CLIENT_SECRET: str = ""
+    AUDIENCE: str = ""
+    
+    model_config = SettingsConfigDict(env_prefix="AUTH0_", env_file=".env", case_sensitive=True, frozen=True, extra="ignore")
+
+class GeminiSettings(BaseSettings):
+    """GEMINI_* variables"""
+    API_KEY: str = ""
+    MODEL: str = "gemini-pro"
+    
+    model_config = SettingsConfigDict(env_prefix="GEMINI_", env_file=".env", case_sensitive=True, frozen=True, extra="ignore")
+
+class AWSSettings(BaseSettings):
+    """AWS_* variables (S3 model storage)"""
+    S3_BUCKET: str = ""
+    ACCESS_KEY_ID: str = ""
+    SECRET_ACCESS_KEY: str = ""
+    
+    model_config = SettingsConfigDict(env_prefix="AWS_", env_file=".env", case_sensitive=True, frozen=True, extra="ignore")
+
+@lru_cache
+def get_settings() -> Settings:
+    """Load settings once per process; also usable as a FastAPI dependency"""
+    return Settings()
 
-settings = Settings()
+settings = get_settings()
 
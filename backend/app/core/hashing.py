@@ -0,0 +1,24 @@
+"""
+Hashing helpers - incremental SHA-256 so large payloads are never held whole
+"""
+import hashlib
+from typing import Iterable
+
+from fastapi import UploadFile
+
+HASH_CHUNK_SIZE = 1 << 20  # 1 MiB
+
+async def hash_upload(file: UploadFile, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """SHA-256 hex digest of an uploaded file; rewinds it afterwards so it can be read again"""
+    hasher = hashlib.sha256()
+    while chunk := await file.read(chunk_size):
+        hasher.update(chunk)
+    await file.seek(0)
+    return hasher.hexdigest()
+
+def hash_chunks(chunks: Iterable[bytes]) -> str:
+    """SHA-256 hex digest of a sequence of byte chunks, equal to hashing their concatenation"""
+    hasher = hashlib.sha256()
+    for chunk in chunks:
+        hasher.update(chunk)
+    return hasher.hexdigest()
@@ -0,0 +1,21 @@
+"""
+Identifier generation - time-ordered UUIDs for indexed ID columns
+"""
+import os
+import time
+import uuid
+
+def uuid7() -> uuid.UUID:
+    """Generate a UUIDv7 (RFC 9562): 48-bit Unix ms timestamp followed by random bits.
+
+    IDs created close together sort close together, so inserts land on the
+    right-hand edge of the B-tree index instead of a random page.
+    """
+    timestamp_ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), "big")
+    value = (timestamp_ms & 0xFFFF_FFFF_FFFF) << 80
+    value |= 0x7 << 76  # version
+    value |= ((rand >> 64) & 0xFFF) << 64  # rand_a
+    value |= 0b10 << 62  # variant
+    value |= rand & 0x3FFF_FFFF_FFFF_FFFF  # rand_b
+    return uuid.UUID(int=value)
@@ -0,0 +1,37 @@
+"""
+Logging configuration - records are handed to a background thread for I/O
+"""
+import logging
+import logging.handlers
+import queue
+from typing import Optional
+
+from app.core.config import settings
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def setup_logging():
+    """Route root logging through a QueueHandler so the event loop never blocks on stdout"""
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    root = logging.getLogger()
+    root.handlers = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(logging.INFO)
+    # DEBUG only for our own modules; third-party libraries stay at INFO
+    logging.getLogger("app").setLevel(logging.DEBUG if settings.DEBUG else logging.INFO)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,11 @@
+"""
+Public key parsing - memoized so repeat addresses skip the base58 decode
+"""
+from functools import lru_cache
+
+from solders.pubkey import Pubkey
+
+@lru_cache(maxsize=8192)
+def parse_pubkey(address: str) -> Pubkey:
+    """Parse a base58 address into a Pubkey, caching results (invalid input still raises)"""
+    return Pubkey.from_string(address)
@@ -2,35 +2,79 @@
 Security utilities for encryption and privacy
 """
 import numpy as np
-from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from cryptography.hazmat.backends import default_backend
 import base64
+import hashlib
 import os
+import struct
+from functools import lru_cache
 from typing import List, Tuple
 
+GCM_NONCE_SIZE = 12
+
+# dtype kinds accepted in a gradient frame: bool, signed/unsigned int, float, complex
+GRADIENT_DTYPE_KINDS = frozenset("biufc")
+
+@lru_cache(maxsize=1024)
+def _get_cipher(key: bytes):
+    """AES-GCM context for a key, shared by every EncryptionService using it"""
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    return AESGCM(key)
+
 class EncryptionService:
-    """Handle encryption/decryption of gradients"""
+    """Handle encryption/decryption of gradients with AES-256-GCM.
+
+    Gradients are packed as raw array buffers behind a small shape/dtype
+    header, so no pickling is involved. The wire format is a 12-byte nonce
+    followed by the GCM ciphertext and tag.
+    """
     
     def __init__(self, key: bytes = None):
         if key is None:
-            key = Fernet.generate_key()
-        self.cipher = Fernet(key)
+            key = os.urandom(32)
+        self.cipher = _get_cipher(key)
         self.key = key
     
     def encrypt_gradients(self, gradients: List[np.ndarray]) -> bytes:
         """Encrypt gradients before transmission"""
-        # Serialize gradients to bytes
-        import pickle
-        serialized = pickle.dumps(gradients)
-        return self.cipher.encrypt(serialized)
+        arrays = [np.asarray(grad, order="C") for grad in gradients]
+        header = [struct.pack("<I", len(arrays))]
+        for arr in arrays:
+            if arr.dtype.kind not in GRADIENT_DTYPE_KINDS:
+                raise ValueError(f"Unsupported gradient dtype: {arr.dtype}")
+            header.append(struct.pack(
+                f"<4sI{arr.ndim}Q", arr.dtype.str.encode(), arr.ndim, *arr.shape
+            ))
+        nonce = os.urandom(GCM_NONCE_SIZE)
+        return nonce + self.cipher.encrypt(nonce, b"".join(header + arrays), None)
     
     def decrypt_gradients(self, encrypted: bytes) -> List[np.ndarray]:
-        """Decrypt gradients after reception"""
-        import pickle
-        decrypted = self.cipher.decrypt(encrypted)
-        return pickle.loads(decrypted)
+        """Decrypt gradients after reception.
+
+        Arrays are read-only views over the decrypted buffer; copy one before
+        modifying it in place.
+        """
+        nonce, ciphertext = encrypted[:GCM_NONCE_SIZE], encrypted[GCM_NONCE_SIZE:]
+        buf = self.cipher.decrypt(nonce, ciphertext, None)
+        
+        (count,) = struct.unpack_from("<I", buf, 0)
+        offset = 4
+        layouts = []
+        for _ in range(count):
+            dtype_str, ndim = struct.unpack_from("<4sI", buf, offset)
+            offset += 8
+            shape = struct.unpack_from(f"<{ndim}Q", buf, offset)
+            offset += 8 * ndim
+            dtype = np.dtype(dtype_str.rstrip(b"\0").decode())
+            if dtype.kind not in GRADIENT_DTYPE_KINDS:
+                raise ValueError(f"Unsupported gradient dtype: {dtype}")
+            layouts.append((dtype, shape))
+        
+        gradients = []
+        for dtype, shape in layouts:
+            size = int(np.prod(shape, dtype=np.int64))
+            gradients.append(np.frombuffer(buf, dtype=dtype, count=size, offset=offset).reshape(shape))
+            offset += size * dtype.itemsize
+        return gradients
     
     def get_key_base64(self) -> str:
         """Get encryption key as base64 string"""
@@ -42,30 +86,33 @@ class LocalDifferentialPrivacy:
     def __init__(self, epsilon: float = 1.0, sensitivity: float = 1.0):
         self.epsilon = epsilon
         self.sensitivity = sensitivity
+        self._rng = np.random.default_rng()
     
     def add_laplace_noise(self, gradients: List[np.ndarray]) -> List[np.ndarray]:
         """Add Laplace noise to gradients for LDP"""
-        noisy_gradients = []
         scale = self.sensitivity / self.epsilon
-        
-        for grad in gradients:
-            # Generate Laplace noise
-            noise = np.random.laplace(0, scale, grad.shape)
-            noisy_grad = grad + noise
-            noisy_gradients.append(noisy_grad)
-        
-        return noisy_gradients
+        noise = self._rng.laplace(0, scale, self._total_size(gradients))
+        return self._apply_noise(gradients, noise)
     
     def add_gaussian_noise(self, gradients: List[np.ndarray], delta: float = 1e-5) -> List[np.ndarray]:
         """Add Gaussian noise for (epsilon, delta)-DP"""
-        noisy_gradients = []
         sigma = np.sqrt(2 * np.log(1.25 / delta)) * self.sensitivity / self.epsilon
-        
+        noise = self._rng.normal(0, sigma, self._total_size(gradients))
+        return self._apply_noise(gradients, noise)
+    
+    @staticmethod
+    def _total_size(gradients: List[np.ndarray]) -> int:
+        return sum(np.size(grad) for grad in gradients)
+    
+    @staticmethod
+    def _apply_noise(gradients: List[np.ndarray], noise: np.ndarray) -> List[np.ndarray]:
+        """Add one flat noise draw across all gradients, one slice per array"""
+        noisy_gradients = []
+        offset = 0
         for grad in gradients:
-            noise = np.random.normal(0, sigma, grad.shape)
-            noisy_grad = grad + noise
-            noisy_gradients.append(noisy_grad)
-        
+            size = np.size(grad)
+            noisy_gradients.append(grad + noise[offset:offset + size].reshape(np.shape(grad)))
+            offset += size
         return noisy_gradients
 
 class CommitmentHash:
@@ -73,18 +120,21 @@ class CommitmentHash:
     
     @staticmethod
     def generate_commitment(gradients: List[np.ndarray], nonce: bytes = None) -> str:
-        """Generate commitment hash for gradients"""
-        import pickle
-        import hashlib
-        
+        """Generate commitment hash for gradients.
+
+        Hashes the nonce, then each array's dtype, shape and raw bytes in order,
+        so the result does not depend on the pickle protocol or Python version.
+        """
         if nonce is None:
             nonce = os.urandom(32)
         
-        # Serialize gradients
-        serialized = pickle.dumps(gradients)
-        
-        # Create hash
-        hash_obj = hashlib.sha256(serialized + nonce)
+        hash_obj = hashlib.sha256(nonce)
+        for grad in gradients:
+            arr = np.asarray(grad, order="C")
+            hash_obj.update(struct.pack(
+                f"<4sI{arr.ndim}Q", arr.dtype.str.encode(), arr.ndim, *arr.shape
+            ))
+            hash_obj.update(arr)
         commitment = hash_obj.hexdigest()
         
         return commitment, nonce
@@ -3,30 +3,88 @@ Database configuration and session management
 """
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 from app.core.config import settings
 import os
 
 # Use SQLite if DATABASE_URL is not set or points to SQLite
 database_url = settings.DATABASE_URL
-if database_url.startswith("sqlite") or "sqlite" in database_url.lower():
+is_sqlite = database_url.startswith("sqlite") or "sqlite" in database_url.lower()
+
+is_sqlite_memory = is_sqlite and (":memory:" in database_url or database_url.rstrip("/").endswith("sqlite:"))
+
+# In-memory SQLite lives in a single connection; StaticPool shares it across sessions
+sqlite_pool_args = {"poolclass": StaticPool} if is_sqlite_memory else {"pool_pre_ping": True}
+
+# PostgreSQL pool behaviour shared by the sync and async engines; each sizes its own pool
+postgres_pool_args = {
+    "pool_pre_ping": True,
+    "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+    "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+    # Reuse the most recently returned connection so idle ones can age out
+    "pool_use_lifo": True,
+    "pool_reset_on_return": "rollback",
+    "echo_pool": settings.DEBUG
+}
+
+if is_sqlite:
     # SQLite configuration
     engine = create_engine(
         database_url,
         connect_args={"check_same_thread": False},  # Needed for SQLite
-        pool_pre_ping=True
+        **sqlite_pool_args
     )
 else:
     # PostgreSQL configuration
     engine = create_engine(
         database_url,
-        pool_pre_ping=True,
-        pool_size=10,
-        max_overflow=20
+        pool_size=settings.DB_SYNC_POOL_SIZE,
+        max_overflow=settings.DB_SYNC_MAX_OVERFLOW,
+        **postgres_pool_args
     )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def get_async_database_url(url: str) -> str:
+    """Map the configured database URL onto its asyncio driver (aiosqlite / asyncpg)"""
+    if url.startswith("sqlite+") or url.startswith("postgresql+asyncpg"):
+        return url
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql+asyncpg://", 1)
+    if url.startswith("postgresql"):
+        # Covers both postgresql:// and postgresql+psycopg2://
+        return "postgresql+asyncpg://" + url.split("://", 1)[1]
+    return url
+
+# Async engine for routes that must not block the event loop
+async_database_url = get_async_database_url(database_url)
+if is_sqlite:
+    async_engine = create_async_engine(async_database_url, **sqlite_pool_args)
+else:
+    async_engine = create_async_engine(
+        async_database_url,
+        # asyncpg's own statement cache plus SQLAlchemy's prepared statement cache,
+        # so repeat parameterized queries skip parsing and planning
+        connect_args={
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE
+        },
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        **postgres_pool_args
+    )
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 Base = declarative_base()
 
 def get_db():
@@ -36,3 +94,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    """Dependency for getting an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
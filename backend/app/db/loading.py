@@ -0,0 +1,18 @@
+"""
+Loader options - explicit eager loads, with lazy loads disabled outside production
+"""
+from sqlalchemy.orm import raiseload
+from sqlalchemy.orm.interfaces import LoaderOption
+
+from app.core.config import settings
+
+def safe_load(*explicit: LoaderOption) -> list:
+    """Return the given loader options plus raiseload("*") unless ENV is production.
+
+    Any relationship the query did not load explicitly then raises on access in
+    development and tests, so an accidental N+1 fails loudly instead of issuing
+    one query per row. Production keeps the default lazy loading as a fallback.
+    """
+    if settings.ENV == "production":
+        return list(explicit)
+    return [*explicit, raiseload("*")]
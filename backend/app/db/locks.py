@@ -0,0 +1,72 @@
+"""
+Cross-process locks - keep periodic jobs to one worker at a time
+"""
+import logging
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.db.database import engine, is_sqlite
+
+logger = logging.getLogger(__name__)
+
+# Advisory lock keys, one per periodic job
+ONCHAIN_MIRROR_LOCK_KEY = 7201001
+RANK_REFRESH_LOCK_KEY = 7201002
+
+class LeaderLock:
+    """Session-level PostgreSQL advisory lock that makes one process the leader for a job.
+
+    The lock lives on a dedicated autocommit connection, so it is held until
+    release() or until the process (or its connection) goes away, at which
+    point another worker takes over on its next try_acquire(). SQLite
+    deployments run a single process, so the lock is always granted there.
+    """
+
+    def __init__(self, key: int):
+        self.key = key
+        self._conn: Optional[Connection] = None
+
+    def try_acquire(self) -> bool:
+        """Return True if this process holds (or just took) the lock"""
+        if is_sqlite:
+            return True
+        if self._conn is not None:
+            try:
+                self._conn.execute(text("SELECT 1"))
+                return True
+            except Exception as e:
+                logger.warning(f"Lost connection holding advisory lock {self.key}: {e}")
+                self._discard()
+
+        conn = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        try:
+            acquired = conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key}).scalar()
+        except Exception:
+            conn.close()
+            raise
+        if acquired:
+            self._conn = conn
+            return True
+        conn.close()
+        return False
+
+    def release(self):
+        """Give the lock up so another worker can take over"""
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.key})
+            self._conn.close()
+            self._conn = None
+        except Exception as e:
+            logger.warning(f"Error releasing advisory lock {self.key}: {e}")
+            self._discard()
+
+    def _discard(self):
+        try:
+            self._conn.invalidate()
+        except Exception:
+            pass
+        self._conn = None
@@ -1,8 +1,8 @@
 """
 Database models for FlexAI
 """
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, JSON, BigInteger
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, JSON, BigInteger, Index, LargeBinary
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
 from app.db.database import Base
 
@@ -29,6 +29,18 @@ class Challenge(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     closed_at = Column(DateTime(timezone=True))
     
+    __table_args__ = (
+        # list_challenges: status filter + deadline filter, newest first
+        Index("ix_challenge_status_deadline_created", status, deadline, created_at.desc()),
+        # Active listing only ever reads live challenges (partial on Postgres)
+        Index(
+            "ix_active_challenges",
+            deadline,
+            created_at.desc(),
+            postgresql_where=status == "active"
+        ),
+    )
+    
     # Relationships
     submissions = relationship("Submission", back_populates="challenge")
     evaluations = relationship("Evaluation", back_populates="challenge")
@@ -38,13 +50,14 @@ class Submission(Base):
     __tablename__ = "submissions"
     
     id = Column(Integer, primary_key=True, index=True)
+    # challenge_id / contributor_address lookups use the composite indexes below
     challenge_id = Column(Integer, ForeignKey("challenges.id"))
-    contributor_address = Column(String, index=True)  # Solana wallet address
+    contributor_address = Column(String)  # Solana wallet address
     model_hash = Column(String, index=True)  # Hash of the fine-tuned model
     model_ipfs_hash = Column(String)  # IPFS hash for model storage
     metadata_ipfs_hash = Column(String)  # IPFS hash for model metadata
     accuracy = Column(Float)  # Model accuracy from evaluation
-    status = Column(String, default="pending")  # pending, approved, rejected
+    status = Column(String, default="pending", index=True)  # pending, approved, rejected
     submitted_at = Column(DateTime(timezone=True), server_default=func.now())
     approved_at = Column(DateTime(timezone=True))
     rejected_at = Column(DateTime(timezone=True))
@@ -53,6 +66,13 @@ class Submission(Base):
     reward_tx_hash = Column(String)  # Transaction hash for reward payout
     reward_amount = Column(Float, default=0.0)
     
+    __table_args__ = (
+        # list_submissions: a challenge's submissions by status, newest first
+        Index("ix_submissions_challenge_status_time", challenge_id, status, submitted_at.desc()),
+        # list_submissions: a contributor's submissions, newest first
+        Index("ix_submissions_contributor_time", contributor_address, submitted_at.desc()),
+    )
+    
     # Relationships
     challenge = relationship("Challenge", back_populates="submissions")
     evaluation = relationship("Evaluation", back_populates="submission", uselist=False)
@@ -69,11 +89,17 @@ class Evaluation(Base):
     recall = Column(Float)
     f1_score = Column(Float)
     loss = Column(Float)
-    evaluation_metrics = Column(JSON)  # Additional metrics as JSON
+    improvement_over_baseline = Column(Float)
+    evaluation_metrics = Column(JSON)  # Any other metrics, minus those stored in their own columns
     evaluation_report = Column(Text)  # Detailed evaluation report
     gemini_job_id = Column(String)  # Gemini API job ID
     evaluated_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    __table_args__ = (
+        # A challenge's evaluations ranked by accuracy
+        Index("ix_evaluations_challenge_accuracy", challenge_id, accuracy.desc()),
+    )
+    
     # Relationships
     challenge = relationship("Challenge", back_populates="evaluations")
     submission = relationship("Submission", back_populates="evaluation")
@@ -100,6 +126,8 @@ class Reward(Base):
     contributor_address = Column(String, index=True)
     challenge_id = Column(Integer, ForeignKey("challenges.id"))
     submission_id = Column(Integer, ForeignKey("submissions.id"))
+    session_id = Column(Integer, ForeignKey("training_sessions.id"))  # Federated training payouts
+    round_id = Column(Integer)  # Training round number
     amount = Column(Float)
     token_amount = Column(Float)  # SPL token amount
     token_mint = Column(String)  # SPL token mint address
@@ -107,6 +135,34 @@ class Reward(Base):
     status = Column(String, default="pending")  # pending, completed, failed
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     completed_at = Column(DateTime(timezone=True))
+    
+    __table_args__ = (
+        # rewards-timeline / dashboard: completed rewards by date (partial on Postgres)
+        Index(
+            "ix_reward_status_created",
+            status,
+            created_at,
+            postgresql_where=status == "completed"
+        ),
+        # rewards leaderboard / contributor rewards: completed rewards per address;
+        # on Postgres the amount is carried in the index so the SUM skips the heap
+        Index(
+            "ix_rewards_status_addr",
+            status,
+            contributor_address,
+            postgresql_include=["amount"]
+        ),
+    )
+
+class OnchainReward(Base):
+    """Snapshot of on-chain reward accounts, refreshed periodically for SQL aggregation"""
+    __tablename__ = "onchain_rewards"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    contributor_address = Column(String, index=True)
+    session_address = Column(String)  # Training session PDA
+    amount = Column(Float)
+    synced_at = Column(DateTime(timezone=True), server_default=func.now())
 
 class User(Base):
     """User accounts (for Auth0/OAuth integration)"""
@@ -119,4 +175,96 @@ class User(Base):
     name = Column(String)
     role = Column(String, default="contributor")  # contributor, company, moderator, admin
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+class TrainingSession(Base):
+    """Federated learning training session registered by a trainer"""
+    __tablename__ = "training_sessions"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(String, unique=True, index=True)  # Public session identifier
+    model_hash = Column(String)  # SHA-256 of the model architecture
+    model_architecture = Column(Text)  # Canonical JSON of the architecture
+    trainer_address = Column(String, index=True)  # Solana wallet address
+    total_rounds = Column(Integer)
+    current_round = Column(Integer, default=0)
+    min_contributors = Column(Integer, default=3)
+    reward_per_contributor = Column(Float, default=100.0)
+    accuracy_threshold = Column(Float, default=0.8)
+    status = Column(String, default="pending", index=True)  # pending, active, completed
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    # Relationships
+    rounds = relationship("TrainingRound", back_populates="session")
+    contributions = relationship("Contribution", back_populates="session")
+    checkpoints = relationship("ModelCheckpoint", back_populates="session")
+
+class TrainingRound(Base):
+    """One aggregation round of a training session"""
+    __tablename__ = "training_rounds"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(Integer, ForeignKey("training_sessions.id"), index=True)
+    round_number = Column(Integer)
+    status = Column(String, default="active")  # active, completed
+    contributors_count = Column(Integer, default=0)
+    aggregated_model_hash = Column(String)
+    accuracy = Column(Float)
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    completed_at = Column(DateTime(timezone=True))
+    
+    __table_args__ = (
+        # submit_update / aggregate_updates look rounds up by (session, number)
+        Index("ix_training_round_session_number", session_id, round_number, unique=True),
+    )
+    
+    # Relationships
+    session = relationship("TrainingSession", back_populates="rounds")
+    contributions = relationship("Contribution", back_populates="round")
+
+class Contribution(Base):
+    """Encrypted gradient update submitted by a contributor for a round"""
+    __tablename__ = "contributions"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(Integer, ForeignKey("training_sessions.id"), index=True)
+    round_id = Column(Integer, ForeignKey("training_rounds.id"), index=True)
+    contributor_address = Column(String, index=True)  # Solana wallet address
+    gradient_hash = Column(String)
+    commitment_hash = Column(String)
+    nonce = Column(String)  # Base64 commitment nonce
+    accuracy = Column(Float)
+    privacy_score = Column(Float)
+    # Raw AES-GCM payload; deferred so listings never pull it into memory
+    encrypted_gradients = deferred(Column(LargeBinary))
+    reward_amount = Column(Float, default=0.0)
+    status = Column(String, default="pending")  # pending, verified, aggregated, rewarded
+    solana_tx_hash = Column(String, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        # contributor stats / leaderboards: a contributor's rows by status
+        Index("ix_contributions_addr_status", contributor_address, status),
+        # aggregate_updates: a round's pending contributions
+        Index("ix_contributions_round_status", round_id, status),
+    )
+    
+    # Relationships
+    session = relationship("TrainingSession", back_populates="contributions")
+    round = relationship("TrainingRound", back_populates="contributions")
+
+class ModelCheckpoint(Base):
+    """Aggregated model produced at the end of a round"""
+    __tablename__ = "model_checkpoints"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(Integer, ForeignKey("training_sessions.id"), index=True)
+    round_number = Column(Integer)
+    model_hash = Column(String, index=True)
+    model_weights = deferred(Column(LargeBinary))  # Serialized weights (raw bytes)
+    accuracy = Column(Float)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    session = relationship("TrainingSession", back_populates="checkpoints")
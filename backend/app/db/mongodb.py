@@ -2,13 +2,27 @@
 MongoDB database configuration and connection
 """
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import MongoClient
+from pymongo import IndexModel, MongoClient
 from typing import Optional
 from app.core.config import settings
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Wire compression, best first; zlib is always available, the others only when installed
+WIRE_COMPRESSORS = ["zlib"]
+try:
+    import snappy  # noqa: F401
+    WIRE_COMPRESSORS.insert(0, "snappy")
+except ImportError:
+    pass
+try:
+    import zstandard  # noqa: F401
+    WIRE_COMPRESSORS.insert(0, "zstd")
+except ImportError:
+    pass
+
 class MongoDB:
     """MongoDB database connection manager"""
     
@@ -23,23 +37,32 @@ class MongoDB:
             connection_kwargs = {
                 "serverSelectionTimeoutMS": 10000,  # Increased timeout
                 "connectTimeoutMS": 10000,
+                "maxPoolSize": settings.MONGODB_MAX_POOL_SIZE,
+                "minPoolSize": settings.MONGODB_MIN_POOL_SIZE,
+                "maxIdleTimeMS": settings.MONGODB_MAX_IDLE_TIME_MS,
+                "waitQueueTimeoutMS": settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+                "retryWrites": True,
+                "compressors": WIRE_COMPRESSORS,
             }
             
+            # Settings are frozen; adjust a local copy of the URL
+            mongodb_url = settings.MONGODB_URL
+            
             # For MongoDB Atlas (mongodb+srv), add SSL requirements
-            if "mongodb+srv" in settings.MONGODB_URL or "mongodb.net" in settings.MONGODB_URL:
+            if "mongodb+srv" in mongodb_url or "mongodb.net" in mongodb_url:
                 connection_kwargs["tls"] = True
                 connection_kwargs["tlsAllowInvalidCertificates"] = False
                 # Add retry writes for Atlas
-                if "retryWrites" not in settings.MONGODB_URL:
+                if "retryWrites" not in mongodb_url:
                     # Ensure proper connection string format
-                    separator = "&" if "?" in settings.MONGODB_URL else "?"
-                    if not settings.MONGODB_URL.endswith("/"):
-                        settings.MONGODB_URL += "/"
-                    if "retryWrites" not in settings.MONGODB_URL:
-                        settings.MONGODB_URL += f"{separator}retryWrites=true&w=majority"
+                    separator = "&" if "?" in mongodb_url else "?"
+                    if not mongodb_url.endswith("/"):
+                        mongodb_url += "/"
+                    if "retryWrites" not in mongodb_url:
+                        mongodb_url += f"{separator}retryWrites=true&w=majority"
             
             cls.client = AsyncIOMotorClient(
-                settings.MONGODB_URL,
+                mongodb_url,
                 **connection_kwargs
             )
             # Test connection with longer timeout
@@ -75,38 +98,53 @@ class MongoDB:
         if cls.database is None:
             return
         
+        indexes = {
+            "challenges": [
+                IndexModel("challenge_id", unique=True),
+                IndexModel("status"),
+                IndexModel("creator_address"),
+                IndexModel("deadline"),
+            ],
+            "submissions": [
+                IndexModel("challenge_id"),
+                IndexModel("contributor_address"),
+                IndexModel("status"),
+                IndexModel([("challenge_id", 1), ("contributor_address", 1)], unique=True),
+                # Listing a challenge's open/approved submissions, newest first; rejected ones stay out of the index
+                IndexModel(
+                    [("challenge_id", 1), ("status", 1), ("submitted_at", -1)],
+                    name="idx_sub_chal_status_time",
+                    partialFilterExpression={"status": {"$in": ["pending", "approved"]}}
+                ),
+            ],
+            "evaluations": [
+                IndexModel("challenge_id"),
+                IndexModel("submission_id", unique=True),
+            ],
+            "contributor_reputations": [
+                IndexModel("contributor_address", unique=True),
+                # Leaderboard sort, with _id as a tiebreaker for stable pagination
+                IndexModel([("reputation_score", -1), ("_id", 1)], name="idx_rep_score_desc"),
+            ],
+            "rewards": [
+                IndexModel("contributor_address"),
+                IndexModel("challenge_id"),
+                IndexModel("status"),
+                IndexModel("solana_tx_hash"),
+            ],
+            "users": [
+                IndexModel("email", unique=True),
+                IndexModel("wallet_address"),
+                IndexModel("auth0_id", unique=True, sparse=True),
+            ],
+        }
+        
         try:
-            # Challenges indexes
-            await cls.database.challenges.create_index("challenge_id", unique=True)
-            await cls.database.challenges.create_index("status")
-            await cls.database.challenges.create_index("creator_address")
-            await cls.database.challenges.create_index("deadline")
-            
-            # Submissions indexes
-            await cls.database.submissions.create_index("challenge_id")
-            await cls.database.submissions.create_index("contributor_address")
-            await cls.database.submissions.create_index("status")
-            await cls.database.submissions.create_index([("challenge_id", 1), ("contributor_address", 1)], unique=True)
-            
-            # Evaluations indexes
-            await cls.database.evaluations.create_index("challenge_id")
-            await cls.database.evaluations.create_index("submission_id", unique=True)
-            
-            # Contributor reputations indexes
-            await cls.database.contributor_reputations.create_index("contributor_address", unique=True)
-            await cls.database.contributor_reputations.create_index("reputation_score")
-            
-            # Rewards indexes
-            await cls.database.rewards.create_index("contributor_address")
-            await cls.database.rewards.create_index("challenge_id")
-            await cls.database.rewards.create_index("status")
-            await cls.database.rewards.create_index("solana_tx_hash")
-            
-            # Users indexes
-            await cls.database.users.create_index("email", unique=True)
-            await cls.database.users.create_index("wallet_address")
-            await cls.database.users.create_index("auth0_id", unique=True, sparse=True)
-            
+            # One createIndexes command per collection, all collections in parallel
+            await asyncio.gather(*(
+                cls.database[name].create_indexes(models)
+                for name, models in indexes.items()
+            ))
             logger.info("MongoDB indexes created successfully")
         except Exception as e:
             logger.warning(f"Error creating indexes: {e}")
@@ -5,34 +5,40 @@ from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from bson import ObjectId
+from bson.errors import InvalidId
+from pydantic_core import core_schema
 
 class PyObjectId(ObjectId):
     """Custom ObjectId for Pydantic v2"""
+    _core_schema = None
+
     @classmethod
     def __get_pydantic_core_schema__(cls, source_type, handler):
-        from pydantic_core import core_schema
-        return core_schema.json_or_python_schema(
-            json_schema=core_schema.str_schema(),
-            python_schema=core_schema.union_schema([
-                core_schema.is_instance_schema(ObjectId),
-                core_schema.chain_schema([
-                    core_schema.str_schema(),
-                    core_schema.no_info_plain_validator_function(cls.validate),
-                ])
-            ]),
-            serialization=core_schema.plain_serializer_function_ser_schema(
-                lambda x: str(x)
-            ),
-        )
+        # Built once and shared by every model that declares a PyObjectId field
+        if cls._core_schema is None:
+            cls._core_schema = core_schema.json_or_python_schema(
+                json_schema=core_schema.str_schema(),
+                python_schema=core_schema.union_schema([
+                    core_schema.is_instance_schema(ObjectId),
+                    core_schema.chain_schema([
+                        core_schema.str_schema(),
+                        core_schema.no_info_plain_validator_function(cls.validate),
+                    ])
+                ]),
+                # Stay an ObjectId in model_dump() so references are stored as 12-byte ids
+                serialization=core_schema.plain_serializer_function_ser_schema(str, when_used="json"),
+            )
+        return cls._core_schema
     
     @classmethod
     def validate(cls, v):
         if isinstance(v, ObjectId):
             return v
         if isinstance(v, str):
-            if ObjectId.is_valid(v):
+            try:
                 return ObjectId(v)
-            raise ValueError("Invalid ObjectId string")
+            except InvalidId:
+                raise ValueError("Invalid ObjectId string")
         raise ValueError("Invalid ObjectId type")
 
 class ChallengeModel(BaseModel):
@@ -88,7 +94,7 @@ class EvaluationModel(BaseModel):
     """Evaluation document model"""
     id: Optional[PyObjectId] = Field(default_factory=PyObjectId, alias="_id")
     challenge_id: str
-    submission_id: str  # Reference to submission_id
+    submission_id: PyObjectId  # Reference to the submission's _id
     accuracy: float
     precision: float
     recall: float
@@ -126,7 +132,7 @@ class RewardModel(BaseModel):
     id: Optional[PyObjectId] = Field(default_factory=PyObjectId, alias="_id")
     contributor_address: str
     challenge_id: str
-    submission_id: Optional[str] = None
+    submission_id: Optional[PyObjectId] = None  # Reference to the submission's _id
     amount: float
     token_amount: float
     token_mint: Optional[str] = None
@@ -1,15 +1,39 @@
 """
 MongoDB Repository - Data access layer for MongoDB
 """
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
+import time
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
 from app.db.mongodb_models import (
     ChallengeModel, SubmissionModel, EvaluationModel,
     ContributorReputationModel, RewardModel, UserModel
 )
 
+# reputation_score = (total_approved * 10) - (total_rejected * 2) + (total_rewards * 0.1)
+REPUTATION_SCORE_EXPR = {
+    "$add": [
+        {"$multiply": [{"$ifNull": ["$total_approved", 0]}, 10]},
+        {"$multiply": [{"$ifNull": ["$total_rejected", 0]}, -2]},
+        {"$multiply": [{"$ifNull": ["$total_rewards", 0]}, 0.1]}
+    ]
+}
+
+def _floored_now() -> datetime:
+    """Current UTC time truncated to the second, so repeat requests within a
+    second send identical deadline filters"""
+    return datetime.utcfromtimestamp(int(time.time()))
+
+# (status, second) -> active challenge count; repositories are built per request,
+# so this lives at module level. Only the current second is kept.
+_challenge_count_cache: Dict[Tuple[Optional[str], datetime], int] = {}
+
+# Default projections for list reads; pass projection=None for whole documents
+CHALLENGE_LIST_PROJECTION = {"description": 0}
+EVALUATION_SUMMARY_PROJECTION = {"evaluation_metrics": 0, "evaluation_report": 0}
+
 class ChallengeRepository:
     """Repository for Challenge operations"""
     
@@ -18,34 +42,84 @@ class ChallengeRepository:
     
     async def create(self, challenge: ChallengeModel) -> ChallengeModel:
         """Create a new challenge"""
-        challenge_dict = challenge.dict(by_alias=True, exclude={"id"})
+        challenge_dict = challenge.model_dump(by_alias=True, exclude={"id"})
         result = await self.collection.insert_one(challenge_dict)
         challenge.id = result.inserted_id
         return challenge
     
-    async def get_by_id(self, challenge_id: str) -> Optional[Dict]:
+    async def get_by_id(self, challenge_id: str, projection: Optional[Dict] = None) -> Optional[Dict]:
         """Get challenge by challenge_id"""
-        return await self.collection.find_one({"challenge_id": challenge_id})
+        return await self.collection.find_one({"challenge_id": challenge_id}, projection)
     
-    async def list(self, status: Optional[str] = None, skip: int = 0, limit: int = 100) -> List[Dict]:
+    async def list(self, status: Optional[str] = None, skip: int = 0, limit: int = 100,
+                   projection: Optional[Dict] = CHALLENGE_LIST_PROJECTION) -> List[Dict]:
         """List challenges with optional status filter"""
         query = {}
         if status:
             query["status"] = status
         
         # Filter out expired challenges
-        query["deadline"] = {"$gt": datetime.utcnow()}
+        query["deadline"] = {"$gt": _floored_now()}
         
-        cursor = self.collection.find(query).sort("created_at", -1).skip(skip).limit(limit)
+        cursor = self.collection.find(query, projection).sort("created_at", -1).skip(skip).limit(limit)
         return await cursor.to_list(length=limit)
     
+    async def list_with_counts(self, status: Optional[str] = None, skip: int = 0, limit: int = 100,
+                               projection: Optional[Dict] = CHALLENGE_LIST_PROJECTION) -> List[Dict]:
+        """List challenges like list(), with submission counts joined in the same round trip.
+
+        total_submissions / approved_submissions are taken from the submissions
+        collection, and submission_counts holds the count for every status.
+        """
+        query = {}
+        if status:
+            query["status"] = status
+        query["deadline"] = {"$gt": _floored_now()}
+        
+        pipeline = [
+            {"$match": query},
+            {"$sort": {"created_at": -1}},
+            {"$skip": skip},
+            {"$limit": limit},
+            *([{"$project": projection}] if projection else []),
+            {"$lookup": {
+                "from": "submissions",
+                "let": {"challenge_id": "$challenge_id"},
+                "pipeline": [
+                    {"$match": {"$expr": {"$eq": ["$challenge_id", "$$challenge_id"]}}},
+                    {"$group": {"_id": "$status", "n": {"$sum": 1}}}
+                ],
+                "as": "_subs"
+            }},
+            {"$set": {
+                "submission_counts": {"$arrayToObject": {
+                    "$map": {"input": "$_subs", "in": {"k": "$$this._id", "v": "$$this.n"}}
+                }},
+                "total_submissions": {"$sum": "$_subs.n"}
+            }},
+            {"$set": {
+                "approved_submissions": {"$ifNull": ["$submission_counts.approved", 0]}
+            }},
+            {"$unset": "_subs"}
+        ]
+        return await self.collection.aggregate(pipeline).to_list(length=limit)
+    
     async def count(self, status: Optional[str] = None) -> int:
-        """Count challenges"""
+        """Count challenges; repeat calls within the same second reuse the result"""
+        now = _floored_now()
+        key = (status, now)
+        if key in _challenge_count_cache:
+            return _challenge_count_cache[key]
+        
         query = {}
         if status:
             query["status"] = status
-        query["deadline"] = {"$gt": datetime.utcnow()}
-        return await self.collection.count_documents(query)
+        query["deadline"] = {"$gt": now}
+        total = await self.collection.count_documents(query)
+        for stale in [k for k in _challenge_count_cache if k[1] != now]:
+            _challenge_count_cache.pop(stale, None)
+        _challenge_count_cache[key] = total
+        return total
     
     async def update(self, challenge_id: str, update_data: Dict) -> bool:
         """Update challenge"""
@@ -57,28 +131,42 @@ class ChallengeRepository:
         return result.modified_count > 0
 
 class SubmissionRepository:
-    """Repository for Submission operations"""
+    """Repository for Submission operations.
+
+    Keeps the parent challenge's total_submissions / approved_submissions
+    counters current with $inc on every write, so readers never recount.
+    """
     
     def __init__(self, db: AsyncIOMotorDatabase):
         self.collection = db.submissions
+        self.challenges = db.challenges
     
     async def create(self, submission: SubmissionModel) -> SubmissionModel:
         """Create a new submission"""
-        submission_dict = submission.dict(by_alias=True, exclude={"id"})
+        submission_dict = submission.model_dump(by_alias=True, exclude={"id"})
         result = await self.collection.insert_one(submission_dict)
         submission.id = result.inserted_id
+        
+        counters = {"total_submissions": 1}
+        if submission.status == "approved":
+            counters["approved_submissions"] = 1
+        await self.challenges.update_one(
+            {"challenge_id": submission.challenge_id},
+            {"$inc": counters}
+        )
         return submission
     
-    async def get_by_id(self, submission_id: str) -> Optional[Dict]:
+    async def get_by_id(self, submission_id: str, projection: Optional[Dict] = None) -> Optional[Dict]:
         """Get submission by ObjectId"""
         if ObjectId.is_valid(submission_id):
-            return await self.collection.find_one({"_id": ObjectId(submission_id)})
+            return await self.collection.find_one({"_id": ObjectId(submission_id)}, projection)
         return None
     
     async def list(self, challenge_id: Optional[str] = None, 
                    contributor_address: Optional[str] = None,
                    status: Optional[str] = None,
-                   skip: int = 0, limit: int = 100) -> List[Dict]:
+                   skip: int = 0, limit: int = 100,
+                   projection: Optional[Dict] = None) -> List[Dict]:
         """List submissions with filters"""
         query = {}
         if challenge_id:
@@ -88,18 +176,32 @@ class SubmissionRepository:
         if status:
             query["status"] = status
         
-        cursor = self.collection.find(query).sort("submitted_at", -1).skip(skip).limit(limit)
+        cursor = self.collection.find(query, projection).sort("submitted_at", -1).skip(skip).limit(limit)
         return await cursor.to_list(length=limit)
     
     async def update(self, submission_id: str, update_data: Dict) -> bool:
         """Update submission"""
-        if ObjectId.is_valid(submission_id):
-            result = await self.collection.update_one(
-                {"_id": ObjectId(submission_id)},
-                {"$set": update_data}
+        if not ObjectId.is_valid(submission_id):
+            return False
+        
+        # The pre-update document tells us whether the status moved into or out of approved
+        previous = await self.collection.find_one_and_update(
+            {"_id": ObjectId(submission_id)},
+            {"$set": update_data},
+            projection={"challenge_id": 1, "status": 1},
+            return_document=ReturnDocument.BEFORE
+        )
+        if previous is None:
+            return False
+        
+        new_status = update_data.get("status", previous.get("status"))
+        was_approved = previous.get("status") == "approved"
+        if was_approved != (new_status == "approved"):
+            await self.challenges.update_one(
+                {"challenge_id": previous["challenge_id"]},
+                {"$inc": {"approved_submissions": -1 if was_approved else 1}}
             )
-            return result.modified_count > 0
-        return False
+        return True
 
 class EvaluationRepository:
     """Repository for Evaluation operations"""
@@ -109,14 +211,20 @@ class EvaluationRepository:
     
     async def create(self, evaluation: EvaluationModel) -> EvaluationModel:
         """Create a new evaluation"""
-        evaluation_dict = evaluation.dict(by_alias=True, exclude={"id"})
+        evaluation_dict = evaluation.model_dump(by_alias=True, exclude={"id"})
         result = await self.collection.insert_one(evaluation_dict)
         evaluation.id = result.inserted_id
         return evaluation
     
-    async def get_by_submission_id(self, submission_id: str) -> Optional[Dict]:
+    async def get_by_submission_id(self, submission_id: str, projection: Optional[Dict] = None) -> Optional[Dict]:
         """Get evaluation by submission_id"""
-        return await self.collection.find_one({"submission_id": submission_id})
+        if not ObjectId.is_valid(submission_id):
+            return None
+        # Older evaluations stored the reference as a hex string
+        return await self.collection.find_one(
+            {"submission_id": {"$in": [ObjectId(submission_id), submission_id]}},
+            projection
+        )
 
 class ContributorReputationRepository:
     """Repository for Contributor Reputation operations"""
@@ -142,33 +250,52 @@ class ContributorReputationRepository:
         return reputation
     
     async def update(self, contributor_address: str, update_data: Dict) -> bool:
-        """Update contributor reputation"""
+        """Update contributor reputation, recomputing reputation_score in the same write"""
         update_data["updated_at"] = datetime.utcnow()
+        # Pipeline update: apply the new values, then derive the score from them.
+        # $literal keeps string values from being read as field paths.
         result = await self.collection.update_one(
             {"contributor_address": contributor_address},
-            {"$set": update_data}
+            [
+                {"$set": {key: {"$literal": value} for key, value in update_data.items()}},
+                {"$set": {"reputation_score": REPUTATION_SCORE_EXPR}}
+            ]
         )
         return result.modified_count > 0
     
+    async def bulk_update(self, ops: List[Tuple[Dict, Dict]]) -> int:
+        """Apply many (filter, update_data) pairs in one unordered bulk_write; scores are recomputed as in update()"""
+        if not ops:
+            return 0
+        now = datetime.utcnow()
+        requests = [
+            UpdateOne(query, [
+                {"$set": {key: {"$literal": value} for key, value in {**update_data, "updated_at": now}.items()}},
+                {"$set": {"reputation_score": REPUTATION_SCORE_EXPR}}
+            ])
+            for query, update_data in ops
+        ]
+        result = await self.collection.bulk_write(requests, ordered=False)
+        return result.modified_count
+    
+    async def recompute_scores(self) -> int:
+        """Rewrite every stored reputation_score server-side (for documents written before scores were maintained)"""
+        result = await self.collection.update_many(
+            {},
+            [{"$set": {"reputation_score": REPUTATION_SCORE_EXPR}}]
+        )
+        return result.modified_count
+    
     async def get_leaderboard(self, skip: int = 0, limit: int = 100) -> List[Dict]:
-        """Get leaderboard sorted by reputation score"""
-        # Calculate reputation score for all
-        async for rep in self.collection.find({}):
-            score = (rep.get("total_approved", 0) * 10) - (rep.get("total_rejected", 0) * 2) + (rep.get("total_rewards", 0) * 0.1)
-            await self.collection.update_one(
-                {"_id": rep["_id"]},
-                {"$set": {"reputation_score": score}}
-            )
-        
-        cursor = self.collection.find({}).sort("reputation_score", -1).skip(skip).limit(limit)
+        """Get leaderboard sorted by reputation score.
+
+        Scores are kept current by update(), so this is a single read; ranks
+        come from the page position and are not written back.
+        """
+        cursor = self.collection.find({}).sort([("reputation_score", -1), ("_id", 1)]).skip(skip).limit(limit)
         results = await cursor.to_list(length=limit)
         
-        # Update ranks
         for idx, rep in enumerate(results, start=skip + 1):
-            await self.collection.update_one(
-                {"_id": rep["_id"]},
-                {"$set": {"rank": idx}}
-            )
             rep["rank"] = idx
         
         return results
@@ -181,8 +308,19 @@ class RewardRepository:
     
     async def create(self, reward: RewardModel) -> RewardModel:
         """Create a new reward"""
-        reward_dict = reward.dict(by_alias=True, exclude={"id"})
+        reward_dict = reward.model_dump(by_alias=True, exclude={"id"})
         result = await self.collection.insert_one(reward_dict)
         reward.id = result.inserted_id
         return reward
-
+    
+    async def bulk_update(self, ops: List[Tuple[Dict, Dict]]) -> int:
+        """Apply many (filter, update_data) pairs in one unordered bulk_write"""
+        if not ops:
+            return 0
+        now = datetime.utcnow()
+        requests = [
+            UpdateOne(query, {"$set": {**update_data, "updated_at": now}})
+            for query, update_data in ops
+        ]
+        result = await self.collection.bulk_write(requests, ordered=False)
+        return result.modified_count
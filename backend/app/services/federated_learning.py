@@ -1,15 +1,18 @@
 """
 Federated Learning Service - Model aggregation and coordination
 """
+import asyncio
 import numpy as np
-import json
-import hashlib
 import base64
-import pickle
-from typing import List, Dict
+import logging
+import struct
+from typing import List, Dict, Optional, Tuple
 from app.db.models import Contribution, TrainingSession
+from app.core.hashing import hash_chunks
 from app.core.security import EncryptionService, CommitmentHash
 
+logger = logging.getLogger(__name__)
+
 class FederatedLearningService:
     """Handle federated learning operations"""
     
@@ -27,39 +30,18 @@ class FederatedLearningService:
         if not contributions:
             raise ValueError("No contributions to aggregate")
         
-        # Decrypt and deserialize gradients
+        # Decrypt and verify contributions in worker threads; AES-GCM and SHA-256
+        # release the GIL, so large rounds use every core
+        results = await asyncio.gather(*(
+            asyncio.to_thread(self._verify_contribution, contribution, session.accuracy_threshold)
+            for contribution in contributions
+        ))
         gradients_list = []
         weights = []
-        
-        for contribution in contributions:
-            try:
-                # Verify commitment hash
-                encrypted_grads = base64.b64decode(contribution.encrypted_gradients)
-                decrypted = self.encryption_service.decrypt_gradients(encrypted_grads)
-                
-                # Verify commitment
-                commitment, nonce_bytes = CommitmentHash.generate_commitment(
-                    decrypted,
-                    base64.b64decode(contribution.nonce)
-                )
-                
-                if commitment != contribution.commitment_hash:
-                    print(f"Commitment verification failed for {contribution.contributor_address}")
-                    continue
-                
-                # Filter by accuracy threshold
-                if contribution.accuracy < session.accuracy_threshold:
-                    print(f"Accuracy below threshold for {contribution.contributor_address}")
-                    continue
-                
-                gradients_list.append(decrypted)
-                # Weight by accuracy and privacy score
-                weight = contribution.accuracy * contribution.privacy_score
-                weights.append(weight)
-                
-            except Exception as e:
-                print(f"Error processing contribution {contribution.id}: {e}")
-                continue
+        for result in results:
+            if result is not None:
+                gradients_list.append(result[0])
+                weights.append(result[1])
         
         if not gradients_list:
             raise ValueError("No valid contributions after filtering")
@@ -76,8 +58,7 @@ class FederatedLearningService:
         aggregated_accuracy = np.mean(accuracies) if accuracies else 0.0
         
         # Create model hash
-        model_str = json.dumps([g.tolist() if isinstance(g, np.ndarray) else str(g) for g in aggregated_gradients])
-        model_hash = hashlib.sha256(model_str.encode()).hexdigest()
+        model_hash = hash_chunks(self._model_buffer_chunks(aggregated_gradients))
         
         # Mark contributions as aggregated
         for contribution in contributions:
@@ -91,6 +72,51 @@ class FederatedLearningService:
             "aggregated_gradients": aggregated_gradients
         }
     
+    def _verify_contribution(
+        self,
+        contribution: Contribution,
+        accuracy_threshold: float
+    ) -> Optional[Tuple[List[np.ndarray], float]]:
+        """Decrypt one contribution and check its commitment.
+
+        Returns (gradients, weight), or None if the contribution is below the
+        accuracy threshold, fails verification or cannot be decrypted.
+        """
+        try:
+            # Filter by accuracy threshold
+            if contribution.accuracy < accuracy_threshold:
+                logger.warning(f"Accuracy below threshold for {contribution.contributor_address}")
+                return None
+            
+            decrypted = self.encryption_service.decrypt_gradients(contribution.encrypted_gradients)
+            
+            # Verify commitment
+            commitment, _ = CommitmentHash.generate_commitment(
+                decrypted,
+                base64.b64decode(contribution.nonce)
+            )
+            if commitment != contribution.commitment_hash:
+                logger.warning(f"Commitment verification failed for {contribution.contributor_address}")
+                return None
+            
+            # Weight by accuracy and privacy score
+            return decrypted, contribution.accuracy * contribution.privacy_score
+        except Exception as e:
+            logger.error(f"Error processing contribution {contribution.id}: {e}")
+            return None
+    
+    @staticmethod
+    def _model_buffer_chunks(gradients: List[np.ndarray]):
+        """Yield each layer's dtype/shape header and then its raw buffer.
+
+        Uses the same per-array layout as CommitmentHash, so hashing never
+        boxes floats into Python lists or builds a JSON text copy.
+        """
+        for grad in gradients:
+            arr = np.asarray(grad, order="C")
+            yield struct.pack(f"<4sI{arr.ndim}Q", arr.dtype.str.encode(), arr.ndim, *arr.shape)
+            yield arr
+    
     def _federated_average(
         self,
         gradients_list: List[List[np.ndarray]],
@@ -100,17 +126,31 @@ class FederatedLearningService:
         if not gradients_list:
             raise ValueError("Empty gradients list")
         
-        # Initialize aggregated gradients
         num_layers = len(gradients_list[0])
-        aggregated = [np.zeros_like(grad) for grad in gradients_list[0]]
+        if any(len(gradients) != num_layers for gradients in gradients_list):
+            raise ValueError("Contributions have different numbers of layers")
         
-        # Weighted average
-        for idx, gradients in enumerate(gradients_list):
-            weight = weights[idx]
-            for layer_idx, grad in enumerate(gradients):
-                aggregated[layer_idx] += weight * grad
-        
-        return aggregated
+        # Layer-major: stack each layer across clients and take one weighted sum
+        # (a BLAS dot product) instead of a temporary per client per layer
+        return [
+            self._weighted_sum(np.stack(layers), weights)
+            for layers in zip(*gradients_list)
+        ]
+    
+    @staticmethod
+    def _weighted_sum(stacked: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """sum_i weights[i] * stacked[i], returned in the stacked gradients' dtype.
+
+        Half-precision layers are accumulated in float32: it keeps rounding
+        error from piling up across clients, and BLAS has no float16 kernel.
+        """
+        accumulate = np.float32 if stacked.dtype == np.float16 else stacked.dtype
+        total = np.tensordot(
+            weights.astype(accumulate, copy=False),
+            stacked.astype(accumulate, copy=False),
+            axes=1
+        )
+        return total.astype(stacked.dtype, copy=False)
     
     def validate_gradients(
         self,
@@ -124,7 +164,7 @@ class FederatedLearningService:
             commitment, _ = CommitmentHash.generate_commitment(gradients, nonce_bytes)
             return commitment == commitment_hash
         except Exception as e:
-            print(f"Validation error: {e}")
+            logger.warning(f"Validation error: {e}")
             return False
     
     def calculate_model_accuracy(
@@ -138,3 +178,10 @@ class FederatedLearningService:
         # For now, return a mock accuracy
         return 0.85
 
+
+# Singleton instance
+federated_learning_service = FederatedLearningService()
+
+def get_federated_learning_service() -> FederatedLearningService:
+    """Dependency returning the shared FederatedLearningService and its encryption key"""
+    return federated_learning_service
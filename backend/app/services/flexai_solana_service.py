@@ -1,8 +1,8 @@
 """
 FlexAI Solana Service - Blockchain Integration for Challenge Marketplace
 """
-from solana.rpc.api import Client
-from solana.rpc.commitment import Confirmed, Finalized
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Confirmed
 from solana.rpc.types import TxOpts
 from solders.keypair import Keypair
 from solders.pubkey import Pubkey
@@ -13,33 +13,56 @@ from solders.transaction import Transaction
 from solders.message import Message
 from solders.instruction import Instruction, AccountMeta
 from solders.signature import Signature
+from solders.hash import Hash
+from solders.transaction_status import TransactionConfirmationStatus
 try:
     from anchorpy import Wallet
 except ImportError:
     Wallet = None
 import base58
 import hashlib
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Tuple
 import asyncio
+import struct
+import time
 from datetime import datetime
 from app.core.config import settings
+from app.core.pubkeys import parse_pubkey
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Finalization polling: first retry after 200ms, growing 1.5x per poll up to 2s
+CONFIRM_INITIAL_DELAY_SECONDS = 0.2
+CONFIRM_BACKOFF = 1.5
+CONFIRM_MAX_DELAY_SECONDS = 2.0
+CONFIRM_TIMEOUT_SECONDS = 60
+
+# Instruction data layouts: name tag, then little-endian fields
+# create_challenge: challenge id hash, reward (u64), deadline (i64), baseline accuracy x1000 (u16), bump (u8)
+CREATE_CHALLENGE_DATA = struct.Struct("<16s32sQqHB")
+# submit_model: model hash, accuracy x1000 (u16), metadata hash, bump (u8)
+SUBMIT_MODEL_DATA = struct.Struct("<12s32sH32sB")
+# approve_model: reward vault, challenge and reputation bumps (u8 each)
+APPROVE_MODEL_DATA = struct.Struct("<13sBBB")
+
 class FlexAISolanaService:
     """Handle Solana blockchain interactions for FlexAI marketplace"""
     
     def __init__(self):
         self.rpc_url = settings.SOLANA_RPC_URL
-        self.client = Client(self.rpc_url, commitment=Confirmed)
+        self.client = AsyncClient(self.rpc_url, commitment=Confirmed)
         # Try to parse PROGRAM_ID, but handle invalid ones gracefully
         try:
-            self.program_id = Pubkey.from_string(settings.PROGRAM_ID) if settings.PROGRAM_ID and len(settings.PROGRAM_ID) > 10 else None
+            self.program_id = parse_pubkey(settings.PROGRAM_ID) if settings.PROGRAM_ID and len(settings.PROGRAM_ID) > 10 else None
         except (ValueError, Exception):
             self.program_id = None
             logger.warning(f"Invalid PROGRAM_ID '{settings.PROGRAM_ID}', using fallback mode")
         
+        # (blockhash, monotonic expiry) shared by every program transaction
+        self._blockhash: Optional[Tuple[Hash, float]] = None
+        self._blockhash_lock: Optional[asyncio.Lock] = None
+        
         # Load keypair for signing transactions
         self.keypair = None
         self.wallet = None
@@ -73,7 +96,7 @@ class FlexAISolanaService:
                 logger.warning("PROGRAM_ID not configured. Using fallback transaction.")
                 return await self._fallback_challenge_transaction(creator_address)
             
-            creator_pubkey = Pubkey.from_string(creator_address)
+            creator_pubkey = parse_pubkey(creator_address)
             
             # Generate challenge ID bytes
             challenge_id_bytes = self._hash_string(challenge_id)[:32]
@@ -107,7 +130,7 @@ class FlexAISolanaService:
             )
             
             # Create and send transaction
-            recent_blockhash = self.client.get_latest_blockhash().value.blockhash
+            recent_blockhash = await self._recent_blockhash()
             message = Message.new_with_blockhash(
                 [instruction],
                 creator_pubkey,
@@ -125,7 +148,7 @@ class FlexAISolanaService:
                 raise ValueError("Keypair required for server-side signing")
             
             opts = TxOpts(skip_preflight=False, preflight_commitment=Confirmed)
-            result = self.client.send_transaction(transaction, opts=opts)
+            result = await self.client.send_transaction(transaction, opts=opts)
             
             if result.value:
                 tx_signature = str(result.value)
@@ -153,7 +176,7 @@ class FlexAISolanaService:
                 logger.warning("PROGRAM_ID not configured. Using fallback transaction.")
                 return await self._fallback_submission_transaction(contributor_address)
             
-            contributor_pubkey = Pubkey.from_string(contributor_address)
+            contributor_pubkey = parse_pubkey(contributor_address)
             challenge_id_bytes = self._hash_string(challenge_id)[:32]
             
             # Find PDAs
@@ -189,7 +212,7 @@ class FlexAISolanaService:
             )
             
             # Create and send transaction
-            recent_blockhash = self.client.get_latest_blockhash().value.blockhash
+            recent_blockhash = await self._recent_blockhash()
             message = Message.new_with_blockhash(
                 [instruction],
                 contributor_pubkey,
@@ -203,7 +226,7 @@ class FlexAISolanaService:
                 raise ValueError("Keypair required for server-side signing")
             
             opts = TxOpts(skip_preflight=False, preflight_commitment=Confirmed)
-            result = self.client.send_transaction(transaction, opts=opts)
+            result = await self.client.send_transaction(transaction, opts=opts)
             
             if result.value:
                 tx_signature = str(result.value)
@@ -229,7 +252,7 @@ class FlexAISolanaService:
                 logger.warning("PROGRAM_ID not configured. Using fallback transaction.")
                 return await self._fallback_reward_transaction(contributor_address, reward_amount)
             
-            contributor_pubkey = Pubkey.from_string(contributor_address)
+            contributor_pubkey = parse_pubkey(contributor_address)
             challenge_id_bytes = self._hash_string(challenge_id)[:32]
             
             # Find PDAs
@@ -267,7 +290,7 @@ class FlexAISolanaService:
             )
             
             # Create and send transaction
-            recent_blockhash = self.client.get_latest_blockhash().value.blockhash
+            recent_blockhash = await self._recent_blockhash()
             authority_pubkey = self.keypair.pubkey() if self.keypair else Pubkey.default()
             message = Message.new_with_blockhash(
                 [instruction],
@@ -282,7 +305,7 @@ class FlexAISolanaService:
                 raise ValueError("Keypair required for server-side signing")
             
             opts = TxOpts(skip_preflight=False, preflight_commitment=Confirmed)
-            result = self.client.send_transaction(transaction, opts=opts)
+            result = await self.client.send_transaction(transaction, opts=opts)
             
             if result.value:
                 tx_signature = str(result.value)
@@ -299,8 +322,8 @@ class FlexAISolanaService:
     async def get_wallet_balance(self, address: str) -> float:
         """Get SOL balance for a wallet"""
         try:
-            pubkey = Pubkey.from_string(address)
-            response = self.client.get_balance(pubkey, commitment=Confirmed)
+            pubkey = parse_pubkey(address)
+            response = await self.client.get_balance(pubkey, commitment=Confirmed)
             if response.value is not None:
                 return response.value / 1e9
             return 0.0
@@ -312,7 +335,7 @@ class FlexAISolanaService:
         """Get transaction details from Solana"""
         try:
             signature = Signature.from_string(tx_hash)
-            response = self.client.get_transaction(
+            response = await self.client.get_transaction(
                 signature,
                 commitment=Confirmed,
                 max_supported_transaction_version=0
@@ -332,21 +355,52 @@ class FlexAISolanaService:
             logger.error(f"Error getting transaction: {e}")
             raise
     
-    async def _confirm_transaction(self, signature: str, max_retries: int = 30) -> bool:
-        """Confirm transaction with retries"""
+    async def _confirm_transaction(self, signature: str) -> bool:
+        """Wait until a transaction is finalized; False if it fails or never gets there.
+
+        Polls getSignatureStatuses with exponential backoff, so a fast
+        finalization is noticed quickly and a slow one costs few requests.
+        """
         try:
             sig = Signature.from_string(signature)
-            for i in range(max_retries):
-                response = self.client.confirm_transaction(sig, commitment=Finalized)
-                if response.value:
-                    if response.value[0].confirmation_status == "finalized":
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + CONFIRM_TIMEOUT_SECONDS
+            delay = CONFIRM_INITIAL_DELAY_SECONDS
+            while True:
+                status = (await self.client.get_signature_statuses([sig])).value[0]
+                if status is not None:
+                    if status.err is not None:
+                        logger.warning(f"Transaction {signature} failed: {status.err}")
+                        return False
+                    if status.confirmation_status == TransactionConfirmationStatus.Finalized:
                         return True
-                await asyncio.sleep(1)
-            return False
+                if loop.time() + delay > deadline:
+                    return False
+                await asyncio.sleep(delay)
+                delay = min(delay * CONFIRM_BACKOFF, CONFIRM_MAX_DELAY_SECONDS)
         except Exception as e:
             logger.error(f"Error confirming transaction: {e}")
             return False
     
+    async def _recent_blockhash(self) -> Hash:
+        """Latest blockhash, fetched at most once per SOLANA_BLOCKHASH_TTL_SECONDS.
+
+        Program instructions carry per-challenge/submission data, so reusing a
+        blockhash cannot make two of their transactions identical. The fallback
+        transfers can repeat exactly and fetch their own blockhash instead.
+        """
+        if self._blockhash_lock is None:
+            self._blockhash_lock = asyncio.Lock()
+        async with self._blockhash_lock:
+            if self._blockhash is None or self._blockhash[1] <= time.monotonic():
+                blockhash = (await self.client.get_latest_blockhash()).value.blockhash
+                self._blockhash = (blockhash, time.monotonic() + settings.SOLANA_BLOCKHASH_TTL_SECONDS)
+            return self._blockhash[0]
+    
+    async def close(self):
+        """Close the RPC client and its HTTP connection pool"""
+        await self.client.close()
+    
     def _hash_string(self, s: str) -> bytes:
         """Hash a string to bytes"""
         return hashlib.sha256(s.encode()).digest()
@@ -370,18 +424,19 @@ class FlexAISolanaService:
             AccountMeta(pubkey=SYSTEM_PROGRAM_ID, is_signer=False, is_writable=False),
         ]
         
-        data = bytearray()
-        data.extend(b"create_challenge")
-        data.extend(challenge_id_bytes[:32])
-        data.extend(reward_amount.to_bytes(8, 'little'))
-        data.extend(deadline.to_bytes(8, 'little', signed=True))
-        data.extend(baseline_accuracy.to_bytes(2, 'little'))
-        data.extend(challenge_bump.to_bytes(1, 'little'))
+        data = CREATE_CHALLENGE_DATA.pack(
+            b"create_challenge",
+            challenge_id_bytes[:32],
+            reward_amount,
+            deadline,
+            baseline_accuracy,
+            challenge_bump
+        )
         
         return Instruction(
             program_id=self.program_id,
             accounts=accounts,
-            data=bytes(data)
+            data=data
         )
     
     def _build_submit_model_instruction(
@@ -402,17 +457,18 @@ class FlexAISolanaService:
             AccountMeta(pubkey=SYSTEM_PROGRAM_ID, is_signer=False, is_writable=False),
         ]
         
-        data = bytearray()
-        data.extend(b"submit_model")
-        data.extend(model_hash_bytes[:32])
-        data.extend(accuracy.to_bytes(2, 'little'))
-        data.extend(metadata_hash_bytes[:32])
-        data.extend(submission_bump.to_bytes(1, 'little'))
+        data = SUBMIT_MODEL_DATA.pack(
+            b"submit_model",
+            model_hash_bytes[:32],
+            accuracy,
+            metadata_hash_bytes[:32],
+            submission_bump
+        )
         
         return Instruction(
             program_id=self.program_id,
             accounts=accounts,
-            data=bytes(data)
+            data=data
         )
     
     def _build_approve_model_instruction(
@@ -439,16 +495,17 @@ class FlexAISolanaService:
             AccountMeta(pubkey=SYSTEM_PROGRAM_ID, is_signer=False, is_writable=False),
         ]
         
-        data = bytearray()
-        data.extend(b"approve_model")
-        data.extend(reward_vault_bump.to_bytes(1, 'little'))
-        data.extend(challenge_bump.to_bytes(1, 'little'))
-        data.extend(reputation_bump.to_bytes(1, 'little'))
+        data = APPROVE_MODEL_DATA.pack(
+            b"approve_model",
+            reward_vault_bump,
+            challenge_bump,
+            reputation_bump
+        )
         
         return Instruction(
             program_id=self.program_id,
             accounts=accounts,
-            data=bytes(data)
+            data=data
         )
     
     async def _fallback_challenge_transaction(self, creator_address: str) -> str:
@@ -456,8 +513,8 @@ class FlexAISolanaService:
         if not self.keypair:
             raise ValueError("Keypair required for transactions")
         
-        creator_pubkey = Pubkey.from_string(creator_address)
-        recent_blockhash = self.client.get_latest_blockhash().value.blockhash
+        creator_pubkey = parse_pubkey(creator_address)
+        recent_blockhash = (await self.client.get_latest_blockhash()).value.blockhash
         
         transfer_ix = transfer(
             TransferParams(
@@ -472,7 +529,7 @@ class FlexAISolanaService:
         transaction.sign([self.keypair], recent_blockhash)
         
         opts = TxOpts(skip_preflight=False, preflight_commitment=Confirmed)
-        result = self.client.send_transaction(transaction, opts=opts)
+        result = await self.client.send_transaction(transaction, opts=opts)
         
         if result.value:
             tx_signature = str(result.value)
@@ -489,9 +546,9 @@ class FlexAISolanaService:
         if not self.keypair:
             raise ValueError("Keypair required for transactions")
         
-        contributor_pubkey = Pubkey.from_string(contributor_address)
+        contributor_pubkey = parse_pubkey(contributor_address)
         reward_lamports = int(reward_amount * 1e9)
-        recent_blockhash = self.client.get_latest_blockhash().value.blockhash
+        recent_blockhash = (await self.client.get_latest_blockhash()).value.blockhash
         
         transfer_ix = transfer(
             TransferParams(
@@ -506,7 +563,7 @@ class FlexAISolanaService:
         transaction.sign([self.keypair], recent_blockhash)
         
         opts = TxOpts(skip_preflight=False, preflight_commitment=Confirmed)
-        result = self.client.send_transaction(transaction, opts=opts)
+        result = await self.client.send_transaction(transaction, opts=opts)
         
         if result.value:
             tx_signature = str(result.value)
@@ -1,7 +1,6 @@
 """
 Gemini API Service for Model Evaluation
 """
-import google.generativeai as genai
 import json
 import logging
 from typing import Dict, Optional
@@ -13,9 +12,11 @@ class GeminiService:
     """Handle Gemini API integration for model evaluation"""
     
     def __init__(self):
-        if settings.GEMINI_API_KEY:
-            genai.configure(api_key=settings.GEMINI_API_KEY)
-            self.model = genai.GenerativeModel(settings.GEMINI_MODEL)
+        if settings.gemini.API_KEY:
+            # Imported only when configured; the client pulls in grpc/protobuf
+            import google.generativeai as genai
+            genai.configure(api_key=settings.gemini.API_KEY)
+            self.model = genai.GenerativeModel(settings.gemini.MODEL)
         else:
             logger.warning("Gemini API key not configured. Using mock evaluation.")
             self.model = None
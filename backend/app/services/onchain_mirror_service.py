@@ -0,0 +1,75 @@
+"""
+On-chain Mirror Service - Periodically copies on-chain reward accounts into SQL
+"""
+import asyncio
+import logging
+from typing import Dict, List
+
+from sqlalchemy import delete
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.db.locks import ONCHAIN_MIRROR_LOCK_KEY, LeaderLock
+from app.db.models import OnchainReward
+from app.services.solana_service import solana_service
+
+logger = logging.getLogger(__name__)
+
+class OnchainMirrorService:
+    """Keep the onchain_rewards table in step with the program's reward accounts.
+
+    Only the worker holding the mirror advisory lock syncs, so two workers can
+    never interleave their DELETE + INSERT snapshots and duplicate rows.
+    """
+
+    def __init__(self):
+        self._leader = LeaderLock(ONCHAIN_MIRROR_LOCK_KEY)
+
+    def replace_rewards(self, rewards: List[Dict]) -> int:
+        """Swap the mirrored snapshot for a fresh one in a single transaction"""
+        db = SessionLocal()
+        try:
+            rows = [
+                {
+                    "contributor_address": reward.get("contributor"),
+                    "session_address": reward.get("session"),
+                    "amount": reward.get("amount", 0)
+                }
+                for reward in rewards
+                if reward.get("contributor")
+            ]
+            db.execute(delete(OnchainReward))
+            db.bulk_insert_mappings(OnchainReward, rows)
+            db.commit()
+            return len(rows)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def sync_rewards(self) -> int:
+        """Fetch reward accounts from chain and mirror them"""
+        if not solana_service.is_configured:
+            return 0
+        rewards = await solana_service.get_rewards_onchain()
+        return await asyncio.to_thread(self.replace_rewards, rewards)
+
+    async def run_periodic(self):
+        """Mirror on-chain rewards every ONCHAIN_MIRROR_INTERVAL_SECONDS until cancelled.
+
+        Workers that are not the leader just retry for the lock each interval.
+        """
+        try:
+            while True:
+                try:
+                    if await asyncio.to_thread(self._leader.try_acquire):
+                        await self.sync_rewards()
+                except Exception as e:
+                    logger.error(f"Error mirroring on-chain rewards: {e}")
+                await asyncio.sleep(settings.ONCHAIN_MIRROR_INTERVAL_SECONDS)
+        finally:
+            self._leader.release()
+
+# Singleton instance
+onchain_mirror_service = OnchainMirrorService()
@@ -0,0 +1,128 @@
+"""
+Reputation Service - Leaderboard scoring and periodic rank persistence
+"""
+import asyncio
+import logging
+
+from sqlalchemy import Float, Integer, String, column, desc, func, or_, select, table, text, update
+
+from app.core.config import settings
+from app.db.database import SessionLocal, is_sqlite
+from app.db.locks import RANK_REFRESH_LOCK_KEY, LeaderLock
+from app.db.models import ContributorReputation
+
+logger = logging.getLogger(__name__)
+
+# Materialized ranking (Postgres only, created by migration b4e8f1c6d352)
+RANK_VIEW_NAME = "mv_reputation_rank"
+rank_view = table(
+    RANK_VIEW_NAME,
+    column("id", Integer),
+    column("contributor_address", String),
+    column("total_approved", Integer),
+    column("total_rejected", Integer),
+    column("total_rewards", Float),
+    column("score", Float),
+    column("rank", Integer)
+)
+
+class ReputationService:
+    """Compute reputation scores/ranks in SQL and persist them off the read path"""
+    
+    def __init__(self):
+        self._leader = LeaderLock(RANK_REFRESH_LOCK_KEY)
+
+    @staticmethod
+    def score_expression():
+        """Reputation score = (total_approved * 10) - (total_rejected * 2) + (total_rewards * 0.1)"""
+        return (
+            (ContributorReputation.total_approved * 10) -
+            (ContributorReputation.total_rejected * 2) +
+            (ContributorReputation.total_rewards * 0.1)
+        )
+
+    def ranked_query(self):
+        """Select every reputation row with its calculated score and rank"""
+        score = self.score_expression()
+        return select(
+            ContributorReputation,
+            score.label("calculated_score"),
+            func.row_number().over(
+                order_by=(desc(score), ContributorReputation.id)
+            ).label("calculated_rank")
+        )
+
+    def persist_ranks(self) -> int:
+        """Write current scores and ranks back with a single UPDATE ... FROM.
+
+        Rows whose stored score and rank already match are skipped, so a quiet
+        leaderboard costs no writes.
+        """
+        score = self.score_expression()
+        ranked = select(
+            ContributorReputation.id,
+            score.label("score"),
+            func.row_number().over(
+                order_by=(desc(score), ContributorReputation.id)
+            ).label("rank")
+        ).subquery()
+
+        db = SessionLocal()
+        try:
+            result = db.execute(
+                update(ContributorReputation)
+                .where(
+                    ContributorReputation.id == ranked.c.id,
+                    or_(
+                        ContributorReputation.reputation_score.is_distinct_from(ranked.c.score),
+                        ContributorReputation.rank.is_distinct_from(ranked.c.rank)
+                    )
+                )
+                .values(reputation_score=ranked.c.score, rank=ranked.c.rank)
+            )
+            db.commit()
+            return result.rowcount
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    @property
+    def uses_rank_view(self) -> bool:
+        """Whether leaderboard pages are read from the materialized rank view"""
+        return not is_sqlite
+
+    def refresh_rank_view(self):
+        """Rebuild the materialized rank view without blocking readers"""
+        db = SessionLocal()
+        try:
+            db.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {RANK_VIEW_NAME}"))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def run_rank_refresh(self):
+        """Persist ranks (and refresh the rank view) every LEADERBOARD_RANK_REFRESH_SECONDS until cancelled.
+
+        Only the worker holding the rank refresh advisory lock does the work;
+        the others retry for the lock each interval.
+        """
+        try:
+            while True:
+                try:
+                    if await asyncio.to_thread(self._leader.try_acquire):
+                        await asyncio.to_thread(self.persist_ranks)
+                        if self.uses_rank_view:
+                            await asyncio.to_thread(self.refresh_rank_view)
+                except Exception as e:
+                    logger.error(f"Error persisting leaderboard ranks: {e}")
+                await asyncio.sleep(settings.LEADERBOARD_RANK_REFRESH_SECONDS)
+        finally:
+            self._leader.release()
+
+# Singleton instance
+reputation_service = ReputationService()
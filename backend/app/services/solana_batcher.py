@@ -0,0 +1,144 @@
+"""
+Solana Batcher - packs queued contribution logs into shared transactions
+"""
+import asyncio
+import logging
+from typing import List, Optional, Tuple
+
+from solders.instruction import Instruction
+
+from app.core.config import settings
+from app.services.solana_service import MAX_TRANSACTION_SIZE, SolanaService, solana_service
+
+logger = logging.getLogger(__name__)
+
+class ContributionBatcher:
+    """Collect log_contribution requests and send them as multi-instruction transactions.
+
+    Callers await a future that resolves to the signature of the transaction
+    their instruction landed in. A batch is flushed once it reaches
+    SOLANA_BATCH_MAX_SIZE requests or SOLANA_BATCH_MAX_WAIT_MS after its first one.
+    """
+
+    def __init__(self, solana: SolanaService):
+        self.solana = solana
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def log_contribution(
+        self,
+        session_id: str,
+        contributor_address: str,
+        round_id: int,
+        gradient_hash: str
+    ) -> str:
+        """Queue a contribution log and wait for the transaction that carries it"""
+        # Build eagerly so a bad request fails on its own, not inside a batch
+        instruction = self.solana.build_log_contribution_instruction(
+            session_id, contributor_address, round_id, gradient_hash
+        )
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((instruction, future))
+        return await future
+
+    def _ensure_worker(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self.run())
+
+    async def run(self):
+        """Drain the queue into batches until cancelled"""
+        loop = asyncio.get_running_loop()
+        max_wait = settings.SOLANA_BATCH_MAX_WAIT_MS / 1000
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + max_wait
+            while len(batch) < settings.SOLANA_BATCH_MAX_SIZE:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._flush(batch)
+            except BaseException as e:
+                # Cancelled (or failed) mid-flush: don't leave callers waiting forever
+                error = e if isinstance(e, Exception) else RuntimeError("Contribution batcher stopped")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                raise
+
+    async def _flush(self, batch: List[Tuple[Instruction, asyncio.Future]]):
+        try:
+            recent_blockhash = (await self.solana.client.get_latest_blockhash()).value.blockhash
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for group in self._pack(batch):
+            try:
+                tx_signature = await self.solana.send_instructions(
+                    [instruction for instruction, _ in group],
+                    recent_blockhash=recent_blockhash
+                )
+                logger.info(f"Logged {len(group)} contributions in {tx_signature}")
+            except Exception as e:
+                logger.error(f"Error logging contribution batch: {e}")
+                for _, future in group:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for _, future in group:
+                if not future.done():
+                    future.set_result(tx_signature)
+
+    def _pack(self, batch: List[Tuple[Instruction, asyncio.Future]]) -> List[List[Tuple[Instruction, asyncio.Future]]]:
+        """Split a batch into groups that each fit in one transaction.
+
+        A group never holds two instructions writing the same contribution
+        account, since the second would fail and take the whole transaction with it.
+        """
+        fee_payer = self.solana.keypair.pubkey() if self.solana.keypair else None
+        groups = []
+        current = []
+        written = set()
+        for item in batch:
+            instruction = item[0]
+            contribution_account = instruction.accounts[2].pubkey
+            candidate = [i for i, _ in current] + [instruction]
+            if current and (
+                contribution_account in written
+                or (fee_payer and self.solana.transaction_size(candidate, fee_payer) > MAX_TRANSACTION_SIZE)
+            ):
+                groups.append(current)
+                current = []
+                written = set()
+            current.append(item)
+            written.add(contribution_account)
+        if current:
+            groups.append(current)
+        return groups
+
+    async def close(self):
+        """Stop the worker; requests still queued or mid-flush are failed"""
+        if self._worker is not None:
+            worker, self._worker = self._worker, None
+            worker.cancel()
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
+        while self._queue is not None and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Contribution batcher stopped"))
+
+# Singleton instance
+contribution_batcher = ContributionBatcher(solana_service)
@@ -1,8 +1,8 @@
 """
 Solana Service - Real Blockchain Integration
 """
-from solana.rpc.api import Client
-from solana.rpc.commitment import Confirmed, Finalized
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Confirmed
 from solana.rpc.types import TxOpts
 from solders.keypair import Keypair
 from solders.pubkey import Pubkey
@@ -10,25 +10,55 @@ from solders.system_program import transfer, TransferParams
 from solders.transaction import Transaction
 from solders.message import Message
 from solders.signature import Signature
+from solders.instruction import Instruction, AccountMeta
+from solders.transaction_status import TransactionConfirmationStatus
 from anchorpy import Provider, Wallet, Program
 from anchorpy.program.context import Context
 import base58
+import base64
+import httpx
 import json
 import os
-from typing import Dict, Optional, List
+from typing import Any, Dict, Optional, List, Tuple
 import asyncio
 from app.core.config import settings
+from app.core.pubkeys import parse_pubkey
 import logging
 
+try:
+    import h2  # noqa: F401 - enables HTTP/2 in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# System Program ID (Solana's system program)
+SYSTEM_PROGRAM_ID = Pubkey.from_string("11111111111111111111111111111111")
+
+# Serialized transaction size limit (IPv6 MTU minus headers)
+MAX_TRANSACTION_SIZE = 1232
+
+# Signatures polled per getSignatureStatuses call (RPC maximum is 256)
+CONFIRMATION_BATCH_SIZE = 256
+# Polls (about one per second) before a sent transaction is reported unconfirmed
+CONFIRMATION_MAX_POLLS = 30
+
 class SolanaService:
     """Handle real Solana blockchain interactions"""
     
     def __init__(self):
         self.rpc_url = settings.SOLANA_RPC_URL
-        self.client = Client(self.rpc_url, commitment=Confirmed)
-        self.program_id = Pubkey.from_string(settings.PROGRAM_ID) if settings.PROGRAM_ID else None
+        self.client = AsyncClient(self.rpc_url, commitment=Confirmed)
+        # Try to parse PROGRAM_ID, but handle invalid ones gracefully
+        try:
+            self.program_id = parse_pubkey(settings.PROGRAM_ID) if settings.PROGRAM_ID else None
+        except (ValueError, Exception):
+            self.program_id = None
+        if not self.program_id:
+            logger.warning(f"PROGRAM_ID '{settings.PROGRAM_ID}' not usable, on-chain reads are disabled")
+        self._http: Optional[httpx.AsyncClient] = None
+        self._confirmations: Optional[asyncio.Queue] = None
         
         # Load keypair for signing transactions
         self.keypair = None
@@ -51,6 +81,11 @@ class SolanaService:
                 logger.error(f"Error loading keypair: {e}")
                 raise
     
+    @property
+    def is_configured(self) -> bool:
+        """Whether on-chain reads can be made (a valid PROGRAM_ID is set)"""
+        return self.program_id is not None
+    
     async def register_training_session(
         self,
         session_id: str,
@@ -68,8 +103,8 @@ class SolanaService:
                     raise ValueError("Keypair required for transactions")
                 
                 # Fallback: Create a simple transfer transaction as proof
-                trainer_pubkey = Pubkey.from_string(trainer_address)
-                recent_blockhash = self.client.get_latest_blockhash().value.blockhash
+                trainer_pubkey = parse_pubkey(trainer_address)
+                recent_blockhash = (await self.client.get_latest_blockhash()).value.blockhash
                 
                 # Create a minimal transaction (1 lamport transfer to self)
                 transfer_ix = transfer(
@@ -85,12 +120,12 @@ class SolanaService:
                 transaction.sign([self.keypair], recent_blockhash)
                 
                 opts = TxOpts(skip_preflight=False, preflight_commitment=Confirmed)
-                result = self.client.send_transaction(transaction, opts=opts)
+                result = await self.client.send_transaction(transaction, opts=opts)
                 
                 if result.value:
                     tx_signature = str(result.value)
                     logger.info(f"Training session registered (fallback): {tx_signature}")
-                    await self._confirm_transaction(tx_signature)
+                    self._enqueue_confirmation(tx_signature)
                     return tx_signature
                 else:
                     raise Exception("Transaction failed to send")
@@ -101,7 +136,7 @@ class SolanaService:
             session_id_bytes = session_id.encode()[:32].ljust(32, b'\0')
             model_hash_bytes = bytes.fromhex(model_hash) if len(model_hash) == 64 else model_hash.encode()[:32].ljust(32, b'\0')
             
-            trainer_pubkey = Pubkey.from_string(trainer_address)
+            trainer_pubkey = parse_pubkey(trainer_address)
             
             # Find PDA for training session
             session_seeds = [b"training_session", session_id_bytes]
@@ -120,7 +155,7 @@ class SolanaService:
             )
             
             # Create transaction
-            recent_blockhash = self.client.get_latest_blockhash().value.blockhash
+            recent_blockhash = (await self.client.get_latest_blockhash()).value.blockhash
             message = Message.new_with_blockhash(
                 [instruction_data],
                 trainer_pubkey,
@@ -137,14 +172,14 @@ class SolanaService:
             
             # Send transaction
             opts = TxOpts(skip_preflight=False, preflight_commitment=Confirmed)
-            result = self.client.send_transaction(transaction, opts=opts)
+            result = await self.client.send_transaction(transaction, opts=opts)
             
             if result.value:
                 tx_signature = str(result.value)
                 logger.info(f"Training session registered: {tx_signature}")
                 
                 # Confirm transaction
-                await self._confirm_transaction(tx_signature)
+                self._enqueue_confirmation(tx_signature)
                 
                 return tx_signature
             else:
@@ -163,66 +198,98 @@ class SolanaService:
     ) -> str:
         """Log contribution on Solana blockchain"""
         try:
-            if not self.program_id:
-                raise ValueError("PROGRAM_ID not configured")
-            
-            contributor_pubkey = Pubkey.from_string(contributor_address)
-            session_id_bytes = session_id.encode()[:32].ljust(32, b'\0')
-            gradient_hash_bytes = bytes.fromhex(gradient_hash) if len(gradient_hash) == 64 else gradient_hash.encode()[:32].ljust(32, b'\0')
-            
-            # Find PDAs
-            session_seeds = [b"training_session", session_id_bytes]
-            session_pda, _ = Pubkey.find_program_address(session_seeds, self.program_id)
-            
-            contribution_seeds = [
-                b"contribution",
-                bytes(session_pda),
-                bytes(contributor_pubkey)
-            ]
-            contribution_pda, contribution_bump = Pubkey.find_program_address(
-                contribution_seeds,
-                self.program_id
+            instruction = self.build_log_contribution_instruction(
+                session_id, contributor_address, round_id, gradient_hash
             )
-            
-            # Build instruction
-            instruction_data = self._build_log_contribution_instruction(
-                gradient_hash_bytes,
-                round_id,
-                contribution_bump,
-                contributor_pubkey,
-                session_pda,
-                contribution_pda
-            )
-            
-            # Create and send transaction
-            recent_blockhash = self.client.get_latest_blockhash().value.blockhash
-            message = Message.new_with_blockhash(
-                [instruction_data],
-                contributor_pubkey,
-                recent_blockhash
-            )
-            transaction = Transaction.new_unsigned(message)
-            
-            if self.keypair:
-                transaction.sign([self.keypair], recent_blockhash)
-            else:
-                raise ValueError("Keypair required")
-            
-            opts = TxOpts(skip_preflight=False, preflight_commitment=Confirmed)
-            result = self.client.send_transaction(transaction, opts=opts)
-            
-            if result.value:
-                tx_signature = str(result.value)
-                logger.info(f"Contribution logged: {tx_signature}")
-                await self._confirm_transaction(tx_signature)
-                return tx_signature
-            else:
-                raise Exception("Transaction failed")
+            tx_signature = await self.send_instructions([instruction], parse_pubkey(contributor_address))
+            logger.info(f"Contribution logged: {tx_signature}")
+            return tx_signature
                 
         except Exception as e:
             logger.error(f"Error logging contribution: {e}")
             raise
     
+    def session_address(self, session_id: str) -> str:
+        """Base58 training session PDA, as reported in the "session" field of parsed accounts"""
+        session_id_bytes = session_id.encode()[:32].ljust(32, b'\0')
+        session_pda, _ = Pubkey.find_program_address([b"training_session", session_id_bytes], self.program_id)
+        return str(session_pda)
+    
+    def build_log_contribution_instruction(
+        self,
+        session_id: str,
+        contributor_address: str,
+        round_id: int,
+        gradient_hash: str
+    ) -> Instruction:
+        """Build the log_contribution instruction without sending it"""
+        if not self.program_id:
+            raise ValueError("PROGRAM_ID not configured")
+        
+        contributor_pubkey = parse_pubkey(contributor_address)
+        session_id_bytes = session_id.encode()[:32].ljust(32, b'\0')
+        gradient_hash_bytes = bytes.fromhex(gradient_hash) if len(gradient_hash) == 64 else gradient_hash.encode()[:32].ljust(32, b'\0')
+        
+        # Find PDAs
+        session_seeds = [b"training_session", session_id_bytes]
+        session_pda, _ = Pubkey.find_program_address(session_seeds, self.program_id)
+        
+        contribution_seeds = [
+            b"contribution",
+            bytes(session_pda),
+            bytes(contributor_pubkey)
+        ]
+        contribution_pda, contribution_bump = Pubkey.find_program_address(
+            contribution_seeds,
+            self.program_id
+        )
+        
+        return self._build_log_contribution_instruction(
+            gradient_hash_bytes,
+            round_id,
+            contribution_bump,
+            contributor_pubkey,
+            session_pda,
+            contribution_pda
+        )
+    
+    async def send_instructions(
+        self,
+        instructions: List[Instruction],
+        fee_payer: Optional[Pubkey] = None,
+        recent_blockhash=None
+    ) -> str:
+        """Sign and send one transaction carrying every instruction; confirmation happens in the background"""
+        if not self.keypair:
+            raise ValueError("Keypair required")
+        if recent_blockhash is None:
+            recent_blockhash = (await self.client.get_latest_blockhash()).value.blockhash
+        
+        message = Message.new_with_blockhash(
+            instructions,
+            fee_payer or self.keypair.pubkey(),
+            recent_blockhash
+        )
+        transaction = Transaction.new_unsigned(message)
+        transaction.sign([self.keypair], recent_blockhash)
+        
+        opts = TxOpts(skip_preflight=False, preflight_commitment=Confirmed)
+        result = await self.client.send_transaction(transaction, opts=opts)
+        if not result.value:
+            raise Exception("Transaction failed")
+        
+        tx_signature = str(result.value)
+        self._enqueue_confirmation(tx_signature)
+        return tx_signature
+    
+    @staticmethod
+    def transaction_size(instructions: List[Instruction], fee_payer: Pubkey) -> int:
+        """Serialized size of a transaction carrying these instructions"""
+        message = Message(instructions, fee_payer)
+        signatures = message.header.num_required_signatures
+        # compact-u16 signature count + 64 bytes per signature + message
+        return 1 + 64 * signatures + len(bytes(message))
+    
     async def distribute_reward(
         self,
         contributor_address: str,
@@ -236,7 +303,7 @@ class SolanaService:
             if not self.program_id:
                 raise ValueError("PROGRAM_ID not configured")
             
-            contributor_pubkey = Pubkey.from_string(contributor_address)
+            contributor_pubkey = parse_pubkey(contributor_address)
             session_id_bytes = session_id.encode()[:32].ljust(32, b'\0')
             
             # Convert amount to lamports (assuming 9 decimals for SPL token)
@@ -267,7 +334,7 @@ class SolanaService:
                 )
             else:
                 # Native SOL transfer
-                from_pubkey = self.keypair.pubkey() if self.keypair else Pubkey.from_string(settings.SOLANA_PRIVATE_KEY)
+                from_pubkey = self.keypair.pubkey() if self.keypair else parse_pubkey(settings.SOLANA_PRIVATE_KEY)
                 instruction_data = transfer(
                     TransferParams(
                         from_pubkey=from_pubkey,
@@ -277,7 +344,7 @@ class SolanaService:
                 )
             
             # Create and send transaction
-            recent_blockhash = self.client.get_latest_blockhash().value.blockhash
+            recent_blockhash = (await self.client.get_latest_blockhash()).value.blockhash
             message = Message.new_with_blockhash(
                 [instruction_data],
                 self.keypair.pubkey() if self.keypair else contributor_pubkey,
@@ -291,12 +358,12 @@ class SolanaService:
                 raise ValueError("Keypair required for reward distribution")
             
             opts = TxOpts(skip_preflight=False, preflight_commitment=Confirmed)
-            result = self.client.send_transaction(transaction, opts=opts)
+            result = await self.client.send_transaction(transaction, opts=opts)
             
             if result.value:
                 tx_signature = str(result.value)
                 logger.info(f"Reward distributed: {tx_signature}")
-                await self._confirm_transaction(tx_signature)
+                self._enqueue_confirmation(tx_signature)
                 return tx_signature
             else:
                 raise Exception("Transaction failed")
@@ -308,8 +375,8 @@ class SolanaService:
     async def get_wallet_balance(self, address: str) -> float:
         """Get real SOL balance for a wallet"""
         try:
-            pubkey = Pubkey.from_string(address)
-            response = self.client.get_balance(pubkey, commitment=Confirmed)
+            pubkey = parse_pubkey(address)
+            response = await self.client.get_balance(pubkey, commitment=Confirmed)
             
             if response.value is not None:
                 # Convert lamports to SOL
@@ -330,10 +397,10 @@ class SolanaService:
             
             from solana.rpc.types import TokenAccountOpts
             
-            owner_pubkey = Pubkey.from_string(address)
+            owner_pubkey = parse_pubkey(address)
             
             # Get token accounts
-            response = self.client.get_token_accounts_by_owner(
+            response = await self.client.get_token_accounts_by_owner(
                 owner_pubkey,
                 TokenAccountOpts(program_id=TOKEN_PROGRAM_ID)
             )
@@ -372,7 +439,7 @@ class SolanaService:
         """Get real transaction details from Solana"""
         try:
             signature = Signature.from_string(tx_hash)
-            response = self.client.get_transaction(
+            response = await self.client.get_transaction(
                 signature,
                 commitment=Confirmed,
                 max_supported_transaction_version=0
@@ -395,6 +462,42 @@ class SolanaService:
             logger.error(f"Error getting transaction: {e}")
             raise
     
+    async def get_transactions_batch(self, tx_hashes: List[str]) -> List[Optional[Dict]]:
+        """Get details for several transactions with one batched RPC request.
+        
+        Results line up with ``tx_hashes``; a transaction that errored or was
+        not found yields None.
+        """
+        if not tx_hashes:
+            return []
+        
+        results = await self.batch_fetch([
+            ("getTransaction", [tx_hash, {
+                "encoding": "jsonParsed",
+                "commitment": "confirmed",
+                "maxSupportedTransactionVersion": 0
+            }])
+            for tx_hash in tx_hashes
+        ])
+        
+        transactions = []
+        for tx_hash, tx in zip(tx_hashes, results):
+            if not tx:
+                transactions.append(None)
+                continue
+            meta = tx.get("meta") or {}
+            err = meta.get("err")
+            transactions.append({
+                "transaction_hash": tx_hash,
+                "slot": tx.get("slot"),
+                "block_time": tx.get("blockTime"),
+                "fee": meta.get("fee", 0),
+                "status": "success" if meta and err is None else "failed",
+                "error": str(err) if err else None,
+                "signatures": (tx.get("transaction") or {}).get("signatures", []),
+            })
+        return transactions
+    
     async def get_training_sessions_onchain(self, trainer_address: Optional[str] = None) -> List[Dict]:
         """Get training sessions from on-chain data"""
         try:
@@ -402,7 +505,7 @@ class SolanaService:
                 raise ValueError("PROGRAM_ID not configured")
             
             # Get program accounts
-            response = self.client.get_program_accounts(
+            response = await self.client.get_program_accounts(
                 self.program_id,
                 commitment=Confirmed,
                 encoding="jsonParsed"
@@ -437,7 +540,7 @@ class SolanaService:
             session_pda, _ = Pubkey.find_program_address(session_seeds, self.program_id)
             
             # Get all contribution accounts for this session
-            response = self.client.get_program_accounts(
+            response = await self.client.get_program_accounts(
                 self.program_id,
                 commitment=Confirmed,
                 encoding="jsonParsed",
@@ -469,7 +572,7 @@ class SolanaService:
                 raise ValueError("PROGRAM_ID not configured")
             
             # Get all reward accounts
-            response = self.client.get_program_accounts(
+            response = await self.client.get_program_accounts(
                 self.program_id,
                 commitment=Confirmed,
                 encoding="jsonParsed"
@@ -492,20 +595,162 @@ class SolanaService:
             logger.error(f"Error getting rewards: {e}")
             return []
     
-    async def _confirm_transaction(self, signature: str, max_retries: int = 30) -> bool:
-        """Confirm transaction with retries"""
+    def _get_http(self) -> httpx.AsyncClient:
+        """Shared pooled HTTP client, so RPC calls reuse keep-alive connections"""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                timeout=30.0,
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+            )
+        return self._http
+    
+    async def prewarm(self, connections: int):
+        """Open RPC connections ahead of the first request with concurrent getHealth calls"""
+        if connections <= 0:
+            return
+        http = self._get_http()
+        results = await asyncio.gather(
+            self.client.is_connected(),
+            *(
+                http.post(self.rpc_url, json={"jsonrpc": "2.0", "id": idx, "method": "getHealth"})
+                for idx in range(connections)
+            ),
+            return_exceptions=True
+        )
+        failures = [r for r in results if isinstance(r, Exception)]
+        if failures:
+            logger.warning(f"Solana RPC prewarm: {len(failures)} of {len(results)} requests failed: {failures[0]}")
+    
+    async def close(self):
+        """Close the RPC client and the shared HTTP client"""
+        await self.client.close()
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+    
+    async def batch_fetch(self, calls: List[Tuple[str, list]]) -> List[Any]:
+        """Send several JSON-RPC calls in a single HTTP request.
+        
+        Results are returned in the same order as ``calls``; responses are matched
+        by request id since JSON-RPC 2.0 does not guarantee response order.
+        A call that returned an error yields None.
+        """
+        payload = [
+            {"jsonrpc": "2.0", "id": idx, "method": method, "params": params}
+            for idx, (method, params) in enumerate(calls)
+        ]
+        response = await self._get_http().post(self.rpc_url, json=payload)
+        response.raise_for_status()
+        
+        results_by_id = {}
+        for item in response.json():
+            if item.get("error"):
+                logger.warning(f"RPC batch call {item.get('id')} failed: {item['error']}")
+                continue
+            results_by_id[item.get("id")] = item.get("result")
+        
+        return [results_by_id.get(idx) for idx in range(len(calls))]
+    
+    async def get_onchain_snapshot(
+        self,
+        session_id: str = "",
+        contributor_address: Optional[str] = None
+    ) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+        """Get training sessions, contributions and rewards with one batched RPC request"""
         try:
-            sig = Signature.from_string(signature)
-            for i in range(max_retries):
-                response = self.client.confirm_transaction(sig, commitment=Finalized)
-                if response.value:
-                    if response.value[0].confirmation_status == "finalized":
-                        return True
-                await asyncio.sleep(1)
-            return False
+            if not self.program_id:
+                raise ValueError("PROGRAM_ID not configured")
+            
+            session_id_bytes = session_id.encode()[:32].ljust(32, b'\0')
+            session_pda, _ = Pubkey.find_program_address([b"training_session", session_id_bytes], self.program_id)
+            program_id = str(self.program_id)
+            config = {"commitment": "confirmed", "encoding": "base64"}
+            
+            all_accounts, session_accounts = await self.batch_fetch([
+                ("getProgramAccounts", [program_id, config]),
+                ("getProgramAccounts", [program_id, {
+                    **config,
+                    "filters": [{"memcmp": {"offset": 8, "bytes": base58.b58encode(bytes(session_pda)).decode()}}]
+                }]),
+            ])
+            
+            sessions = []
+            rewards = []
+            for account_data in self._decode_program_accounts(all_accounts):
+                session_data = self._parse_training_session_account(account_data)
+                if session_data:
+                    sessions.append(session_data)
+                reward_data = self._parse_reward_account(account_data)
+                if reward_data:
+                    if not contributor_address or reward_data.get("contributor") == contributor_address:
+                        rewards.append(reward_data)
+            
+            contributions = []
+            for account_data in self._decode_program_accounts(session_accounts):
+                contribution_data = self._parse_contribution_account(account_data)
+                if contribution_data:
+                    contributions.append(contribution_data)
+            
+            return sessions, contributions, rewards
         except Exception as e:
-            logger.error(f"Error confirming transaction: {e}")
-            return False
+            logger.error(f"Error getting on-chain snapshot: {e}")
+            return [], [], []
+    
+    def _decode_program_accounts(self, accounts: Optional[List[Dict]]) -> List[bytes]:
+        """Decode base64 account data from a raw getProgramAccounts result"""
+        decoded = []
+        for account_info in accounts or []:
+            try:
+                data = account_info["account"]["data"]
+                decoded.append(base64.b64decode(data[0]))
+            except Exception as e:
+                logger.warning(f"Error decoding account: {e}")
+                continue
+        return decoded
+    
+    def _get_confirmation_queue(self) -> asyncio.Queue:
+        if self._confirmations is None:
+            self._confirmations = asyncio.Queue()
+        return self._confirmations
+    
+    def _enqueue_confirmation(self, signature: str):
+        """Hand a sent transaction to the background confirmer instead of waiting inline"""
+        self._get_confirmation_queue().put_nowait(signature)
+    
+    async def run_confirmations(self):
+        """Poll finalization of sent transactions in batches until cancelled"""
+        queue = self._get_confirmation_queue()
+        pending: Dict[str, int] = {}  # signature -> polls left
+        while True:
+            if not pending:
+                pending[await queue.get()] = CONFIRMATION_MAX_POLLS
+            while not queue.empty():
+                pending[queue.get_nowait()] = CONFIRMATION_MAX_POLLS
+            
+            batch = list(pending)[:CONFIRMATION_BATCH_SIZE]
+            try:
+                response = await self.client.get_signature_statuses(
+                    [Signature.from_string(sig) for sig in batch]
+                )
+                statuses = response.value
+            except Exception as e:
+                logger.warning(f"Error polling transaction confirmations: {e}")
+                statuses = [None] * len(batch)
+            
+            for sig, tx_status in zip(batch, statuses):
+                if tx_status is not None and tx_status.err is not None:
+                    logger.error(f"Transaction {sig} failed on-chain: {tx_status.err}")
+                    del pending[sig]
+                elif tx_status is not None and tx_status.confirmation_status == TransactionConfirmationStatus.Finalized:
+                    del pending[sig]
+                else:
+                    pending[sig] -= 1
+                    if pending[sig] <= 0:
+                        logger.warning(f"Transaction {sig} not finalized after {CONFIRMATION_MAX_POLLS} polls")
+                        del pending[sig]
+            
+            await asyncio.sleep(1)
     
     def _build_register_session_instruction(self, session_id: bytes, model_hash: bytes, total_rounds: int, bump: int):
         """Build instruction for registering training session"""
@@ -572,7 +817,7 @@ class SolanaService:
             )
         
         # Use SPL token program (simplified - would use actual SPL token client)
-        token_mint_pubkey = Pubkey.from_string(token_mint)
+        token_mint_pubkey = parse_pubkey(token_mint)
         from_pubkey = self.keypair.pubkey() if self.keypair else Pubkey.default()
         
         # In production, use spl-token library to create proper transfer instruction
@@ -656,3 +901,10 @@ class SolanaService:
         except Exception as e:
             logger.warning(f"Error parsing reward: {e}")
             return None
+
+# Singleton instance
+solana_service = SolanaService()
+
+def get_solana_service() -> SolanaService:
+    """Dependency returning the shared SolanaService, so requests reuse its RPC connections"""
+    return solana_service
@@ -3,28 +3,50 @@ Sentinel.ai Backend - Main FastAPI Application
 """
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 import uvicorn
+import asyncio
 from contextlib import asynccontextmanager
 
 from app.api import challenges, submissions, admin, leaderboard, auth
 from app.core.config import settings
+from app.core.logging_config import setup_logging, shutdown_logging
 from app.db.mongodb import MongoDB
+from app.services.solana_service import solana_service
+from app.services.flexai_solana_service import flexai_solana_service
+from app.services.solana_batcher import contribution_batcher
+from app.services.reputation_service import reputation_service
+from app.services.onchain_mirror_service import onchain_mirror_service
 
 # MongoDB connection lifecycle
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    setup_logging()
     await MongoDB.connect()
+    rank_refresh = asyncio.create_task(reputation_service.run_rank_refresh())
+    onchain_mirror = asyncio.create_task(onchain_mirror_service.run_periodic())
+    tx_confirmations = asyncio.create_task(solana_service.run_confirmations())
+    # Warm the RPC connection pool in the background so startup never waits on the node
+    rpc_prewarm = asyncio.create_task(solana_service.prewarm(settings.SOLANA_PREWARM_CONNECTIONS))
     yield
     # Shutdown
+    rank_refresh.cancel()
+    onchain_mirror.cancel()
+    tx_confirmations.cancel()
+    rpc_prewarm.cancel()
     await MongoDB.disconnect()
+    await contribution_batcher.close()
+    await solana_service.close()
+    await flexai_solana_service.close()
+    shutdown_logging()
 
 app = FastAPI(
     title="FlexAI API",
     description="Decentralized AI Fine-tuning Challenge Marketplace",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
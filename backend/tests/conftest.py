@@ -0,0 +1,24 @@
+"""
+Shared test fixtures - a throwaway SQLite database and the in-process cache
+"""
+import os
+import tempfile
+
+# Must be set before app.core.config is imported
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
+os.environ["REDIS_URL"] = ""
+
+import pytest
+
+from app.db.database import Base, engine, SessionLocal
+
+@pytest.fixture
+def db():
+    """Fresh schema per test, with a session for arranging rows"""
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(engine)
@@ -0,0 +1,109 @@
+"""
+Tests for the stale-while-revalidate response cache
+"""
+import asyncio
+import pytest
+from app.core.cache import ResponseCache
+
+class CountingFactory:
+    """Async factory that returns value-1, value-2, ... and counts its calls"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return {"value": self.calls}
+
+async def _drain(cache):
+    """Wait for background refreshes scheduled by get_or_set_swr"""
+    if cache._refresh_tasks:
+        await asyncio.gather(*cache._refresh_tasks)
+
+def test_swr_miss_computes_and_stores():
+    """Test that a miss blocks on the factory and caches its result"""
+    async def run():
+        cache = ResponseCache()
+        factory = CountingFactory()
+
+        value = await cache.get_or_set_swr("k", factory, ttl=30, stale_ttl=60)
+
+        assert value == {"value": 1}
+        assert factory.calls == 1
+        assert (await cache.get("k"))["value"] == {"value": 1}
+
+    asyncio.run(run())
+
+def test_swr_fresh_hit_skips_factory():
+    """Test that a fresh entry is served without recomputing"""
+    async def run():
+        cache = ResponseCache()
+        factory = CountingFactory()
+
+        await cache.get_or_set_swr("k", factory, ttl=30, stale_ttl=60)
+        value = await cache.get_or_set_swr("k", factory, ttl=30, stale_ttl=60)
+
+        assert value == {"value": 1}
+        assert factory.calls == 1
+        assert not cache._refresh_tasks
+
+    asyncio.run(run())
+
+def test_swr_stale_hit_serves_old_value_and_refreshes():
+    """Test that a stale entry is returned at once while one task recomputes it"""
+    async def run():
+        cache = ResponseCache()
+        factory = CountingFactory()
+        # ttl=0 makes the entry stale as soon as it is written
+        await cache._store_swr("k", {"value": 0}, ttl=0, stale_ttl=60)
+
+        value = await cache.get_or_set_swr("k", factory, ttl=30, stale_ttl=60)
+        assert value == {"value": 0}
+        assert await cache.get("k:refreshing") is not None
+
+        await _drain(cache)
+
+        assert factory.calls == 1
+        assert (await cache.get("k"))["value"] == {"value": 1}
+        # The refresh lock is released once the new value is stored
+        assert await cache.get("k:refreshing") is None
+
+    asyncio.run(run())
+
+def test_swr_refreshing_lock_prevents_stampede():
+    """Test that only one refresh runs while the lock is held"""
+    async def run():
+        cache = ResponseCache()
+        factory = CountingFactory()
+        await cache._store_swr("k", {"value": 0}, ttl=0, stale_ttl=60)
+        assert await cache.acquire_lock("k:refreshing", 30)
+
+        values = await asyncio.gather(*(
+            cache.get_or_set_swr("k", factory, ttl=30, stale_ttl=60) for _ in range(5)
+        ))
+        await _drain(cache)
+
+        assert values == [{"value": 0}] * 5
+        assert factory.calls == 0
+
+    asyncio.run(run())
+
+def test_swr_failed_refresh_keeps_stale_value():
+    """Test that a failing background refresh leaves the stale entry and frees the lock"""
+    async def run():
+        cache = ResponseCache()
+        await cache._store_swr("k", {"value": 0}, ttl=0, stale_ttl=60)
+
+        async def failing():
+            raise RuntimeError("boom")
+
+        assert await cache.get_or_set_swr("k", failing, ttl=30, stale_ttl=60) == {"value": 0}
+        await _drain(cache)
+
+        assert (await cache.get("k"))["value"] == {"value": 0}
+        assert await cache.get("k:refreshing") is None
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -1,10 +1,15 @@
 """
 Test scripts for federated learning
 """
+import os
+import struct
 import pytest
 import numpy as np
+from cryptography.exceptions import InvalidTag
 from app.services.federated_learning import FederatedLearningService
-from app.core.security import EncryptionService, LocalDifferentialPrivacy
+from app.core.security import (
+    EncryptionService, LocalDifferentialPrivacy, CommitmentHash, GCM_NONCE_SIZE
+)
 
 def test_federated_averaging():
     """Test federated averaging of gradients"""
@@ -48,6 +53,69 @@ def test_encryption():
     for i in range(len(gradients)):
         assert np.allclose(decrypted[i], gradients[i])
 
+def test_encryption_mixed_dtypes_and_shapes():
+    """Test round trip of arrays with different dtypes and shapes"""
+    encryption_service = EncryptionService()
+    
+    gradients = [
+        np.array(3.5),  # 0-d
+        np.array([1.0, -2.5], dtype=np.float16),
+        np.arange(6, dtype=np.int32).reshape(2, 3),
+        np.zeros((0, 4), dtype=np.float64),
+        np.array([True, False]),
+        np.arange(24, dtype=np.float32).reshape(2, 3, 4)[:, ::2]  # non-contiguous
+    ]
+    
+    decrypted = encryption_service.decrypt_gradients(encryption_service.encrypt_gradients(gradients))
+    
+    assert len(decrypted) == len(gradients)
+    for original, result in zip(gradients, decrypted):
+        assert result.dtype == original.dtype
+        assert result.shape == original.shape
+        assert np.array_equal(result, original)
+
+def test_encryption_rejects_object_dtype():
+    """Test that object arrays are refused on both sides"""
+    encryption_service = EncryptionService()
+    
+    with pytest.raises(ValueError):
+        encryption_service.encrypt_gradients([np.array([{}, None], dtype=object)])
+    
+    # A validly encrypted frame whose header claims an object dtype
+    frame = struct.pack("<I", 1) + struct.pack("<4sIQ", b"|O", 1, 1) + b"\0" * 8
+    nonce = os.urandom(GCM_NONCE_SIZE)
+    encrypted = nonce + encryption_service.cipher.encrypt(nonce, frame, None)
+    
+    with pytest.raises(ValueError):
+        encryption_service.decrypt_gradients(encrypted)
+
+def test_encryption_tampered_ciphertext():
+    """Test that a modified ciphertext fails authentication"""
+    encryption_service = EncryptionService()
+    
+    encrypted = bytearray(encryption_service.encrypt_gradients([np.array([1.0, 2.0, 3.0])]))
+    encrypted[GCM_NONCE_SIZE] ^= 0x01
+    
+    with pytest.raises(InvalidTag):
+        encryption_service.decrypt_gradients(bytes(encrypted))
+
+def test_commitment_hash_deterministic():
+    """Test that the commitment depends only on nonce, dtype, shape and values"""
+    gradients = [np.array([1.0, 2.0, 3.0]), np.arange(4, dtype=np.int64).reshape(2, 2)]
+    nonce = b"\x01" * 32
+    
+    commitment, returned_nonce = CommitmentHash.generate_commitment(gradients, nonce)
+    again, _ = CommitmentHash.generate_commitment([g.copy() for g in gradients], nonce)
+    
+    assert returned_nonce == nonce
+    assert commitment == again
+    assert CommitmentHash.verify_commitment(gradients, commitment, nonce)
+    # Same values with a different dtype give a different digest
+    other, _ = CommitmentHash.generate_commitment(
+        [gradients[0].astype(np.float32), gradients[1]], nonce
+    )
+    assert other != commitment
+
 def test_local_differential_privacy():
     """Test local differential privacy noise addition"""
     ldp = LocalDifferentialPrivacy(epsilon=1.0, sensitivity=1.0)
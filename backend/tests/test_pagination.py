@@ -0,0 +1,78 @@
+"""
+Tests for keyset pagination of listings via the X-Next-Cursor header
+"""
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.core.cache import invalidate_training_sessions
+from app.db.models import Challenge, Submission, TrainingSession
+from app.services.solana_service import get_solana_service
+
+class FakeSolana:
+    async def get_training_sessions_onchain(self, trainer=None):
+        return []
+
+def _walk(client, url, cursor_param, limit):
+    """Follow X-Next-Cursor until the last page, returning every page"""
+    pages, params = [], {"limit": limit}
+    while True:
+        response = client.get(url, params=params)
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return pages
+        params = {"limit": limit, cursor_param: cursor}
+
+def test_session_listing_keyset_pages(db):
+    """Test that after_id pages cover every session once, in id order"""
+    from app.api import training
+
+    db.add_all([TrainingSession(session_id=f"session-{i}", total_rounds=3) for i in range(5)])
+    db.commit()
+    asyncio.run(invalidate_training_sessions())
+
+    app = FastAPI()
+    app.include_router(training.router, prefix="/api/training")
+    app.dependency_overrides[get_solana_service] = lambda: FakeSolana()
+    client = TestClient(app)
+
+    pages = _walk(client, "/api/training/sessions", "after_id", 2)
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [s["session_id"] for page in pages for s in page] == [f"session-{i}" for i in range(5)]
+
+    # A cached page still carries its cursor
+    response = client.get("/api/training/sessions", params={"limit": 2})
+    assert response.headers.get("X-Next-Cursor") is not None
+
+def test_submission_listing_keyset_pages(db):
+    """Test that before_id pages follow (submitted_at DESC, id DESC), ties included"""
+    pytest.importorskip("google.generativeai")
+    from app.api import submissions
+
+    challenge = Challenge(challenge_id="challenge-1", title="t", reward_amount=1.0)
+    db.add(challenge)
+    db.commit()
+    start = datetime(2026, 1, 1)
+    # Pairs of submissions share a timestamp so the id tie-break is exercised
+    db.add_all([
+        Submission(challenge_id=challenge.id, contributor_address=f"C{i}", model_hash=f"hash-{i}", submitted_at=start + timedelta(minutes=i // 2))
+        for i in range(7)
+    ])
+    db.commit()
+
+    app = FastAPI()
+    app.include_router(submissions.router, prefix="/api/submissions")
+    client = TestClient(app)
+
+    expected = [s["id"] for s in client.get("/api/submissions/").json()]
+    pages = _walk(client, "/api/submissions/", "before_id", 3)
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert [s["id"] for page in pages for s in page] == expected == [7, 6, 5, 4, 3, 2, 1]
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,99 @@
+"""
+Tests for persisted leaderboard ranks and the rank view read path
+"""
+import pytest
+from sqlalchemy import text
+from app.api.leaderboard import build_leaderboard
+from app.db.models import ContributorReputation
+from app.services.reputation_service import RANK_VIEW_NAME, ReputationService, reputation_service
+
+# SQLite stand-in for the materialized view created by migration b4e8f1c6d352
+RANK_VIEW_SQL = f"""
+    CREATE VIEW {RANK_VIEW_NAME} AS
+    SELECT
+        id,
+        contributor_address,
+        total_approved,
+        total_rejected,
+        total_rewards,
+        (total_approved * 10 - total_rejected * 2 + total_rewards * 0.1) AS score,
+        row_number() OVER (
+            ORDER BY (total_approved * 10 - total_rejected * 2 + total_rewards * 0.1) DESC, id
+        ) AS rank
+    FROM contributor_reputations
+"""
+
+def _add_reputations(db):
+    db.add_all([
+        ContributorReputation(contributor_address="A", total_approved=1, total_rejected=0, total_rewards=0.0),
+        ContributorReputation(contributor_address="B", total_approved=3, total_rejected=1, total_rewards=5.0),
+        ContributorReputation(contributor_address="C", total_approved=2, total_rejected=0, total_rewards=0.0),
+        # Same score as C; the lower id ranks first
+        ContributorReputation(contributor_address="D", total_approved=2, total_rejected=0, total_rewards=0.0)
+    ])
+    db.commit()
+
+def _stored_ranks(db):
+    db.expire_all()
+    return {
+        r.contributor_address: (r.rank, r.reputation_score)
+        for r in db.query(ContributorReputation).all()
+    }
+
+def test_persist_ranks_writes_scores_and_ranks(db):
+    """Test that ranks follow score order with ties broken by id"""
+    _add_reputations(db)
+
+    assert reputation_service.persist_ranks() == 4
+
+    assert _stored_ranks(db) == {
+        "B": (1, pytest.approx(28.5)),
+        "C": (2, 20.0),
+        "D": (3, 20.0),
+        "A": (4, 10.0)
+    }
+
+def test_persist_ranks_skips_unchanged_rows(db):
+    """Test that only rows whose score or rank moved are rewritten"""
+    _add_reputations(db)
+    reputation_service.persist_ranks()
+
+    assert reputation_service.persist_ranks() == 0
+
+    # A jumps to the top: its score changes and B, C, D each drop a rank
+    a = db.query(ContributorReputation).filter_by(contributor_address="A").one()
+    a.total_approved = 10
+    db.commit()
+
+    assert reputation_service.persist_ranks() == 4
+    assert _stored_ranks(db)["A"] == (1, 100.0)
+    assert reputation_service.persist_ranks() == 0
+
+def test_rank_view_pages_match_window_query(db, monkeypatch):
+    """Test that pages read from the rank view match the window-function path"""
+    _add_reputations(db)
+    db.execute(text(RANK_VIEW_SQL))
+    db.commit()
+
+    expected = [
+        build_leaderboard(db, skip, 2, after_rank).model_dump()
+        for skip, after_rank in [(0, None), (2, None), (0, 2), (0, 4)]
+    ]
+
+    monkeypatch.setattr(ReputationService, "uses_rank_view", property(lambda self: True))
+    actual = [
+        build_leaderboard(db, skip, 2, after_rank).model_dump()
+        for skip, after_rank in [(0, None), (2, None), (0, 2), (0, 4)]
+    ]
+
+    db.execute(text(f"DROP VIEW {RANK_VIEW_NAME}"))
+    db.commit()
+
+    assert actual == expected
+    assert [e["contributor_address"] for e in actual[0]["entries"]] == ["B", "C"]
+    assert [e["rank"] for e in actual[2]["entries"]] == [3, 4]
+    assert actual[3]["entries"] == []
+    assert actual[0]["total"] == 4
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,130 @@
+"""
+Tests for packing queued contribution logs into shared transactions
+"""
+import asyncio
+from types import SimpleNamespace
+import pytest
+from solders.hash import Hash
+from solders.keypair import Keypair
+from app.services.solana_batcher import ContributionBatcher
+from app.services.solana_service import MAX_TRANSACTION_SIZE, SolanaService
+
+class FakeSolana:
+    """Builds real instructions but records transactions instead of sending them"""
+
+    def __init__(self, fail: bool = False):
+        self._builder = SolanaService()
+        self._builder.program_id = Keypair().pubkey()
+        self.keypair = Keypair()
+        self.fail = fail
+        self.sent = []
+
+        async def get_latest_blockhash():
+            return SimpleNamespace(value=SimpleNamespace(blockhash=Hash.default()))
+        self.client = SimpleNamespace(get_latest_blockhash=get_latest_blockhash)
+
+    def build_log_contribution_instruction(self, *args):
+        return self._builder.build_log_contribution_instruction(*args)
+
+    transaction_size = staticmethod(SolanaService.transaction_size)
+
+    async def send_instructions(self, instructions, recent_blockhash=None):
+        if self.fail:
+            raise RuntimeError("rpc down")
+        self.sent.append(instructions)
+        return f"sig-{len(self.sent)}"
+
+def _item(solana, contributor, round_id=1, session_id="session-1"):
+    instruction = solana.build_log_contribution_instruction(
+        session_id, str(contributor.pubkey()), round_id, "ab" * 32
+    )
+    return instruction, None
+
+def test_pack_splits_writes_to_same_contribution_account():
+    """Test that two logs for the same contribution never share a transaction"""
+    solana = FakeSolana()
+    batcher = ContributionBatcher(solana)
+    alice, bob = Keypair(), Keypair()
+
+    batch = [_item(solana, alice), _item(solana, bob), _item(solana, alice)]
+    groups = batcher._pack(batch)
+
+    assert [len(group) for group in groups] == [2, 1]
+    assert groups[0] == batch[:2]
+
+def test_pack_respects_transaction_size():
+    """Test that every packed group fits in one transaction"""
+    solana = FakeSolana()
+    batcher = ContributionBatcher(solana)
+
+    batch = [_item(solana, Keypair()) for _ in range(20)]
+    groups = batcher._pack(batch)
+
+    assert len(groups) > 1
+    assert [item for group in groups for item in group] == batch
+    for group in groups:
+        size = solana.transaction_size([i for i, _ in group], solana.keypair.pubkey())
+        assert size <= MAX_TRANSACTION_SIZE
+
+def test_log_contribution_resolves_with_carrying_transaction():
+    """Test that each caller gets the signature of the transaction holding its log"""
+    async def run():
+        solana = FakeSolana()
+        batcher = ContributionBatcher(solana)
+        alice, bob = Keypair(), Keypair()
+        try:
+            signatures = await asyncio.gather(
+                batcher.log_contribution("session-1", str(alice.pubkey()), 1, "ab" * 32),
+                batcher.log_contribution("session-1", str(bob.pubkey()), 1, "cd" * 32),
+                batcher.log_contribution("session-1", str(alice.pubkey()), 1, "ef" * 32)
+            )
+        finally:
+            await batcher.close()
+
+        assert signatures == ["sig-1", "sig-1", "sig-2"]
+        assert [len(instructions) for instructions in solana.sent] == [2, 1]
+
+    asyncio.run(run())
+
+def test_log_contribution_propagates_send_failure():
+    """Test that a failed transaction fails every request it carried"""
+    async def run():
+        batcher = ContributionBatcher(FakeSolana(fail=True))
+        try:
+            results = await asyncio.gather(
+                batcher.log_contribution("session-1", str(Keypair().pubkey()), 1, "ab" * 32),
+                batcher.log_contribution("session-1", str(Keypair().pubkey()), 1, "cd" * 32),
+                return_exceptions=True
+            )
+        finally:
+            await batcher.close()
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+    asyncio.run(run())
+
+def test_close_mid_flush_fails_waiting_callers():
+    """Test that stopping the batcher while a transaction is in flight fails its callers"""
+    async def run():
+        solana = FakeSolana()
+        sending = asyncio.Event()
+
+        async def slow_send(instructions, recent_blockhash=None):
+            sending.set()
+            await asyncio.sleep(60)
+        solana.send_instructions = slow_send
+
+        batcher = ContributionBatcher(solana)
+        caller = asyncio.create_task(
+            batcher.log_contribution("session-1", str(Keypair().pubkey()), 1, "ab" * 32)
+        )
+        await asyncio.wait_for(sending.wait(), 5)
+        await batcher.close()
+
+        with pytest.raises(RuntimeError):
+            await asyncio.wait_for(caller, 1)
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    pytest.main([__file__])